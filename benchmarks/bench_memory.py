@@ -0,0 +1,89 @@
+"""
+Benchmark the memory peak of streaming, parsing and writing large responses.
+
+For every response size, a to-do list of that size is streamed by the fake
+provider through run_async(), validated against TodoModel and written to a
+TOML file. The Python heap peak is measured with tracemalloc and reported in
+megabytes and as a multiple of the response size.
+
+Usage (from the repository root, with uplan installed):
+    python benchmarks/bench_memory.py [--sizes 1 5 10 25 50] [--chunk-size 4096] [--save]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from uplan.models.todo import TodoModel
+from uplan.process import run_async
+
+from fake_provider import FakeProvider, as_response, install, todo_of_size
+from results import report
+
+MB = 1024 * 1024
+
+
+def measure(size_mb: float, chunk_size: int, output_file: Path) -> tuple[float, float, float]:
+    """
+    Returns:
+        tuple[float, float, float]: (response MB, peak MB, seconds)
+    """
+    text = as_response(todo_of_size(int(size_mb * MB)))
+    model = install(FakeProvider([text], chunk_size=chunk_size))
+
+    tracemalloc.start()
+    # The response itself is not part of the measured peak
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    asyncio.run(
+        run_async(
+            prompt_title="todo",
+            output_file=str(output_file),
+            validate_model=TodoModel,
+            prompt={"prompt": {"goal": "to-do list"}, "template": {"section": {}}},
+            model=model,
+            max_retries=1,
+        )
+    )
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(text) / MB, peak / MB, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory peak on large responses")
+    parser.add_argument(
+        "--sizes", type=float, nargs="+", default=[1, 5, 10, 25, 50], help="Response sizes in MB"
+    )
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Characters per chunk")
+    parser.add_argument("--save", action="store_true", help="Store the results")
+    args = parser.parse_args()
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                response_mb, peak_mb, elapsed = measure(size, args.chunk_size, Path(tmp) / "todo.toml")
+            print(
+                f"{response_mb:6.1f} MB response: peak {peak_mb:8.1f} MB"
+                f" ({peak_mb / response_mb:4.1f}x) in {elapsed:6.2f}s"
+            )
+            metrics[f"{size:g}MB.peak_mb"] = peak_mb
+            metrics[f"{size:g}MB.seconds"] = elapsed
+
+    report(
+        "memory",
+        metrics,
+        params={"sizes": args.sizes, "chunk_size": args.chunk_size},
+        store=args.save,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark get_all() end to end against the fake streaming provider.
+
+Runs the plan and to-do stages of the dev template without a model or a
+terminal: the answers are recorded in the journal up front and every document
+is accepted by the "auto" review policy. The telemetry spans of the runs are
+used to report, per stage:
+- the request time (streaming, extraction and validation)
+- the overhead per streamed chunk, i.e. request time minus the provider's
+  configured delays, divided by the number of chunks
+- the time spent extracting, validating and writing documents
+
+Usage (from the repository root, with uplan installed):
+    python benchmarks/bench_pipeline.py [--tasks 2000] [--chunk-size 16]
+        [--delay 0] [--runs 5] [--cassette FILE] [--save]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from uplan.init import TEMPLATES_DIR
+from uplan.process import get_all, prepare_answers_cli
+from uplan.utils import telemetry
+from uplan.utils.journal import RunJournal
+from uplan.utils.telemetry import load_spans
+
+from fake_provider import (
+    FakeProvider,
+    as_response,
+    install,
+    load_cassette,
+    synthetic_plan,
+    synthetic_todo,
+)
+from results import report
+
+
+def run_once(input_folder: Path, output_folder: Path, model: str) -> float:
+    journal = RunJournal(output_folder)
+    journal.reset()
+    journal.record_answers(prepare_answers_cli(input_folder, answers={}))
+
+    start = time.perf_counter()
+    plan_response, todo_response = get_all(
+        input_folder, output_folder, model, 1, resume=True, renderer="silent", review="auto"
+    )
+    elapsed = time.perf_counter() - start
+    for response in (plan_response, todo_response):
+        if response.get("status") != "success":
+            raise RuntimeError(f"Run failed: {response}")
+    return elapsed
+
+
+def stage_metrics(spans: list[dict], delay: float) -> dict[str, float]:
+    metrics = {}
+    for stage in ("plan", "todo"):
+        requests = [s for s in spans if s["span"] == "request" and s.get("stage") == stage]
+        chunks = sum(s.get("chunks", 0) for s in requests)
+        busy = sum(s["duration"] - s.get("chunks", 0) * delay for s in requests)
+        metrics[f"{stage}.request_ms"] = statistics.median(s["duration"] for s in requests) * 1e3
+        metrics[f"{stage}.chunk_overhead_us"] = busy / max(chunks, 1) * 1e6
+
+    for name in ("extract", "validate"):
+        durations = [s["duration"] for s in spans if s["span"] == name]
+        if durations:
+            metrics[f"{name}_ms"] = statistics.median(durations) * 1e3
+    for file in ("plan.toml", "todo.toml", "todo"):
+        durations = [s["duration"] for s in spans if s["span"] == "write" and s.get("file") == file]
+        if durations:
+            metrics[f"write.{file}_ms"] = statistics.median(durations) * 1e3
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_all() with a fake provider")
+    parser.add_argument("--tasks", type=int, default=2000, help="Tasks in the synthetic to-do list")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Characters per chunk")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before each chunk")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--cassette", type=Path, help="Replay recorded responses instead")
+    parser.add_argument("--save", action="store_true", help="Store the results")
+    args = parser.parse_args()
+
+    responses = (
+        load_cassette(args.cassette)
+        if args.cassette
+        else [as_response(synthetic_plan()), as_response(synthetic_todo(args.tasks))]
+    )
+    model = install(FakeProvider(responses, chunk_size=args.chunk_size, delay=args.delay))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        metrics_file = tmp / "metrics.jsonl"
+        telemetry.configure(metrics_file)
+
+        walls = []
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(args.runs):
+                walls.append(run_once(TEMPLATES_DIR / "dev", tmp / "output", model))
+        telemetry.configure(None)
+        spans = load_spans(metrics_file)
+
+    metrics = {"get_all_ms": statistics.median(walls) * 1e3, **stage_metrics(spans, args.delay)}
+    report(
+        "pipeline",
+        metrics,
+        params={
+            "tasks": None if args.cassette else args.tasks,
+            "cassette": args.cassette.name if args.cassette else None,
+            "chunk_size": args.chunk_size,
+            "delay": args.delay,
+        },
+        store=args.save,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark the per-chunk overhead of the streaming renderers.
+
+Simulates a 100k-token stream (one token per chunk) and reports, for each
+renderer:
+- the time spent per chunk in display_streaming()
+- the time of the final render when the stream closes
+- for the rich panel, the cost of one live refresh at the end of the stream,
+  which a real stream pays once per refresh interval
+
+Output is sent to os.devnull so only rendering work is measured.
+
+Usage (from the repository root, with uplan installed):
+    python benchmarks/bench_render.py [--tokens 100000]
+"""
+
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+from rich.console import Console
+
+from uplan.utils.display import display_streaming
+from uplan.utils.renderers import PlainRenderer, RichPanelRenderer, SilentRenderer
+
+WORDS = ["plan", " the", " api", " endpoints", ",", " tests", "\n", " deploy", " {", "}"]
+
+
+def make_stream(tokens: int):
+    for i in range(tokens):
+        yield SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=WORDS[i % len(WORDS)]))]
+        )
+
+
+class TimedRenderer:
+    """Wrap a renderer to time write() and close() separately."""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.close_time = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        start = time.perf_counter()
+        self.renderer.close()
+        self.close_time = time.perf_counter() - start
+
+    def write(self, text: str) -> None:
+        self.renderer.write(text)
+
+
+def bench(name: str, renderer, tokens: int, console: Console) -> None:
+    timed = TimedRenderer(renderer)
+
+    start = time.perf_counter()
+    display_streaming(make_stream(tokens), renderer=timed)
+    stream_time = time.perf_counter() - start - timed.close_time
+
+    line = (
+        f"{name:<8} {stream_time / tokens * 1e6:8.2f} us/chunk"
+        f"  close {timed.close_time * 1e3:8.1f} ms"
+    )
+    if isinstance(renderer, RichPanelRenderer):
+        start = time.perf_counter()
+        console.print(renderer)
+        line += f"  refresh {(time.perf_counter() - start) * 1e3:8.1f} ms"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming renderers")
+    parser.add_argument("--tokens", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        console = Console(file=devnull, force_terminal=True, width=120, height=40)
+        print(f"{args.tokens} chunks")
+        bench("rich", RichPanelRenderer(console=console), args.tokens, console)
+        bench("plain", PlainRenderer(file=devnull), args.tokens, console)
+        bench("silent", SilentRenderer(), args.tokens, console)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark the to-do output writers on large to-do lists.
+
+Times each format writer on its own, tomli_w and json.dump for comparison, and
+write_todo() writing every format in one pass, on synthetic to-do lists with
+10k+ tasks. write_todo() writes atomically and fsyncs every file, and after
+the first run it finds the content unchanged, so it measures the cost of a
+repeated identical regeneration. The best of --runs runs is reported.
+
+Usage (from the repository root, with uplan installed):
+    python benchmarks/bench_writers.py [--tasks 10000 50000] [--runs 5] [--save]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import tomli_w
+
+from uplan.utils.data import add_completed_status
+from uplan.utils.formats import FORMATS, write_todo
+
+from fake_provider import synthetic_todo
+from results import report
+
+
+def best_of(runs: int, func) -> float:
+    """Best wall time in milliseconds."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def bench(tasks: int, runs: int, folder: Path) -> dict[str, float]:
+    todo = synthetic_todo(tasks, sections=20, categories=50)
+
+    def write_tomli_w() -> None:
+        with open(folder / "todo.toml", "wb") as f:
+            tomli_w.dump(todo, f)
+
+    def write_json() -> None:
+        with open(folder / "todo.json", "w", encoding="utf-8") as f:
+            json.dump(add_completed_status(todo), f, indent=2, ensure_ascii=False)
+
+    metrics = {
+        "tomli_w_ms": best_of(runs, write_tomli_w),
+        "json_dump_ms": best_of(runs, write_json),
+    }
+    for format in FORMATS:
+        metrics[f"{format}_ms"] = best_of(runs, lambda: write_todo(todo, folder, (format,)))
+    metrics["all_formats_ms"] = best_of(runs, lambda: write_todo(todo, folder, tuple(FORMATS)))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the to-do output writers")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="Store the results")
+    args = parser.parse_args()
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for tasks in args.tasks:
+            for name, value in bench(tasks, args.runs, Path(tmp)).items():
+                metrics[f"{tasks}.{name}"] = value
+
+    report("writers", metrics, params={"tasks": args.tasks, "runs": args.runs}, store=args.save)
+
+
+if __name__ == "__main__":
+    main()
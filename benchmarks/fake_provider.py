@@ -0,0 +1,192 @@
+"""
+Fake litellm provider streaming synthetic or recorded responses.
+
+The provider is registered through litellm's custom provider map, so requests
+to "fake/<anything>" go through litellm's real streaming wrapper and only the
+network is replaced. Responses are served in order and repeat when the list is
+exhausted, e.g. [plan, todo] for every get_all() run.
+
+Cassettes are recorded from the journal of a real run:
+    python benchmarks/fake_provider.py record output/dev/journal.json benchmarks/cassettes/dev.json
+
+and replayed with the --cassette option of the benchmarks.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import litellm
+from litellm import CustomLLM
+
+PROVIDER = "fake"
+MODEL = f"{PROVIDER}/bench"
+
+
+class FakeProvider(CustomLLM):
+    """
+    Stream a list of responses in chunks of chunk_size characters.
+
+    Args:
+        responses: Response texts, served in order and repeated
+        chunk_size: Characters per streamed chunk
+        delay: Seconds to wait before every chunk
+        first_token_delay: Extra seconds to wait before the first chunk
+    """
+
+    def __init__(
+        self,
+        responses: list[str],
+        chunk_size: int = 16,
+        delay: float = 0.0,
+        first_token_delay: float = 0.0,
+    ):
+        super().__init__()
+        self.responses = responses
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.first_token_delay = first_token_delay
+        self.requests = 0
+
+    def next_response(self) -> str:
+        text = self.responses[self.requests % len(self.responses)]
+        self.requests += 1
+        return text
+
+    def chunks(self, text: str, messages: list):
+        last = max(len(text) - 1, 0) // self.chunk_size * self.chunk_size
+        for start in range(0, max(len(text), 1), self.chunk_size):
+            finished = start == last
+            yield {
+                "text": text[start : start + self.chunk_size],
+                "tool_use": None,
+                "is_finished": finished,
+                "finish_reason": "stop" if finished else "",
+                "usage": (
+                    {
+                        # Rough estimate, the fake provider has no tokenizer
+                        "prompt_tokens": len(json.dumps(messages)) // 4,
+                        "completion_tokens": len(text) // 4,
+                        "total_tokens": (len(json.dumps(messages)) + len(text)) // 4,
+                    }
+                    if finished
+                    else None
+                ),
+                "index": 0,
+            }
+
+    def streaming(self, *args, messages: list = None, **kwargs):
+        text = self.next_response()
+        time.sleep(self.first_token_delay)
+        for chunk in self.chunks(text, messages or []):
+            if self.delay:
+                time.sleep(self.delay)
+            yield chunk
+
+    async def astreaming(self, *args, messages: list = None, **kwargs):
+        text = self.next_response()
+        await asyncio.sleep(self.first_token_delay)
+        for chunk in self.chunks(text, messages or []):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield chunk
+
+
+def install(provider: FakeProvider) -> str:
+    """Register the provider with litellm and return the model name to request."""
+    litellm.custom_provider_map = [{"provider": PROVIDER, "custom_handler": provider}]
+    return MODEL
+
+
+def as_response(data: dict) -> str:
+    """Wrap a document the way models answer: some prose and a JSON code block."""
+    return (
+        "Here is the requested document.\n\n"
+        f"```json\n{json.dumps(data, ensure_ascii=False, indent=2)}\n```\n"
+    )
+
+
+def synthetic_plan(sections: int = 8, items: int = 6) -> dict:
+    return {
+        f"section_{s}": {
+            "summary": f"Summary of section {s} of the project plan.",
+            "steps": [f"Step {i} of section {s}, described in one sentence." for i in range(items)],
+        }
+        for s in range(sections)
+    }
+
+
+def synthetic_todo(tasks: int, sections: int = 10, categories: int = 10) -> dict:
+    """A valid TodoModel document holding the given number of tasks."""
+    per_category = max(1, -(-tasks // (sections * categories)))
+    todo = {}
+    remaining = tasks
+    for s in range(sections):
+        section = {"frameworks": ["fastapi", "react"], "categories": []}
+        for c in range(categories):
+            count = min(per_category, remaining)
+            if count <= 0:
+                break
+            section["categories"].append(
+                {
+                    "title": f"category {s}.{c}",
+                    "tasks": [f"Implement task {s}.{c}.{i} with tests" for i in range(count)],
+                }
+            )
+            remaining -= count
+        if section["categories"]:
+            todo[f"section_{s}"] = section
+    return todo
+
+
+def todo_of_size(size: int) -> dict:
+    """A to-do document whose response text is about size bytes long."""
+    tasks = max(1, size // 40)
+    # Task names grow with their numbers, so the first estimate is rescaled once
+    for _ in range(2):
+        todo = synthetic_todo(tasks)
+        tasks = max(1, int(tasks * size / len(as_response(todo))))
+    return synthetic_todo(tasks)
+
+
+def load_cassette(path: Path) -> list[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [entry["text"] for entry in json.load(f)["responses"]]
+
+
+def record_cassette(journal_file: Path, path: Path) -> int:
+    """
+    Save the raw responses of a journaled run as a cassette.
+
+    Returns:
+        int: Number of recorded responses
+    """
+    with open(journal_file, "r", encoding="utf-8") as f:
+        stages = json.load(f).get("stages", {})
+    responses = [
+        {"stage": stage, "text": entry["text"]}
+        for stage, entry in stages.items()
+        if entry.get("text")
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"responses": responses}, f, ensure_ascii=False, indent=2)
+    return len(responses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage fake provider cassettes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Record a cassette from a run journal")
+    record.add_argument("journal", type=Path)
+    record.add_argument("cassette", type=Path)
+    args = parser.parse_args()
+
+    count = record_cassette(args.journal, args.cassette)
+    print(f"Recorded {count} responses to {args.cassette}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Store benchmark results and compare them with the previous run.
+
+Every saved run is one JSON line in benchmarks/results/<benchmark>.jsonl with
+the uplan version, git commit, Python version and host. A new run is compared
+with the last saved run on the same host, so results from other machines do
+not show up as regressions. All metrics are "lower is better" (seconds,
+microseconds, megabytes).
+"""
+
+import json
+import platform
+import subprocess
+import time
+from importlib import metadata
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# Relative change above which a metric is reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+def environment() -> dict:
+    try:
+        version = metadata.version("uplan")
+    except metadata.PackageNotFoundError:
+        version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "version": version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "machine": platform.platform(),
+    }
+
+
+def previous(name: str, host: str, results_dir: Path = RESULTS_DIR) -> dict | None:
+    """Return the last saved run of a benchmark on a host."""
+    last = None
+    try:
+        with open(results_dir / f"{name}.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get("host") == host:
+                    last = record
+    except FileNotFoundError:
+        pass
+    return last
+
+
+def save(name: str, record: dict, results_dir: Path = RESULTS_DIR) -> Path:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"{name}.jsonl"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    return path
+
+
+def report(
+    name: str,
+    metrics: dict[str, float],
+    params: dict = None,
+    store: bool = False,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> int:
+    """
+    Print metrics next to the previous run and optionally save them.
+
+    Runs with different parameters are not compared.
+
+    Returns:
+        int: Number of metrics that regressed by more than threshold
+    """
+    record = {**environment(), "time": time.time(), "params": params or {}, "metrics": metrics}
+    last = previous(name, record["host"])
+    if last is not None and last.get("params") != record["params"]:
+        last = None
+
+    label = f"{last.get('version')} ({last.get('commit')})" if last else "-"
+    print(f"\n{name}: {'metric':<36} {'value':>12} {'previous':>12}  change   vs {label}")
+    regressions = 0
+    for metric, value in metrics.items():
+        before = last["metrics"].get(metric) if last else None
+        line = f"{'':<{len(name)}}  {metric:<36} {value:12.3f}"
+        if before:
+            change = (value - before) / before
+            flag = ""
+            if change > threshold:
+                regressions += 1
+                flag = "  REGRESSION"
+            line += f" {before:12.3f} {change:+7.1%}{flag}"
+        print(line)
+
+    if store:
+        print(f"Saved to {save(name, record)}")
+    return regressions
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+
+def make_chunk(content: str = None, usage: SimpleNamespace = None) -> SimpleNamespace:
+    """A streamed chunk shaped like litellm's, with a content delta or usage only."""
+    if usage is not None:
+        return SimpleNamespace(choices=[], usage=usage)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class FakeLLM:
+    """
+    Scripted stand-in for litellm.completion and litellm.acompletion.
+
+    Calling it installs a responder for both functions and returns the list
+    of (model, messages) of every request made from then on.
+    """
+
+    chunk = staticmethod(make_chunk)
+
+    def __init__(self, monkeypatch):
+        self.monkeypatch = monkeypatch
+
+    def __call__(self, respond, delay: float = 0.0, chunk_size: int = None, usage=None):
+        """
+        Answer every request with respond(model, messages).
+
+        Args:
+            respond: Returns the data of a ```json block, the raw response
+                text as a str, or raises to fail the request. A dict or str
+                is used as the answer to every request.
+            delay: Seconds before the first chunk
+            chunk_size: Characters per chunk; the whole text at once if None
+            usage: Optional usage object sent in a last chunk without choices
+        """
+        requests = []
+
+        def answer(model, messages):
+            requests.append((model, messages))
+            data = respond(model, messages) if callable(respond) else respond
+            text = data if isinstance(data, str) else f"```json\n{json.dumps(data)}\n```"
+            size = chunk_size or max(1, len(text))
+            chunks = [make_chunk(text[i : i + size]) for i in range(0, len(text), size)]
+            if usage is not None:
+                chunks.append(make_chunk(usage=usage))
+            return chunks
+
+        def completion(model, messages, stream, **kwargs):
+            chunks = answer(model, messages)
+            if delay:
+                time.sleep(delay)
+            return iter(chunks)
+
+        async def acompletion(model, messages, stream, **kwargs):
+            chunks = answer(model, messages)
+
+            async def generate():
+                if delay:
+                    await asyncio.sleep(delay)
+                for chunk in chunks:
+                    yield chunk
+
+            return generate()
+
+        self.monkeypatch.setattr(litellm, "completion", completion)
+        self.monkeypatch.setattr(litellm, "acompletion", acompletion)
+        return requests
+
+    @staticmethod
+    def plan_or_todo(plan: dict, todo: dict):
+        """Responder answering to-do prompts (with a <plan>) with todo, others with plan."""
+        return lambda model, messages: todo if "<plan>" in messages[-1]["content"] else plan
+
+    @staticmethod
+    def section_todo(model: str, messages: list[dict]) -> dict:
+        """Responder answering with a to-do entry for the first section of <template>."""
+        section = re.search(r"<template>\W*(\w+)", messages[0]["content"]).group(1)
+        return {
+            section: {"frameworks": ["x"], "categories": [{"title": section, "tasks": ["t"]}]}
+        }
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Replace the streaming litellm calls with a scripted model (see FakeLLM)."""
+    return FakeLLM(monkeypatch)
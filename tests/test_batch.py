@@ -0,0 +1,87 @@
+import time
+from pathlib import Path
+
+import tomli_w
+
+from uplan.process import batch
+
+TEMPLATE_FOLDER = Path(__file__).resolve().parent.parent / "uplan" / "templates" / "dev"
+
+PLAN = {"project_basics": {"overview": "todo app"}}
+TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api", "tasks": ["create endpoints"]}],
+    }
+}
+DELAY = 0.2
+
+
+def write_answers(answers_dir: Path, name: str) -> None:
+    answers = {
+        "project_basics": {"overview": f"{name} project", "core_functionality": "lists"},
+        "tech_stack": {
+            "package_manager": "uv",
+            "frontend": "None",
+            "backend": "FastAPI",
+            "database": "SQLite",
+            "test_framework": "pytest",
+        },
+    }
+    (answers_dir / f"{name}.toml").write_text(tomli_w.dumps(answers), encoding="utf-8")
+
+
+def test_batch_writes_each_project(tmp_path, fake_llm):
+    fake_llm(fake_llm.plan_or_todo(PLAN, TODO), delay=DELAY, chunk_size=16)
+
+    answers_dir = tmp_path / "answers"
+    answers_dir.mkdir()
+    for name in ["alpha", "beta", "gamma", "delta"]:
+        write_answers(answers_dir, name)
+    (answers_dir / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    start = time.perf_counter()
+    results = batch(TEMPLATE_FOLDER, answers_dir, tmp_path / "out", "fake/model", 1, 4)
+    elapsed = time.perf_counter() - start
+
+    assert sorted(results) == ["alpha", "beta", "delta", "gamma"]
+    for name, (plan_response, todo_response) in results.items():
+        assert plan_response["status"] == "success"
+        assert todo_response["status"] == "success"
+        for file_name in ["plan.toml", "todo.toml", "todo.md", "todo.json"]:
+            assert (tmp_path / "out" / name / file_name).exists()
+
+    # Two sequential requests per project, projects processed concurrently
+    assert elapsed < DELAY * 2 * 4
+
+
+def test_invalid_projects_do_not_stop_the_batch(tmp_path, fake_llm):
+    def respond(model, messages):
+        if "broken project" in messages[-1]["content"]:
+            raise RuntimeError("provider down")
+        return fake_llm.plan_or_todo(PLAN, TODO)(model, messages)
+
+    requests = fake_llm(respond)
+
+    answers_dir = tmp_path / "answers"
+    answers_dir.mkdir()
+    for name in ["alpha", "beta", "broken"]:
+        write_answers(answers_dir, name)
+    (answers_dir / "malformed.toml").write_text("[project_basics\noverview = ", encoding="utf-8")
+    (answers_dir / "incomplete.json").write_text(
+        '{"project_basics": {"overview": "app"}}', encoding="utf-8"
+    )
+
+    results = batch(TEMPLATE_FOLDER, answers_dir, tmp_path / "out", "fake/model", 1, 2)
+
+    statuses = {name: (plan["status"], todo["status"]) for name, (plan, todo) in results.items()}
+    assert statuses == {
+        "alpha": ("success", "success"),
+        "beta": ("success", "success"),
+        "broken": ("error", "skipped"),
+        "incomplete": ("error", "skipped"),
+        "malformed": ("error", "skipped"),
+    }
+    assert "missing required answers" in results["incomplete"][0]["message"]
+    # Invalid answer files are rejected before any request
+    assert len(requests) == 5
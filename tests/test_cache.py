@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+import time
+
+import litellm
+
+from uplan.process import build_request, run_async
+from uplan.utils.cache import ResponseCache
+
+
+def test_key_depends_on_relevant_kwargs_only():
+    cache = ResponseCache()
+    key = cache.make_key("model", "prompt", temperature=0.2)
+    assert key == cache.make_key("model", "prompt", temperature=0.2, timeout=30)
+    assert key != cache.make_key("model", "prompt", temperature=0.5)
+    assert key != cache.make_key("other", "prompt", temperature=0.2)
+
+
+def test_get_set_and_counters(tmp_path):
+    cache = ResponseCache(tmp_path)
+    key = cache.make_key("model", "prompt")
+
+    assert cache.get(key) is None
+    cache.set(key, "```json\n{}\n```", {})
+    assert cache.get(key)["text"] == "```json\n{}\n```"
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_size=10_000)
+    keys = [cache.make_key("model", str(i)) for i in range(3)]
+    now = time.time()
+    for i, key in enumerate(keys):
+        cache.set(key, "x" * 4000, {})
+        os.utime(cache.cache_dir / f"{key}.json", (now - 100 + i, now - 100 + i))
+
+    cache.evict()
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(tmp_path, max_age=60)
+    key = cache.make_key("model", "prompt")
+    entry_path = cache.cache_dir / f"{key}.json"
+    entry_path.write_text(
+        json.dumps({"text": "text", "data": {}, "created": time.time() - 120}),
+        encoding="utf-8",
+    )
+
+    assert cache.get(key) is None
+    assert not entry_path.exists()
+
+
+def test_cache_hit_skips_network(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_acompletion(**kwargs):
+        calls.append(kwargs)
+        raise AssertionError("network should not be used on a cache hit")
+
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+
+    prompt = {"prompt": {"goal": "plan"}}
+    cache = ResponseCache(tmp_path / "cache")
+    key = cache.make_key("fake/model", build_request(prompt, "fake/model"))
+    cache.set(key, '```json\n{"overview": "cached"}\n```', {"overview": "cached"})
+
+    response = asyncio.run(
+        run_async(
+            prompt_title="plan",
+            output_file=str(tmp_path / "plan.toml"),
+            prompt=prompt,
+            model="fake/model",
+            max_retries=1,
+            cache=cache,
+        )
+    )
+
+    assert response["data"] == {"overview": "cached"}
+    assert calls == []
+    assert cache.hits == 1
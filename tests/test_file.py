@@ -0,0 +1,37 @@
+import pytest
+
+from uplan.utils.file import AtomicFile, commit_files, write_file_atomic
+
+
+def test_write_file_atomic_skips_unchanged_content(tmp_path):
+    path = tmp_path / "sub" / "plan.toml"
+
+    assert write_file_atomic(path, b"a = 1\n")
+    inode = path.stat().st_ino
+    assert not write_file_atomic(path, b"a = 1\n")
+    assert path.stat().st_ino == inode
+    assert write_file_atomic(path, b"a = 2\n")
+    assert path.read_bytes() == b"a = 2\n"
+    assert [p.name for p in path.parent.iterdir()] == ["plan.toml"]
+
+
+def test_atomic_file_keeps_old_content_on_error(tmp_path):
+    path = tmp_path / "todo.md"
+    path.write_text("old", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with AtomicFile(path, "w", encoding="utf-8") as f:
+            f.write("partial")
+            raise RuntimeError("crash")
+
+    assert path.read_text(encoding="utf-8") == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["todo.md"]
+
+
+def test_commit_files_reports_changed_paths(tmp_path):
+    (tmp_path / "same.txt").write_text("same", encoding="utf-8")
+    files = [AtomicFile(tmp_path / name, "w", encoding="utf-8") for name in ("same.txt", "new.txt")]
+    for file in files:
+        file.file.write("same")
+
+    assert commit_files(files) == [tmp_path / "new.txt"]
@@ -0,0 +1,85 @@
+import copy
+import csv
+import json
+
+import pytest
+
+from uplan.utils.data import add_completed_status, toml_to_markdown
+from uplan.utils.formats import FORMATS, parse_formats, write_todo
+
+TODO = {
+    "environment_setup": {
+        "frameworks": ["docker"],
+        "tasks": ["Create a virtualenv", 'Install "uv"'],
+    },
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [
+            {"title": "API", "tasks": ["Add <health> endpoint", "Write tests\nfor it"]},
+            {"title": "Empty", "tasks": []},
+        ],
+    },
+}
+
+
+def test_write_todo_writes_every_format_without_changing_data(tmp_path):
+    data = copy.deepcopy(TODO)
+    paths = write_todo(data, tmp_path, tuple(FORMATS))
+
+    assert [path.name for path in paths] == [f"todo.{format}" for format in FORMATS]
+    assert write_todo(data, tmp_path, tuple(FORMATS)) == []
+    assert data == TODO
+    assert (tmp_path / "todo.json").read_text(encoding="utf-8") == json.dumps(
+        add_completed_status(TODO), indent=2, ensure_ascii=False
+    )
+    assert (tmp_path / "todo.md").read_text(encoding="utf-8") == toml_to_markdown(TODO)
+
+    with open(tmp_path / "todo.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["section", "category", "task", "completed"]
+    assert ["backend", "API", "Write tests\nfor it", "false"] in rows
+    assert len(rows) == 5
+
+    page = (tmp_path / "todo.html").read_text(encoding="utf-8")
+    assert "<h4>API</h4>" in page
+    assert "Add &lt;health&gt; endpoint" in page
+
+
+def test_outputs_keep_the_order_of_the_data(tmp_path):
+    data = {"backend": dict(reversed(TODO["backend"].items())), "summary": "Done last"}
+    write_todo(data, tmp_path, ("md", "json"))
+
+    assert (tmp_path / "todo.json").read_text(encoding="utf-8") == json.dumps(
+        add_completed_status(data), indent=2, ensure_ascii=False
+    )
+    markdown = (tmp_path / "todo.md").read_text(encoding="utf-8")
+    assert markdown.index("#### API") < markdown.index("### Frameworks")
+    assert markdown.endswith("## Summary\n\nDone last\n\n")
+
+
+def test_markdown_checkboxes_only_for_categorized_tasks():
+    markdown = toml_to_markdown(TODO)
+
+    assert markdown.startswith("## Environment Setup\n\n### Frameworks\n\n- docker\n")
+    assert "- Create a virtualenv\n" in markdown
+    assert "\n#### API\n- [ ] Add <health> endpoint\n" in markdown
+
+
+def test_add_completed_status_returns_a_copy():
+    data = copy.deepcopy(TODO)
+    result = add_completed_status(data)
+
+    assert data == TODO
+    assert result["backend"]["categories"][0]["tasks"][0] == {
+        "task": "Add <health> endpoint",
+        "completed": False,
+    }
+
+
+def test_parse_formats():
+    assert parse_formats("md, CSV,md") == ("md", "csv")
+    with pytest.raises(ValueError, match="pdf"):
+        parse_formats("md,pdf")
+    # todo.toml is always written by the to-do stage
+    with pytest.raises(ValueError, match="toml"):
+        parse_formats("toml")
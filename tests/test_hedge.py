@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from uplan.models.todo import TodoModel
+from uplan.process import run_async
+from uplan.utils.hedge import hedge, parse_models
+
+TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api", "tasks": ["create endpoints"]}],
+    }
+}
+
+
+def test_parse_models():
+    assert parse_models("openai/gpt-4o, ollama/qwq,") == ["openai/gpt-4o", "ollama/qwq"]
+    assert parse_models("ollama/qwq") == ["ollama/qwq"]
+
+
+def test_stalled_model_is_hedged_and_cancelled():
+    cancelled = []
+
+    async def attempt(model, first_token):
+        try:
+            if model == "slow":
+                await asyncio.sleep(10)
+            first_token.set()
+            return model
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+
+    start = time.perf_counter()
+    winner, result = asyncio.run(hedge(["slow", "fast"], attempt, hedge_after=0.05))
+
+    assert (winner, result) == ("fast", "fast")
+    assert cancelled == ["slow"]
+    assert time.perf_counter() - start < 1
+
+
+def test_started_stream_is_not_hedged():
+    started = []
+
+    async def attempt(model, first_token):
+        started.append(model)
+        first_token.set()
+        await asyncio.sleep(0.1)
+        return model
+
+    assert asyncio.run(hedge(["a", "b"], attempt, hedge_after=0.01)) == ("a", "a")
+    assert started == ["a"]
+
+
+def test_failures_fall_back_then_raise():
+    async def attempt(model, first_token):
+        if model != "c":
+            raise RuntimeError(model)
+        return model
+
+    start = time.perf_counter()
+    assert asyncio.run(hedge(["a", "b", "c"], attempt, hedge_after=10)) == ("c", "c")
+    assert time.perf_counter() - start < 1
+
+    with pytest.raises(RuntimeError, match="b"):
+        asyncio.run(hedge(["a", "b"], attempt, hedge_after=10))
+
+
+def test_run_async_falls_back_on_invalid_response(fake_llm):
+    requests = fake_llm(
+        lambda model, messages: (
+            TODO if model == "fake/backup" else {"backend": {"frameworks": "fastapi"}}
+        )
+    )
+
+    response = asyncio.run(
+        run_async(
+            prompt_title="todo",
+            output_file=None,
+            validate_model=TodoModel,
+            prompt={"prompt": {"goal": "todo"}, "template": {"backend": {}}},
+            model="fake/primary,fake/backup",
+            max_retries=1,
+        )
+    )
+
+    assert response["data"] == TODO
+    assert [model for model, _ in requests] == ["fake/primary", "fake/backup"]
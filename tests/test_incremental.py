@@ -0,0 +1,105 @@
+import re
+from pathlib import Path
+
+import tomllib
+
+from uplan.process import get_all, incremental_update, reuse_sections
+from uplan.utils.journal import RunJournal
+
+TEMPLATE_FOLDER = Path(__file__).resolve().parent.parent / "uplan" / "templates" / "dev"
+
+ANSWERS = {"project_basics": {"overview": "todo app"}, "tech_stack": {"database": "MySQL"}}
+PLAN = {
+    "project_basics": {"overview": "todo app"},
+    "tech_stack": {"database": "mysql"},
+    "design": {
+        "ui": "react frontend, fastapi backend, pytest testing, docker deployment",
+        "tooling": "uv environment",
+    },
+}
+TODO = {
+    section: {"frameworks": [section], "categories": [{"title": section, "tasks": ["start"]}]}
+    for section in ["environment_setup", "frontend", "backend", "database", "testing", "deployment"]
+}
+
+
+def fake_model(requests, plan, todo):
+    """Answer with the requested sections of plan or todo, recording (stage, sections)."""
+
+    def respond(model, messages):
+        content = messages[-1]["content"]
+        data = todo if "<plan>" in content else plan
+        keys = re.search(r"Only output these top-level keys: ([\w, ]+)\.", content)
+        if keys:
+            data = {key: data[key] for key in keys.group(1).split(", ")}
+        requests.append(("todo" if "<plan>" in content else "plan", list(data)))
+        return data
+
+    return respond
+
+
+def test_update_regenerates_only_affected_sections(tmp_path, fake_llm):
+    requests = []
+    fake_llm(fake_model(requests, PLAN, TODO))
+    get_all(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, answers=ANSWERS, review="auto")
+    todo_text = (tmp_path / "todo.toml").read_text(encoding="utf-8")
+
+    # Switching the database touches the tech stack, the design derived from
+    # all answers and the database tasks
+    plan = {**PLAN, "tech_stack": {"database": "postgresql"}}
+    todo = {**TODO, "database": {**TODO["database"], "frameworks": ["postgresql"]}}
+    requests.clear()
+    fake_llm(fake_model(requests, plan, todo))
+    answers = {**ANSWERS, "tech_stack": {"database": "PostgreSQL"}}
+    plan_response, todo_response = get_all(
+        TEMPLATE_FOLDER,
+        tmp_path,
+        "fake/model",
+        1,
+        answers=answers,
+        incremental=True,
+        review="auto",
+    )
+
+    assert requests == [("plan", ["tech_stack", "design"]), ("todo", ["database"])]
+    assert plan_response["data"] == plan and todo_response["data"] == todo
+    with open(tmp_path / "todo.toml", "rb") as f:
+        assert tomllib.load(f) == todo
+    unchanged = todo_text.split("[database]")[0]
+    assert (tmp_path / "todo.toml").read_text(encoding="utf-8").startswith(unchanged)
+
+    # Nothing changed: no requests and no files written
+    requests.clear()
+    plan_response, todo_response = get_all(
+        TEMPLATE_FOLDER, tmp_path, "fake/model", 1, incremental=True, review="auto"
+    )
+    assert requests == []
+    assert plan_response["changed"] == todo_response["changed"] == []
+
+
+def test_sections_without_input_depend_on_all_of_it():
+    previous = {"project_basics": {"overview": "todo app"}, "tech_stack": {"database": "MySQL"}}
+    current = {**previous, "project_basics": {"overview": "chat app"}}
+
+    assert reuse_sections(PLAN, previous, previous) == (PLAN, {})
+    assert reuse_sections(PLAN, previous, current) == (
+        None,
+        {"document": PLAN, "regenerate_keys": ["project_basics", "design"]},
+    )
+
+
+def test_changed_template_is_generated_in_full(tmp_path):
+    journal = RunJournal(tmp_path)
+    prompt = {"prompt": {"goal": "plan"}, "user_input": ANSWERS}
+    journal.record_accepted("plan", PLAN, prompt)
+    plan_file = tmp_path / "plan.toml"
+
+    document, regenerate = incremental_update(journal, "plan", plan_file, prompt, "user_input")
+    assert document == PLAN and regenerate == {}
+
+    edited = {**prompt, "user_input": {**ANSWERS, "tech_stack": {"database": "sqlite"}}}
+    document, regenerate = incremental_update(journal, "plan", plan_file, edited, "user_input")
+    assert document is None and regenerate["regenerate_keys"] == ["tech_stack", "design"]
+
+    edited["prompt"] = {"goal": "a different plan"}
+    assert incremental_update(journal, "plan", plan_file, edited, "user_input") == (None, {})
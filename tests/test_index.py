@@ -0,0 +1,123 @@
+import re
+
+import uplan.process
+from uplan.process import get_plan
+from uplan.utils import index
+from uplan.utils.index import DocumentIndex, input_features, minhash, similarity
+
+PROMPT = {
+    "prompt": {"goal": "Create a plan for development."},
+    "template": {"basics": {"overview": "<select>"}, "stack": {"database": "<select>"}},
+    "user_input": {
+        "basics": {"overview": "recipe sharing web app for home cooks"},
+        "stack": {"database": "MySQL", "backend": "FastAPI"},
+    },
+}
+PLAN = {"basics": {"overview": "recipe app"}, "stack": {"database": "mysql"}}
+
+
+def with_input(section: str, values: dict) -> dict:
+    return {**PROMPT, "user_input": {**PROMPT["user_input"], section: values}}
+
+
+def test_minhash_estimates_answer_similarity():
+    signature = minhash(input_features(PROMPT["user_input"]))
+    changed = with_input("stack", {"database": "PostgreSQL", "backend": "FastAPI"})
+    near = minhash(input_features(changed["user_input"]))
+    far = minhash(input_features({"basics": {"overview": "mobile game"}}))
+
+    assert similarity(signature, signature) == 1.0
+    assert 0.5 < similarity(signature, near) < 1.0
+    assert similarity(signature, far) < 0.2
+
+
+def test_index_finds_exact_and_similar_inputs_of_the_same_template(tmp_path):
+    DocumentIndex(tmp_path, threshold=0.5).add("plan", PROMPT, "user_input", PLAN)
+    # Another run reads the entries written by the first one
+    documents = DocumentIndex(tmp_path, threshold=0.5)
+
+    score, entry = documents.find("plan", PROMPT, "user_input")
+    assert score == 1.0 and entry["document"] == PLAN
+
+    changed = with_input("stack", {"database": "PostgreSQL", "backend": "FastAPI"})
+    score, entry = documents.find("plan", changed, "user_input")
+    assert 0.5 <= score < 1.0 and entry["document"] == PLAN
+
+    assert documents.find("todo", PROMPT, "user_input") is None
+    assert documents.find("plan", {**PROMPT, "prompt": {"goal": "other"}}, "user_input") is None
+    assert DocumentIndex(tmp_path, threshold=0.99).find("plan", changed, "user_input") is None
+
+
+def test_get_plan_starts_from_indexed_plans(tmp_path, monkeypatch, fake_llm):
+    def respond(model, messages):
+        content = messages[-1]["content"]
+        if "<draft>" not in content:
+            return PLAN
+        keys = re.search(r"Only output these top-level keys: ([\w, ]+)\.", content).group(1)
+        return {key: {"database": "postgresql"} for key in keys.split(", ")}
+
+    requests = fake_llm(respond)
+    monkeypatch.setattr(uplan.process, "review_document", lambda output_file, **kwargs: "y")
+    monkeypatch.setattr(index, "_index", DocumentIndex(tmp_path / "index", threshold=0.5))
+
+    assert get_plan(tmp_path, tmp_path, "fake/model", 1, PROMPT)["data"] == PLAN
+    assert len(requests) == 1
+
+    # Identical answers: returned without a request
+    assert get_plan(tmp_path, tmp_path, "fake/model", 1, PROMPT)["data"] == PLAN
+    assert len(requests) == 1
+
+    # Similar answers: only the changed section is requested, with a draft
+    changed = with_input("stack", {"database": "PostgreSQL", "backend": "FastAPI"})
+    response = get_plan(tmp_path, tmp_path, "fake/model", 1, changed)
+    assert len(requests) == 2 and "<draft>" in requests[1][1][-1]["content"]
+    assert response["data"] == {"basics": PLAN["basics"], "stack": {"database": "postgresql"}}
+
+
+def test_reused_plan_is_reviewed_unless_accepted_without_review(tmp_path, monkeypatch, fake_llm):
+    requests = fake_llm(PLAN)
+    reviews = []
+
+    def review_document(output_file, **kwargs):
+        reviews.append(output_file)
+        return "y" if len(reviews) != 2 else "r"
+
+    monkeypatch.setattr(uplan.process, "review_document", review_document)
+    monkeypatch.setattr(index, "_index", DocumentIndex(tmp_path / "index", threshold=0.5))
+    get_plan(tmp_path, tmp_path, "fake/model", 1, PROMPT)
+
+    # The reused plan is rejected, so it is requested again
+    assert get_plan(tmp_path, tmp_path, "fake/model", 1, PROMPT)["data"] == PLAN
+    assert len(reviews) == 3 and len(requests) == 2
+
+    response = get_plan(tmp_path, tmp_path, "fake/model", 1, PROMPT, accept_reused=True)
+    assert response["status"] == "success"
+    assert len(reviews) == 3 and len(requests) == 2
+
+
+def test_similar_project_regenerates_sections_derived_from_all_answers(
+    tmp_path, monkeypatch, fake_llm
+):
+    plan = {**PLAN, "design": {"api": "rest api for mysql"}}
+
+    def respond(model, messages):
+        content = messages[-1]["content"]
+        keys = re.search(r"Only output these top-level keys: ([\w, ]+)\.", content)
+        if not keys:
+            return plan
+        return {key: {"changed": True} for key in keys.group(1).split(", ")}
+
+    requests = fake_llm(respond)
+    monkeypatch.setattr(index, "_index", DocumentIndex(tmp_path / "index", threshold=0.5))
+    get_plan(tmp_path, tmp_path, "fake/model", 1, PROMPT, review="auto")
+
+    changed = with_input("stack", {"database": "PostgreSQL", "backend": "FastAPI"})
+    response = get_plan(tmp_path, tmp_path, "fake/model", 1, changed, review="auto")
+
+    assert len(requests) == 2
+    assert "Only output these top-level keys: stack, design." in requests[1][1][-1]["content"]
+    assert response["data"] == {
+        "basics": PLAN["basics"],
+        "stack": {"changed": True},
+        "design": {"changed": True},
+    }
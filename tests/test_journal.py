@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import tomllib
+
+import uplan.process
+from uplan.process import get_all, prepare_answers_cli
+from uplan.utils.journal import RunJournal
+
+TEMPLATE_FOLDER = Path(__file__).resolve().parent.parent / "uplan" / "templates" / "dev"
+
+PLAN = {"project_basics": {"overview": "todo app"}}
+TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api", "tasks": ["create endpoints"]}],
+    }
+}
+
+
+def test_resume_does_not_repeat_model_calls(tmp_path, monkeypatch, fake_llm):
+    calls = []
+
+    def respond(model, messages):
+        data = TODO if "<plan>" in messages[-1]["content"] else PLAN
+        calls.append("todo" if data is TODO else "plan")
+        return data
+
+    fake_llm(respond)
+    RunJournal(tmp_path).record_answers(
+        prepare_answers_cli(TEMPLATE_FOLDER, answers={"project_basics": {"overview": "todo app"}})
+    )
+
+    # Exit at the plan review: the response is journaled but not accepted
+    monkeypatch.setattr(uplan.process, "review_document", lambda output_file, **kwargs: "x")
+    plan_response, _ = get_all(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, resume=True)
+    assert plan_response["status"] == "exit"
+    assert calls == ["plan"]
+
+    # The plan is reviewed again from the journal, only the todo is requested
+    monkeypatch.setattr(uplan.process, "review_document", lambda output_file, **kwargs: "y")
+    plan_response, todo_response = get_all(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, resume=True)
+    assert plan_response["data"] == PLAN and todo_response["status"] == "success"
+    assert calls == ["plan", "todo"]
+
+    # Everything is accepted: nothing is requested or reviewed
+    monkeypatch.setattr(uplan.process, "review_document", None)
+    (tmp_path / "todo.md").unlink()
+    _, todo_response = get_all(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, resume=True)
+    assert calls == ["plan", "todo"]
+    assert RunJournal(tmp_path).entries["stages"]["todo"]["data"] == TODO
+    assert (tmp_path / "todo.md").exists()
+
+
+def test_resume_regenerates_stages_accepted_for_other_inputs(tmp_path, monkeypatch, fake_llm):
+    calls = []
+    plans = {"todo app": PLAN, "chat app": {"project_basics": {"overview": "chat app"}}}
+
+    def respond(model, messages):
+        content = messages[-1]["content"]
+        if "<plan>" in content:
+            calls.append("todo")
+            return TODO
+        calls.append("plan")
+        return plans["chat app" if "chat app" in content else "todo app"]
+
+    fake_llm(respond)
+    monkeypatch.setattr(uplan.process, "review_document", lambda output_file, **kwargs: "y")
+    answers = {"project_basics": {"overview": "todo app"}}
+    get_all(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, answers=answers)
+    assert calls == ["plan", "todo"]
+
+    # New answers: both stages are generated again
+    answers = {"project_basics": {"overview": "chat app"}}
+    plan_response, _ = get_all(
+        TEMPLATE_FOLDER, tmp_path, "fake/model", 1, resume=True, answers=answers
+    )
+    assert calls == ["plan", "todo"] * 2
+    assert plan_response["data"] == plans["chat app"]
+
+    # A plan edited after its to-do list was accepted only regenerates the to-do list
+    (tmp_path / "plan.toml").write_text('[project_basics]\noverview = "edited"\n', encoding="utf-8")
+    get_all(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, resume=True)
+    assert calls == ["plan", "todo"] * 2 + ["todo"]
+
+
+def test_restore_rewrites_missing_file_and_keeps_edits(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.record_accepted("plan", PLAN)
+    output_file = tmp_path / "plan.toml"
+
+    assert journal.restore("plan", output_file) == PLAN
+    with open(output_file, "rb") as f:
+        assert tomllib.load(f) == PLAN
+
+    output_file.write_text('[project_basics]\noverview = "chat app"\n', encoding="utf-8")
+    edited = {"project_basics": {"overview": "chat app"}}
+    assert journal.restore("plan", output_file) == edited
+    assert RunJournal(tmp_path).restore("plan", output_file) == edited
+    assert journal.restore("todo", tmp_path / "todo.toml") is None
@@ -0,0 +1,77 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import litellm
+
+from uplan.process import build_request, run_async
+from uplan.utils.messages import build_messages, usage_summary
+
+PROMPT = {
+    "prompt": {"goal": "Create a to-do list."},
+    "template": {"backend": {"frameworks": "<select>"}},
+    "plan": {"overview": "recipe app"},
+}
+
+TODO = {"backend": {"frameworks": ["fastapi"], "categories": []}}
+
+
+def test_static_prefix_is_shared_across_inputs():
+    first = build_request(PROMPT, "openai/gpt-4o")
+    second = build_request({**PROMPT, "plan": {"overview": "chat app"}}, "openai/gpt-4o")
+
+    assert [message["role"] for message in first] == ["system", "user"]
+    assert first[0] == second[0]
+    assert "<plan>" in first[1]["content"] and "<plan>" not in first[0]["content"]
+
+
+def test_anthropic_prefix_gets_cache_control():
+    messages = build_messages(PROMPT, "anthropic/claude-3-5-sonnet-20240620")
+    block = messages[0]["content"][0]
+
+    assert block["cache_control"] == {"type": "ephemeral"}
+    assert "<template>" in block["text"]
+    assert isinstance(build_messages(PROMPT, "openai/gpt-4o")[0]["content"], str)
+
+
+def test_usage_summary_reads_cached_tokens():
+    openai = SimpleNamespace(
+        prompt_tokens=100,
+        completion_tokens=20,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=64),
+    )
+    anthropic = SimpleNamespace(
+        prompt_tokens=100, completion_tokens=20, cache_read_input_tokens=80
+    )
+
+    assert usage_summary(openai)["cached_tokens"] == 64
+    assert usage_summary(anthropic)["cached_tokens"] == 80
+    assert usage_summary(None) is None
+
+
+def test_run_async_requests_and_returns_usage(tmp_path, monkeypatch):
+    requests = []
+
+    async def fake_acompletion(model, messages, stream, **kwargs):
+        requests.append(kwargs)
+        text = f"```json\n{json.dumps(TODO)}\n```"
+
+        async def generate():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+            usage = SimpleNamespace(
+                prompt_tokens=50,
+                completion_tokens=10,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=32),
+            )
+            yield SimpleNamespace(choices=[], usage=usage)
+
+        return generate()
+
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+
+    response = asyncio.run(
+        run_async(prompt_title="todo", output_file=None, prompt=PROMPT, model="fake/model")
+    )
+
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert response["usage"]["cached_tokens"] == 32
@@ -0,0 +1,91 @@
+import time
+from pathlib import Path
+
+import litellm
+import pytest
+
+from uplan.pipeline import DEFAULT_PIPELINE, load_pipeline, normalize_stage, topological_order
+from uplan.process import prepare_answers_cli, run_pipeline
+from uplan.utils import index
+from uplan.utils.index import DocumentIndex
+from uplan.utils.tokens import count_tokens
+
+TEMPLATE_FOLDER = Path(__file__).resolve().parent.parent / "uplan" / "templates" / "dev"
+
+DELAY = 0.2
+
+
+def test_default_pipeline_without_file(tmp_path):
+    stages = load_pipeline(tmp_path)
+
+    assert list(stages) == list(DEFAULT_PIPELINE)
+    assert stages["todo"]["depends_on"] == ["plan"]
+
+
+def test_invalid_pipelines():
+    stages = {
+        "a": normalize_stage("a", {"depends_on": ["b"]}),
+        "b": normalize_stage("b", {"depends_on": ["a"]}),
+    }
+    with pytest.raises(ValueError, match="cycle"):
+        topological_order(stages)
+    with pytest.raises(ValueError, match="unknown"):
+        topological_order({"a": normalize_stage("a", {"depends_on": ["missing"]})})
+
+
+def test_independent_stages_run_concurrently(tmp_path, fake_llm):
+    # Every stage answers with its first template section, shaped like a todo
+    fake_llm(fake_llm.section_todo, delay=DELAY)
+
+    stages = load_pipeline(TEMPLATE_FOLDER)
+    answers_data = prepare_answers_cli(
+        TEMPLATE_FOLDER, answers={"project_basics": {"overview": "todo app"}}
+    )
+    # Load the tokenizer once so only the stages are timed
+    count_tokens("warm up", "fake/model")
+
+    start = time.perf_counter()
+    results = run_pipeline(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, stages, answers_data)
+    elapsed = time.perf_counter() - start
+
+    assert list(results) == ["plan", "todo", "risks", "api_spec"]
+    assert all(response["status"] == "success" for response in results.values())
+    for file_name in ["plan.toml", "todo.toml", "todo.md", "risks.toml", "api_spec.toml"]:
+        assert (tmp_path / file_name).exists()
+
+    # plan first, then the three dependent stages together
+    assert elapsed < DELAY * 3
+
+
+def test_failed_stage_skips_dependents(tmp_path, monkeypatch):
+    async def failing_acompletion(model, messages, stream, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(litellm, "acompletion", failing_acompletion)
+
+    stages = load_pipeline(tmp_path)
+    answers_data = prepare_answers_cli(TEMPLATE_FOLDER, answers={})
+    results = run_pipeline(TEMPLATE_FOLDER, tmp_path, "fake/model", 1, stages, answers_data)
+
+    assert results["plan"]["status"] == "error"
+    assert results["todo"]["status"] == "skipped"
+
+
+def test_pipeline_reuses_indexed_documents(tmp_path, monkeypatch, fake_llm):
+    requests = fake_llm(fake_llm.section_todo)
+    monkeypatch.setattr(index, "_index", DocumentIndex(tmp_path / "index"))
+    stages = load_pipeline(TEMPLATE_FOLDER)
+    answers_data = prepare_answers_cli(
+        TEMPLATE_FOLDER, answers={"project_basics": {"overview": "todo app"}}
+    )
+
+    first = run_pipeline(TEMPLATE_FOLDER, tmp_path / "a", "fake/model", 1, stages, answers_data)
+    assert len(requests) == 4
+
+    # Another project with the same answers gets every document from the index
+    second = run_pipeline(TEMPLATE_FOLDER, tmp_path / "b", "fake/model", 1, stages, answers_data)
+    assert len(requests) == 4
+    assert {name: response["data"] for name, response in second.items()} == {
+        name: response["data"] for name, response in first.items()
+    }
+    assert (tmp_path / "b" / "todo.md").exists()
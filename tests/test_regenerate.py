@@ -0,0 +1,73 @@
+import pytest
+
+import uplan.process
+import uplan.utils.tokens
+from uplan.process import build_regeneration_prompt, fit_request, run, splice_sections
+from uplan.utils.tokens import ContextWindowError
+
+PROMPT = {
+    "prompt": {"goal": "Create a plan for development."},
+    "template": {"basics": {"overview": "<select>"}, "stack": {"database": "<select>"}},
+}
+DOCUMENT = {"basics": {"overview": "recipe app"}, "stack": {"database": "mysql"}}
+
+
+def test_build_regeneration_prompt_narrows_template():
+    request = build_regeneration_prompt(PROMPT, DOCUMENT, ["stack"])
+    assert request["template"] == {"stack": {"database": "<select>"}}
+    assert request["accepted"] == {"basics": {"overview": "recipe app"}}
+    assert PROMPT["template"].keys() == {"basics", "stack"}
+
+
+def test_splice_sections_keeps_order_and_requires_keys():
+    spliced = splice_sections(DOCUMENT, {"stack": {"database": "postgresql"}}, ["stack"])
+    assert list(spliced) == ["basics", "stack"]
+    assert spliced["stack"] == {"database": "postgresql"}
+
+    with pytest.raises(ValueError):
+        splice_sections(DOCUMENT, {}, ["stack"])
+
+
+def test_run_regenerates_only_selected_sections(tmp_path, monkeypatch, fake_llm):
+    responses = iter([DOCUMENT, {"stack": {"database": "postgresql"}}])
+    requests = fake_llm(lambda model, messages: next(responses))
+
+    answers = iter(["r", "y"])
+    monkeypatch.setattr(uplan.process, "review_document", lambda output_file, **kwargs: next(answers))
+    monkeypatch.setattr(uplan.process, "select_sections", lambda sections: ["stack"])
+
+    response = run(
+        prompt_title="Plan Prompt",
+        extracted_title="Extracted Plan Data",
+        output_file=str(tmp_path / "plan.toml"),
+        prompt=PROMPT,
+        model="fake/model",
+        max_retries=3,
+    )
+
+    assert response["data"] == {
+        "basics": {"overview": "recipe app"},
+        "stack": {"database": "postgresql"},
+    }
+    system, user = (message["content"] for message in requests[1][1])
+    assert "<accepted>" in user and "basics" not in system
+
+
+def test_regeneration_request_is_fitted_to_the_context_window(tmp_path, monkeypatch, fake_llm):
+    requests = fake_llm(DOCUMENT)
+    monkeypatch.setattr(uplan.process, "review_document", lambda output_file, **kwargs: "r")
+    monkeypatch.setattr(uplan.process, "select_sections", lambda sections: ["stack"])
+    # Room for the first request, but not for the accepted sections on top
+    tokens = fit_request(PROMPT, "fake/model")[1]
+    monkeypatch.setattr(uplan.utils.tokens, "get_context_window", lambda model: 2 * tokens + 1)
+
+    with pytest.raises(ContextWindowError):
+        run(
+            prompt_title="Plan Prompt",
+            extracted_title="Extracted Plan Data",
+            output_file=str(tmp_path / "plan.toml"),
+            prompt=PROMPT,
+            model="fake/model",
+            max_retries=3,
+        )
+    assert len(requests) == 1
@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+from uplan.utils.display import display_streaming
+from uplan.utils.renderers import PlainRenderer, SilentRenderer, get_renderer
+
+
+class CountingFile(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_plain_renderer_coalesces_writes():
+    file = CountingFile()
+    with PlainRenderer(file=file, flush_size=100, flush_interval=60) as renderer:
+        for _ in range(1000):
+            renderer.write("tok ")
+
+    assert file.getvalue() == "tok " * 1000 + "\n"
+    assert file.writes < 50
+
+
+def test_display_streaming_returns_text_with_silent_renderer(fake_llm):
+    stream = (fake_llm.chunk(part) for part in ["a", None, "b", "c"])
+    text = display_streaming(stream, renderer=SilentRenderer())
+    assert text == "abc"
+
+
+def test_auto_renderer_is_plain_without_tty():
+    # pytest captures stdout, so it is not a terminal
+    assert isinstance(get_renderer("auto"), PlainRenderer)
+
+
+def test_unknown_renderer():
+    with pytest.raises(ValueError):
+        get_renderer("fancy")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import litellm
+import pytest
+
+import uplan.process
+from uplan.models.todo import TodoModel
+from uplan.process import run_async
+from uplan.utils.retry import backoff_delay, build_repair_prompt, classify_error
+
+TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api", "tasks": ["create endpoints"]}],
+    }
+}
+
+
+def test_classify_error():
+    rate_limit = litellm.RateLimitError("slow down", llm_provider="openai", model="gpt")
+    auth = litellm.AuthenticationError("bad key", llm_provider="openai", model="gpt")
+
+    assert classify_error(rate_limit) == "transport"
+    assert classify_error(auth) == "fatal"
+    assert classify_error(json.JSONDecodeError("bad", "{", 0)) == "parse"
+    assert classify_error(RuntimeError("boom")) == "other"
+
+
+def test_timeouts_and_server_errors_are_transport_errors():
+    timeout = litellm.Timeout("timed out", model="gpt", llm_provider="openai")
+    server = litellm.APIError(502, "bad gateway", llm_provider="openai", model="gpt")
+    client = litellm.APIError(418, "teapot", llm_provider="openai", model="gpt")
+
+    assert classify_error(timeout) == "transport"
+    assert classify_error(server) == "transport"
+    assert classify_error(client) == "other"
+
+
+@pytest.mark.parametrize("attempt", [1, 2, 3, 10])
+def test_backoff_delay_bounds(attempt):
+    delay = min(30.0, 2 ** (attempt - 1))
+    assert delay / 2 <= backoff_delay(attempt) <= delay
+
+
+def test_repair_prompt_contains_block_and_error():
+    prompt = {"prompt": {"output_structure": ["Key values use lowercase"]}}
+    repair = build_repair_prompt('```json\n{"a": 1,,}\n```', ValueError("line 1"), prompt)
+
+    assert '{"a": 1,,}' in repair
+    assert "Error: line 1" in repair
+    assert "Key values use lowercase" in repair
+    assert build_repair_prompt("no block here", ValueError("x")) is None
+
+
+def test_schema_failure_sends_repair_request(tmp_path, fake_llm):
+    broken = {"backend": {"frameworks": "fastapi", "categories": []}}
+    responses = iter([broken, TODO])
+    requests = fake_llm(lambda model, messages: next(responses))
+
+    response = asyncio.run(
+        run_async(
+            prompt_title="todo",
+            output_file=str(tmp_path / "todo.toml"),
+            validate_model=TodoModel,
+            prompt={"prompt": {"goal": "todo"}, "template": {"backend": {}}},
+            model="fake/model",
+            max_retries=2,
+        )
+    )
+
+    repair = requests[1][1][-1]["content"]
+    assert response["data"] == TODO
+    assert repair.startswith("The JSON below failed")
+    assert "frameworks" in repair
+
+
+def test_transport_failure_backs_off(tmp_path, monkeypatch, fake_llm):
+    delays = []
+
+    def respond(model, messages):
+        if len(attempts) == 1:
+            raise litellm.APIConnectionError("reset", llm_provider="openai", model="gpt")
+        return TODO
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    attempts = fake_llm(respond)
+    monkeypatch.setattr(uplan.process.asyncio, "sleep", fake_sleep)
+
+    response = asyncio.run(
+        run_async(
+            prompt_title="todo",
+            output_file=None,
+            prompt={"prompt": {"goal": "todo"}},
+            model="fake/model",
+            max_retries=2,
+        )
+    )
+
+    assert response["status"] == "success"
+    assert attempts[0] == attempts[1]
+    assert len(delays) == 1 and delays[0] > 0
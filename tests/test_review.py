@@ -0,0 +1,137 @@
+import importlib
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+import uplan.process
+from uplan.process import get_all
+from uplan.question import parse_answers, validate_answers
+from uplan.utils.review import get_review_policy
+from uplan.utils.templates import load_template
+
+# uplan.main is shadowed by the main() entry point exported by uplan
+main = importlib.import_module("uplan.main")
+
+TEMPLATE_FOLDER = Path(__file__).resolve().parent.parent / "uplan" / "templates" / "dev"
+
+PLAN = {"project_basics": {"overview": "todo app"}}
+TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api", "tasks": ["create endpoints"]}],
+    }
+}
+TEMPLATE = """
+[template.project_basics.overview]
+ask = "Overview?"
+required = true
+
+[template.project_basics.language]
+default = "Python"
+"""
+
+
+def test_review_policies():
+    assert get_review_policy("manual").decide(1) is None
+    assert get_review_policy("auto", open_files=False).decide(1) == "y"
+
+    after_two = get_review_policy("2")
+    assert [after_two.decide(round) for round in (1, 2, 3)] == [None, "y", "y"]
+    with pytest.raises(ValueError):
+        get_review_policy("0")
+    with pytest.raises(ValueError, match="sometimes"):
+        get_review_policy("sometimes")
+
+
+def test_headless_runs_only_allow_policies_that_decide_alone():
+    assert get_review_policy("auto", headless=True).decide(1) == "y"
+    assert get_review_policy("1", headless=True).decide(1) == "y"
+    with pytest.raises(ValueError, match="headless"):
+        get_review_policy("manual", headless=True)
+    with pytest.raises(ValueError, match="headless"):
+        get_review_policy("2", headless=True)
+
+
+def test_headless_cli_fails_before_the_model_check(tmp_path, monkeypatch):
+    def check_model_support(model):
+        raise AssertionError("checked the model")
+
+    monkeypatch.setattr(main, "check_model_support", check_model_support)
+    runner = CliRunner()
+
+    result = runner.invoke(main.cli, ["--headless", "--review", "2"])
+    assert result.exit_code == 2
+    assert "headless" in result.output
+
+    result = runner.invoke(main.cli, ["plan", "--headless"])
+    assert result.exit_code == 2
+
+
+def test_headless_resume_needs_answers_without_a_journal(tmp_path, monkeypatch):
+    def ask(*args, **kwargs):
+        raise AssertionError("asked the user")
+
+    monkeypatch.setattr(main, "check_model_support", lambda model: (True, "ok"))
+    monkeypatch.setattr(main, "setup_env", lambda: None)
+    monkeypatch.setattr(uplan.process, "collect_answers_cli", ask)
+    options = ["--input", str(TEMPLATE_FOLDER.parent), "--output", str(tmp_path)]
+    options += ["--headless", "--review", "auto", "--no-warmup", "--no-metrics", "--no-cache"]
+
+    result = CliRunner().invoke(main.cli, ["resume", *options])
+    assert result.exit_code == 2
+    assert "--answers" in result.output
+
+
+def test_answers_are_parsed_and_checked_against_the_template(tmp_path):
+    (tmp_path / "plan.toml").write_text(TEMPLATE, encoding="utf-8")
+    questions = load_template(tmp_path / "plan.toml").questions
+    answers = parse_answers('[project_basics]\noverview = "todo app"\n')
+    assert answers == parse_answers(json.dumps(PLAN)) == PLAN
+
+    validate_answers(questions, answers)
+    with pytest.raises(ValueError, match="project_basics.typo"):
+        validate_answers(questions, {"project_basics": {"overview": "app", "typo": "x"}})
+    with pytest.raises(ValueError, match="missing required answers: project_basics.overview"):
+        validate_answers(questions, {"project_basics": {"language": "Go"}})
+    with pytest.raises(ValueError):
+        parse_answers("not [answers")
+
+
+def test_headless_run_asks_nothing(tmp_path, monkeypatch, fake_llm):
+    def ask(*args, **kwargs):
+        raise AssertionError("asked the user")
+
+    fake_llm(fake_llm.plan_or_todo(PLAN, TODO))
+    monkeypatch.setattr(uplan.process, "review_document", ask)
+    monkeypatch.setattr(uplan.process, "collect_answers_cli", ask)
+
+    plan_response, todo_response = get_all(
+        TEMPLATE_FOLDER, tmp_path, "fake/model", 1, answers=PLAN, review="auto"
+    )
+
+    assert plan_response["data"] == PLAN
+    assert todo_response["status"] == "success"
+    assert (tmp_path / "todo.md").exists()
+
+
+def test_headless_run_works_with_stdin_closed(tmp_path, monkeypatch, fake_llm):
+    stdin = io.StringIO()
+    stdin.close()
+    monkeypatch.setattr(sys, "stdin", stdin)
+    fake_llm(fake_llm.plan_or_todo(PLAN, TODO))
+
+    plan_response, todo_response = get_all(
+        TEMPLATE_FOLDER,
+        tmp_path,
+        "fake/model",
+        1,
+        answers=PLAN,
+        review=get_review_policy("1", headless=True),
+    )
+
+    assert plan_response["status"] == todo_response["status"] == "success"
+    assert (tmp_path / "todo.md").exists()
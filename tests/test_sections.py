@@ -0,0 +1,77 @@
+import asyncio
+import time
+import tomllib
+from pathlib import Path
+
+from uplan.process import generate_sections_async, select_plan_context, split_todo_sections
+
+TEMPLATE_FOLDER = Path(__file__).resolve().parent.parent / "uplan" / "templates" / "dev"
+
+PLAN = {
+    "project_basics": {"overview": "recipe sharing app"},
+    "tech_stack": {"frontend": "react", "backend": "fastapi", "database": "postgresql"},
+    "design": {"user_interface": "simple", "api": "rest"},
+}
+DELAY = 0.2
+
+
+def load_todo():
+    with open(TEMPLATE_FOLDER / "todo.toml", "rb") as f:
+        todo = tomllib.load(f)
+    todo["plan"] = PLAN
+    return todo
+
+
+def test_select_plan_context_keeps_overview_and_matches():
+    context = select_plan_context(PLAN, "database")
+    assert list(context) == ["project_basics", "tech_stack"]
+
+
+def test_select_plan_context_falls_back_to_whole_plan():
+    assert select_plan_context(PLAN, "deployment") == PLAN
+
+
+def test_split_todo_sections():
+    prompts = split_todo_sections(load_todo())
+    assert list(prompts) == [
+        "environment_setup",
+        "frontend",
+        "backend",
+        "database",
+        "testing",
+        "deployment",
+    ]
+    assert list(prompts["frontend"]["template"]) == ["frontend"]
+    assert prompts["frontend"]["prompt"]["goal"] == "Create a to-do list for development."
+
+
+def test_sections_are_generated_concurrently(fake_llm):
+    fake_llm(fake_llm.section_todo, delay=DELAY)
+
+    start = time.perf_counter()
+    merged = asyncio.run(generate_sections_async(load_todo(), "fake/model", 1))
+    elapsed = time.perf_counter() - start
+
+    assert list(merged) == list(load_todo()["template"])
+    assert elapsed < DELAY * 3
+
+
+def test_section_response_must_contain_its_section(fake_llm):
+    def respond(model, messages):
+        if messages[-1]["content"].startswith("The JSON below failed"):
+            return {"frontend": {"frameworks": ["react"], "categories": []}}
+        data = fake_llm.section_todo(model, messages)
+        # The frontend request is answered with another section
+        if "frontend" in data:
+            return {"backend": data["frontend"]}
+        # Extra keys next to the requested section are ignored
+        return {**data, "notes": {"frameworks": [], "categories": []}}
+
+    requests = fake_llm(respond)
+    merged = asyncio.run(generate_sections_async(load_todo(), "fake/model", 2))
+
+    assert list(merged) == list(load_todo()["template"])
+    assert merged["frontend"]["frameworks"] == ["react"]
+    (repair,) = [m[-1]["content"] for _, m in requests if "failed" in m[-1]["content"]]
+    assert len(requests) == len(merged) + 1
+    assert "Expected the section 'frontend', got: backend" in repair
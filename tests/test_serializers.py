@@ -0,0 +1,47 @@
+import json
+import tomllib
+
+import pytest
+
+from uplan.utils.serializers import SERIALIZERS, serialize_prompt
+from uplan.utils.text import dict_to_xml
+
+PROMPT = {
+    "prompt": {"goal": "Create a to-do list.", "instructions": ["Review <plan>.", "Be brief."]},
+    "template": {"backend": {"frameworks": ["<select>"], "tasks": ["<select>"]}},
+    "plan": {"categories": [{"title": "api", "tasks": ["create endpoints"]}]},
+}
+
+
+def test_dict_to_xml_recurses_into_nested_values():
+    xml = dict_to_xml(PROMPT)
+    assert "<backend>" in xml and "</backend>" in xml
+    assert "<item>" in xml and "<title>api</title>" in xml
+    assert "{" not in xml and "'" not in xml
+
+
+def test_json_and_toml_round_trip():
+    assert json.loads(serialize_prompt(PROMPT, "json")) == PROMPT
+    assert tomllib.loads(serialize_prompt(PROMPT, "toml")) == PROMPT
+
+
+def test_outline_format():
+    outline = serialize_prompt(PROMPT, "outline")
+    assert "template:\n  backend:\n    frameworks:\n      - <select>" in outline
+
+
+def test_format_is_read_from_template_and_not_sent():
+    prompt = {**PROMPT, "prompt": {**PROMPT["prompt"], "format": "json"}}
+    text = serialize_prompt(prompt)
+    assert json.loads(text) == PROMPT
+
+
+@pytest.mark.parametrize("format", SERIALIZERS)
+def test_every_format_keeps_content(format):
+    text = serialize_prompt(PROMPT, format)
+    assert "create endpoints" in text and "Review <plan>." in text
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        serialize_prompt(PROMPT, "yaml")
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from uplan.server import PlanServer, submit
+
+TEMPLATES_ROOT = Path(__file__).resolve().parent.parent / "uplan" / "templates"
+ANSWERS = {
+    "project_basics": {"overview": "todo app", "core_functionality": "lists"},
+    "tech_stack": {
+        "package_manager": "uv",
+        "frontend": "None",
+        "backend": "FastAPI",
+        "database": "SQLite",
+        "test_framework": "pytest",
+    },
+}
+
+
+@pytest.fixture
+def running_server(tmp_path, fake_llm):
+    """Start a PlanServer on an event loop in a background thread."""
+    fake_llm(fake_llm.section_todo)
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    server = PlanServer(TEMPLATES_ROOT, tmp_path / "out", "fake/model", retry=1, workers=2)
+
+    def start(**kwargs):
+        return asyncio.run_coroutine_threadsafe(server.start(**kwargs), loop).result()
+
+    yield start
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_submit_streams_stage_events(tmp_path, running_server):
+    socket_path = str(tmp_path / "uplan.sock")
+    running_server(socket_path=socket_path)
+
+    request = {
+        "action": "run",
+        "category": "dev",
+        "answers": ANSWERS,
+        "name": "alpha",
+    }
+    events = list(submit(request, socket_path=socket_path))
+
+    assert [e["event"] for e in events[:2]] == ["queued", "started"]
+    finished = {
+        e["stage"]: e["status"]
+        for e in events
+        if e["event"] == "stage" and e["status"] != "running"
+    }
+    assert set(finished) == {"plan", "todo", "risks", "api_spec"}
+    assert set(finished.values()) == {"success"}
+    assert events[-1]["event"] == "done"
+    assert (tmp_path / "out" / "dev" / "alpha" / "todo.md").exists()
+    assert str(tmp_path / "out" / "dev" / "alpha" / "todo.md") in events[-1]["changed"]
+
+    # The same answers produce the same documents, so nothing is rewritten
+    events = list(submit(request, socket_path=socket_path))
+    assert events[-1]["changed"] == []
+
+
+def test_invalid_requests_get_error_events(running_server):
+    listener = running_server(port=0)
+    port = listener.sockets[0].getsockname()[1]
+
+    assert list(submit({"action": "ping"}, port=port)) == [{"event": "pong"}]
+    for request in [
+        {"action": "run", "category": "../secrets"},
+        {"action": "run", "category": "missing"},
+        {"action": "run", "answers": {"project_basics": {"overview": "todo app"}}},
+        {"action": "run", "answers": {**ANSWERS, "typo": {"x": "y"}}},
+        {"action": "delete"},
+    ]:
+        # Rejected before the job is queued
+        (event,) = submit(request, port=port)
+        assert event["event"] == "error"
@@ -0,0 +1,60 @@
+import subprocess
+import sys
+
+import pytest
+
+# Cold import budget for `uplan --help` / `uplan init`, in microseconds
+STARTUP_BUDGET_US = 300_000
+
+# Modules only needed by commands that talk to a model
+HEAVY_MODULES = ["litellm", "pydantic", "uplan.process", "rich.live", "rich.syntax"]
+
+HELP_CODE = (
+    "import sys; sys.argv = ['uplan', '--help']\n"
+    "from uplan.main import main\n"
+    "try:\n"
+    "    main()\n"
+    "except SystemExit:\n"
+    "    pass\n"
+)
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Return the cumulative import time (us) of each top-level import made by code."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented by two spaces per level after the separator
+        times[name[1:].rstrip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module")
+def help_imports():
+    interpreter = import_times("pass")
+    return {
+        name: cumulative
+        for name, cumulative in import_times(HELP_CODE).items()
+        if name not in interpreter
+    }
+
+
+@pytest.mark.parametrize("module_name", HEAVY_MODULES)
+def test_help_skips_heavy_modules(help_imports, module_name):
+    imported = {name.strip() for name in help_imports}
+    assert module_name not in imported
+
+
+def test_help_import_budget(help_imports):
+    total = sum(
+        cumulative for name, cumulative in help_imports.items() if not name.startswith(" ")
+    )
+    assert total < STARTUP_BUDGET_US, f"uplan --help imports took {total} us"
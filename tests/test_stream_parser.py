@@ -0,0 +1,174 @@
+import asyncio
+import json
+
+import litellm
+import pytest
+from pydantic import ValidationError
+
+from uplan.models.todo import TodoModel
+from uplan.process import parse_response, run_async
+from uplan.utils.stream_parser import StreamValidationError, StreamingJSONValidator
+
+VALID_TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api {v1}", "tasks": ["add \"```\" docs", "test"]}],
+    },
+    "frontend": {
+        "frameworks": ["react"],
+        "categories": [{"title": "ui", "tasks": ["login page"]}],
+    },
+}
+
+
+def feed_all(validator, text, size=1):
+    for i in range(0, len(text), size):
+        validator.feed(text[i : i + size])
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_valid_todo_streams_to_completion(size):
+    text = f"Here is the list:\n```json\n{json.dumps(VALID_TODO, indent=2)}\n```\nDone."
+    validator = StreamingJSONValidator(TodoModel)
+    feed_all(validator, text, size)
+
+    assert validator.done
+    assert validator.sections == ["backend", "frontend"]
+
+
+def test_invalid_section_is_detected_before_document_ends():
+    broken = {"database": {"frameworks": ["postgresql"]}, **VALID_TODO}
+    text = f"```json\n{json.dumps(broken)}\n```"
+    validator = StreamingJSONValidator(TodoModel)
+
+    consumed = 0
+    for char in text:
+        consumed += 1
+        validator.feed(char)
+        if validator.error:
+            break
+
+    assert consumed < len(text) // 2
+    assert isinstance(validator.error, StreamValidationError)
+    assert "database" in str(validator.error)
+
+
+def test_syntax_error_fails_the_block():
+    validator = StreamingJSONValidator()
+    feed_all(validator, '```json\n{"overview": "app",, "x": 1}')
+    assert validator.error is not None and not validator.done
+
+
+def test_non_object_fails_the_block():
+    validator = StreamingJSONValidator()
+    feed_all(validator, "```json\n[1, 2]\n```")
+    assert validator.error is not None and not validator.done
+
+
+def test_later_block_replaces_a_failed_one():
+    example = {"backend": {"frameworks": "fastapi"}, "frontend": {}}
+    text = (
+        f"For example:\n```json\n{json.dumps(example)}\n```\n"
+        f"The list:\n```json\n{json.dumps(VALID_TODO)}\n```"
+    )
+    validator = StreamingJSONValidator(TodoModel)
+    feed_all(validator, text, 3)
+
+    # The streamed and the final check pick the same, last block
+    assert validator.done and validator.error is None
+    assert validator.sections == ["backend", "frontend"]
+    assert parse_response(text, TodoModel, validator) == VALID_TODO
+
+    # An invalid answer after a valid example fails both checks
+    text = f"```json\n{json.dumps(VALID_TODO)}\n```\n```json\n{json.dumps(example)}\n```"
+    validator = StreamingJSONValidator(TodoModel)
+    feed_all(validator, text, 3)
+    assert validator.error is not None
+    with pytest.raises(ValidationError):
+        parse_response(text, TodoModel, validator)
+
+
+def test_unclosed_block_is_left_to_final_parse():
+    validator = StreamingJSONValidator(TodoModel)
+    feed_all(validator, '```json\n{"backend": {"frameworks": ["fastapi"]')
+    assert not validator.done
+
+
+def test_reasoning_examples_are_ignored():
+    text = (
+        "<think>Maybe ```json\n{\"backend\": 1}``` is wrong.</think>\n"
+        f"```json\n{json.dumps(VALID_TODO)}\n```"
+    )
+    validator = StreamingJSONValidator(TodoModel)
+    feed_all(validator, text, 5)
+    assert validator.done
+
+
+def test_other_blocks_are_skipped():
+    text = f"```bash\npip install x\n```\n```json\n{json.dumps(VALID_TODO)}\n```"
+    validator = StreamingJSONValidator(TodoModel)
+    feed_all(validator, text, 3)
+    assert validator.done
+    assert validator.json_block()[1] == VALID_TODO
+
+
+def test_unopened_reasoning_end_resets_the_block():
+    text = (
+        'For example ```json\n{"x": {}}\n``` would do.</think>\n'
+        f"```json\n{json.dumps(VALID_TODO)}\n```"
+    )
+    validator = StreamingJSONValidator()
+    feed_all(validator, text, 4)
+    assert validator.sections == ["backend", "frontend"]
+
+
+def test_failed_block_aborts_unless_a_later_block_opens():
+    broken = {"database": {"frameworks": ["postgresql"]}, **VALID_TODO}
+    validator = StreamingJSONValidator(TodoModel, abort_after=50)
+    with pytest.raises(StreamValidationError, match="database"):
+        feed_all(validator, f"```json\n{json.dumps(broken)}\n```\n" + "x" * 100)
+    assert validator.received < len(json.dumps(broken)) + 50
+
+    # A later JSON block within abort_after characters replaces the failed one
+    text = f"```json\n{json.dumps(broken)}\n```\nFixed:\n```json\n{json.dumps(VALID_TODO)}\n```"
+    validator = StreamingJSONValidator(TodoModel, abort_after=1000)
+    feed_all(validator, text)
+    assert validator.done
+
+
+def test_invalid_stream_is_cancelled(tmp_path, monkeypatch, fake_llm):
+    broken = {"database": {"frameworks": ["postgresql"]}, **VALID_TODO}
+    filler = [json.dumps({f"section_{i}": VALID_TODO["backend"]}) for i in range(200)]
+    text = f"```json\n{json.dumps(broken)[:-1]}, {', '.join(item[1:-1] for item in filler)}}}\n```"
+    streams = []
+
+    async def acompletion(model, messages, stream, **kwargs):
+        record = {"sent": 0, "closed": False}
+        streams.append(record)
+        answer = text if len(streams) == 1 else f"```json\n{json.dumps(VALID_TODO)}\n```"
+
+        async def generate():
+            try:
+                for i in range(0, len(answer), 20):
+                    record["sent"] += 1
+                    yield fake_llm.chunk(answer[i : i + 20])
+            finally:
+                record["closed"] = True
+
+        return generate()
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+    response = asyncio.run(
+        run_async(
+            prompt_title="todo",
+            output_file=str(tmp_path / "todo.toml"),
+            validate_model=TodoModel,
+            prompt={"prompt": {"goal": "todo"}, "template": {"backend": {}}},
+            model="fake/model",
+            max_retries=2,
+        )
+    )
+
+    assert response["data"] == VALID_TODO
+    assert streams[0]["closed"]
+    assert streams[0]["sent"] < len(text) // 20 // 4
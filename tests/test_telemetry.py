@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from uplan.models.todo import TodoModel
+from uplan.process import run_async
+from uplan.utils import telemetry
+from uplan.utils.telemetry import load_spans, percentile, summarize
+
+TODO = {
+    "backend": {
+        "frameworks": ["fastapi"],
+        "categories": [{"title": "api", "tasks": ["create endpoints"]}],
+    }
+}
+
+
+@pytest.fixture
+def metrics_file(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    telemetry.configure(path)
+    yield path
+    telemetry.configure(None)
+
+
+def test_span_records_attributes_and_errors(metrics_file):
+    with telemetry.span("write", file="plan.toml") as attrs:
+        attrs["bytes"] = 10
+    with pytest.raises(ValueError):
+        with telemetry.span("extract"):
+            raise ValueError("no block")
+
+    write, extract = load_spans(metrics_file)
+    assert write["span"] == "write"
+    assert (write["file"], write["bytes"]) == ("plan.toml", 10)
+    assert write["duration"] >= 0
+    assert extract["error"] == "ValueError"
+    assert write["run"] == extract["run"]
+
+
+def test_disabled_telemetry_writes_nothing(tmp_path):
+    telemetry.configure(None)
+    with telemetry.span("write"):
+        pass
+    assert load_spans(tmp_path / "metrics.jsonl") == []
+
+
+def test_percentile_and_summarize():
+    assert percentile([], 50) is None
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile(list(range(1, 101)), 95) == 95
+
+    spans = [
+        {"run": "a", "span": "request", "model": "m", "stage": "plan", "attempt": 1,
+         "duration": 1.0, "error": "JSONDecodeError"},
+        {"run": "a", "span": "request", "model": "m", "stage": "plan", "attempt": 2,
+         "duration": 3.0, "ttft": 0.5, "tokens_per_sec": 40.0, "cost": 0.01},
+        {"run": "b", "span": "request", "model": "m", "stage": "plan", "attempt": 1,
+         "duration": 2.0, "ttft": 0.2, "tokens_per_sec": 50.0, "cost": 0.02},
+        {"run": "b", "span": "write", "file": "plan.toml", "duration": 0.001},
+    ]
+    summary = summarize(spans)
+
+    plan = summary["requests"][("m", "plan")]
+    assert (plan["count"], plan["errors"], plan["retries"]) == (3, 1, 1)
+    assert plan["duration"] == {"p50": 2.0, "p95": 3.0}
+    assert plan["ttft"] == {"p50": 0.2, "p95": 0.5}
+    assert plan["cost"] == pytest.approx(0.03)
+    assert summary["spans"]["write"]["count"] == 1
+
+
+def test_run_async_records_request_spans(fake_llm, metrics_file):
+    usage = SimpleNamespace(prompt_tokens=20, completion_tokens=30)
+    fake_llm(TODO, chunk_size=10, usage=usage)
+
+    asyncio.run(
+        run_async(
+            prompt_title="todo",
+            output_file=None,
+            validate_model=TodoModel,
+            prompt={"prompt": {"goal": "todo"}, "template": {"backend": {}}},
+            model="fake/model",
+            max_retries=1,
+        )
+    )
+
+    spans = load_spans(metrics_file)
+    (request,) = [span for span in spans if span["span"] == "request"]
+    assert (request["stage"], request["model"], request["attempt"]) == ("todo", "fake/model", 1)
+    assert request["ttft"] >= 0
+    assert request["chunks"] > 1
+    assert request["completion_tokens"] == 30
+    assert {"extract", "validate"} <= {span["span"] for span in spans}
@@ -0,0 +1,93 @@
+import os
+import tomllib
+
+from uplan.init import TEMPLATES_DIR
+from uplan.question import apply_answers
+from uplan.utils import messages
+from uplan.utils.messages import build_messages
+from uplan.utils.templates import TemplateCache
+from uplan.utils.text import compact_prompt
+
+TEMPLATE = """
+[prompt]
+goal = "Plan"
+
+[template.basics.overview]
+ask = "Overview?"
+description = "What you make"
+required = true
+
+[template.basics.language]
+default = "Python"
+"""
+
+
+def test_questions_keep_template_order_and_defaults(tmp_path):
+    path = tmp_path / "plan.toml"
+    path.write_text(TEMPLATE, encoding="utf-8")
+
+    compiled = TemplateCache().load(path)
+
+    assert [(q.key, q.required, q.default) for q in compiled.questions] == [
+        ("overview", True, "<select>"),
+        ("language", False, "Python"),
+    ]
+    assert compiled.defaults == {
+        "basics": {"overview": "<select> (e.g., What you make)", "language": "Python (e.g., )"}
+    }
+    answers = {"basics": {"overview": " app ", "language": "Python"}}
+    assert apply_answers(compiled.questions, answers) == {"basics": {"overview": "app"}}
+
+
+def test_templates_without_questions_keep_their_template():
+    compiled = TemplateCache().load(TEMPLATES_DIR / "dev" / "todo.toml")
+
+    assert compiled.questions is None
+    with open(TEMPLATES_DIR / "dev" / "todo.toml", "rb") as f:
+        assert compiled.prompt() == tomllib.load(f)
+
+
+def test_changed_template_is_compiled_again(tmp_path):
+    path = tmp_path / "plan.toml"
+    path.write_text(TEMPLATE, encoding="utf-8")
+    cache = TemplateCache()
+    first = cache.load(path)
+    assert cache.load(path) is first
+
+    path.write_text(TEMPLATE.replace('goal = "Plan"', 'goal = "Plan it"'), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.load(path).header == {"goal": "Plan it"}
+
+
+def test_disk_cache_is_shared_between_processes(tmp_path, monkeypatch):
+    path = tmp_path / "plan.toml"
+    path.write_text(TEMPLATE, encoding="utf-8")
+    compiled = TemplateCache(tmp_path / "cache").load(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("template parsed again")
+
+    monkeypatch.setattr(tomllib, "load", fail)
+    restored = TemplateCache(tmp_path / "cache").load(path)
+
+    assert restored.to_dict() == compiled.to_dict()
+
+
+def test_build_messages_uses_the_compiled_prefix(tmp_path, monkeypatch):
+    path = tmp_path / "plan.toml"
+    path.write_text(TEMPLATE, encoding="utf-8")
+    compiled = TemplateCache().load(path)
+
+    def serialize_variable_part(prompt, format=None):
+        assert "template" not in prompt
+        return "answers"
+
+    monkeypatch.setattr(messages, "serialize_prompt", serialize_variable_part)
+    prompt = {**compiled.prompt(), "user_input": {"basics": {"overview": "app"}}}
+
+    assert [m["content"] for m in build_messages(compact_prompt(prompt), "gpt-4o")] == [
+        compiled.prefix,
+        "answers",
+    ]
@@ -1,4 +1,17 @@
-from uplan.utils.text import extract_code_block
+import json
+
+import pytest
+
+from uplan.utils.text import (
+    FenceScanner,
+    compact_prompt,
+    extract_code_block,
+    optimize_for_prompt,
+    scan_code_blocks,
+    strip_select_hints,
+)
+
+ANSWER = {"tasks": ["add \"```\" to docs", "escape \\ backslashes"]}
 
 
 def test_code_block_with_language():
@@ -25,3 +38,88 @@ def test_empty_code_block():
     doc = "```\n\n```"
     result = extract_code_block(doc)
     assert result == ""
+
+
+def test_reasoning_examples_are_skipped():
+    doc = (
+        '<think>Something like ```json\n{"tasks": []}\n``` maybe.</think>\n'
+        f"```json\n{json.dumps(ANSWER)}\n```"
+    )
+    assert json.loads(extract_code_block(doc)) == ANSWER
+
+
+def test_blocks_before_unopened_reasoning_end_are_dropped():
+    doc = 'Example: ```json\n{"tasks": []}\n```</think>\n```\n{"tasks": ["real"]}\n```'
+    assert extract_code_block(doc) == '{"tasks": ["real"]}'
+
+
+def test_last_json_block_that_parses_wins():
+    doc = (
+        "```bash\npip install uplan\n```\n"
+        '```json\n{"draft": true}\n```\n'
+        f"```json\n{json.dumps(ANSWER)}\n```\n"
+        '```json\n{"broken": \n```'
+    )
+    assert json.loads(extract_code_block(doc)) == ANSWER
+
+
+def test_unclosed_block_is_extracted():
+    assert extract_code_block('Sure:\n```json\n{"a": 1}') == '{"a": 1}'
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+def test_chunked_scan_matches_whole_document(size):
+    doc = (
+        "<think>```json\n{}\n```</think>"
+        "```python\nprint('```')\n```\n"
+        f"```json\n{json.dumps(ANSWER, indent=2)}\n```"
+    )
+    scanner = FenceScanner()
+    for i in range(0, len(doc), size):
+        scanner.feed(doc[i : i + size])
+
+    assert scanner.finish() == scan_code_blocks(doc).blocks
+    assert [block.language for block in scanner.blocks] == ["python", "json"]
+    assert scanner.json_block()[1] == ANSWER
+
+
+def test_open_json_string_is_not_held_back():
+    value = 'a \\"quoted\\" ``` fence ' * 200
+    doc = f'```json\n{{"notes": "{value}"}}\n```'
+    scanner = FenceScanner()
+    for i in range(0, len(doc), 7):
+        scanner.feed(doc[i : i + 7])
+        if scanner.string_open:
+            # Only a backslash waiting for the escaped character is held back
+            assert len(scanner.buffer) <= 1
+
+    assert scanner.json_block()[1] == {"notes": value.replace("\\", "")}
+
+
+def test_optimize_for_prompt_keeps_words_apart():
+    text = "<goal>\n  Create a   plan\n</goal>\n<tags>\n</tags>"
+    assert optimize_for_prompt(text) == "<goal> Create a plan </goal><tags></tags>"
+
+
+def test_compact_prompt_drops_empty_entries():
+    data = {
+        "template": {
+            "overview": "<select> (e.g., What you are making (app, etc.))",
+            "api": "<select> (e.g., )",
+            "notes": "",
+        },
+        "user_input": {},
+        "instructions": ["keep", ""],
+    }
+    assert compact_prompt(data) == {
+        "template": {
+            "overview": "<select> (e.g., What you are making (app, etc.))",
+            "api": "<select>",
+        },
+        "instructions": ["keep"],
+    }
+
+
+def test_strip_select_hints():
+    data = {"frameworks": ["<select> (e.g., react, vue)"], "overview": "todo app"}
+    assert strip_select_hints(data) == {"frameworks": ["<select>"], "overview": "todo app"}
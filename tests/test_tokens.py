@@ -0,0 +1,51 @@
+from functools import partial
+
+import pytest
+
+import uplan.utils.tokens
+from uplan.process import build_request
+from uplan.utils.messages import messages_text
+from uplan.utils.tokens import ContextWindowError, fit_prompt, get_context_window
+
+PROMPT = {
+    "prompt": {"goal": "Create a plan for development."},
+    "template": {
+        "overview": "<select> (e.g., " + "what you are making, " * 40 + ")",
+        "empty": "",
+    },
+}
+REQUEST = partial(build_request, model="ollama/qwq")
+
+
+def test_ollama_context_window_from_env(monkeypatch):
+    monkeypatch.setenv("OLLAMA_CONTEXT_LENGTH", "8192")
+    assert get_context_window("ollama/qwq") == 8192
+
+
+def test_fit_prompt_reports_size_without_limit(monkeypatch):
+    monkeypatch.setattr(uplan.utils.tokens, "get_context_window", lambda model: None)
+    messages, tokens, budget = fit_prompt(
+        PROMPT, "fake/model", partial(build_request, model="fake/model")
+    )
+
+    assert "<empty>" not in messages_text(messages)
+    assert tokens > 0 and budget is None
+
+
+def test_fit_prompt_trims_hints_when_over_budget(monkeypatch):
+    full_tokens = fit_prompt(PROMPT, "ollama/qwq", REQUEST)[1]
+    monkeypatch.setenv("OLLAMA_CONTEXT_LENGTH", str(full_tokens))
+
+    messages, tokens, budget = fit_prompt(PROMPT, "ollama/qwq", REQUEST, output_reserve=0)
+    assert tokens <= budget
+
+    monkeypatch.setenv("OLLAMA_CONTEXT_LENGTH", str(full_tokens - 1))
+    messages, tokens, budget = fit_prompt(PROMPT, "ollama/qwq", REQUEST, output_reserve=0)
+    assert "e.g." not in messages_text(messages)
+    assert tokens <= budget
+
+
+def test_fit_prompt_fails_fast(monkeypatch):
+    monkeypatch.setenv("OLLAMA_CONTEXT_LENGTH", "20")
+    with pytest.raises(ContextWindowError):
+        fit_prompt(PROMPT, "ollama/qwq", REQUEST, output_reserve=0)
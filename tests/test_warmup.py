@@ -0,0 +1,63 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import litellm
+import pytest
+
+from uplan.utils.warmup import start_warmup, warmup
+
+
+@pytest.fixture
+def provider():
+    """A local HTTP server recording (method, path, body) of every request."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            requests.append(("POST", self.path, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def do_HEAD(self):
+            requests.append(("HEAD", self.path, None))
+            self.send_response(404)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_ollama_model_is_loaded_with_keep_alive(provider, monkeypatch):
+    base, requests = provider
+    monkeypatch.setenv("OLLAMA_API_BASE", base)
+
+    start_warmup("ollama/qwq,gpt-4o").join(timeout=30)
+
+    assert requests == [("POST", "/api/generate", {"model": "qwq", "keep_alive": "10m"})]
+
+
+def test_connection_is_opened_in_the_litellm_client(provider, monkeypatch):
+    base, requests = provider
+    monkeypatch.setenv("OPENAI_API_BASE", base)
+    monkeypatch.setattr(litellm, "client_session", None)
+
+    warmup("gpt-4o")
+
+    assert requests == [("HEAD", "/", None)]
+    assert litellm.client_session is not None
+    litellm.client_session.close()
+
+
+def test_failed_warmup_is_ignored(monkeypatch):
+    monkeypatch.setenv("OLLAMA_API_BASE", "http://127.0.0.1:1")
+    warmup("ollama/qwq")
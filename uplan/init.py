@@ -1,8 +1,6 @@
 from pathlib import Path
 import shutil
 
-from uplan.models.todo import TodoModel
-
 # Configuration paths
 DEFAULT_CONFIG_DIR = Path.cwd() / "input"
 TEMPLATES_DIR = Path(__file__).parent / "templates"
@@ -45,6 +43,8 @@ def validate_templates(category: str) -> None:
         if not input_dir.exists():
             raise ValueError(f"Input directory '{category}' not found")
 
+        from uplan.models.todo import TodoModel
+
         # Find all .toml files in the directory
         for file_path in input_dir.glob("*.toml"):
             try:
@@ -1,11 +1,23 @@
+"""
+Command line interface.
+
+Modules that pull in litellm, pydantic or rich renderables are imported inside
+the commands that talk to a model, so `uplan --help` and `uplan init` start fast.
+"""
+
 import click
 from pathlib import Path
 
 from rich import print
 
 from uplan.init import initialize
-from uplan.process import get_all, get_plan, get_todo
+from uplan.server import DEFAULT_PORT, DEFAULT_WORKERS
+from uplan.utils.cache import DEFAULT_CACHE_DIR, ResponseCache
+from uplan.utils.hedge import DEFAULT_HEDGE_AFTER
+from uplan.utils.index import DEFAULT_SIMILARITY
+from uplan.utils.review import ReviewPolicy, get_review_policy
 from uplan.utils.provider import check_model_support, setup_env
+from uplan.utils.telemetry import DEFAULT_METRICS_FILE, configure, span
 
 
 def setup_folders(
@@ -22,16 +34,209 @@ def setup_folders(
     return input_folder, output_folder
 
 
+def setup_cache(
+    enabled: bool, cache_dir: str, similarity: float = DEFAULT_SIMILARITY
+) -> ResponseCache | None:
+    """
+    Create the response cache if caching is enabled.
+
+    Compiled templates and the index of accepted documents (used to start
+    from similar earlier projects) are kept in the cache folder as well.
+    """
+    from uplan.utils.index import INDEX_SUBDIR, configure as configure_index
+    from uplan.utils.templates import TEMPLATE_CACHE_SUBDIR, configure as configure_templates
+
+    configure_templates(Path(cache_dir) / TEMPLATE_CACHE_SUBDIR if enabled else None)
+    configure_index(Path(cache_dir) / INDEX_SUBDIR if enabled else None, similarity)
+    return ResponseCache(Path(cache_dir)) if enabled else None
+
+
+def setup_warmup(enabled: bool, model: str) -> None:
+    """Warm up the model provider in the background while the questions are answered."""
+    if enabled:
+        from uplan.utils.warmup import start_warmup
+
+        start_warmup(model)
+
+
+def setup_metrics(enabled: bool, metrics_file: str) -> None:
+    """Record telemetry spans of this run to the metrics file if enabled."""
+    configure(Path(metrics_file) if enabled else None)
+
+
+def validate_formats(ctx, param, value: str) -> tuple[str, ...]:
+    """Parse the comma-separated --formats option."""
+    from uplan.utils.formats import parse_formats
+
+    try:
+        return parse_formats(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def validate_review(ctx, param, value: str) -> str:
+    """Check the --review policy name."""
+    try:
+        get_review_policy(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+
+def setup_review(kwargs: dict) -> ReviewPolicy:
+    """
+    Create the review policy of the --review, --open and --headless options.
+
+    Raises:
+        click.BadParameter: If the policy asks the user in a headless run
+    """
+    try:
+        return get_review_policy(
+            kwargs["review"],
+            open_files=kwargs["open"] and not kwargs["headless"],
+            headless=kwargs["headless"],
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--review")
+
+
+def setup_answers(
+    source: str | None,
+    input_folder: Path,
+    template_file: str = "plan.toml",
+    headless: bool = False,
+) -> dict | None:
+    """
+    Load and validate the --answers file, or return None to ask the questions.
+
+    Raises:
+        click.BadParameter: If the answers cannot be read or do not match the
+            template's questions, or are missing in a headless run
+    """
+    if source is None:
+        if headless:
+            raise click.BadParameter(
+                "A headless run needs the answers from a file or stdin", param_hint="--answers"
+            )
+        return None
+
+    from uplan.question import load_answers, validate_answers
+    from uplan.utils.templates import load_template
+
+    try:
+        answers = load_answers(source)
+        questions = load_template(input_folder / template_file).questions
+        if questions is None:
+            raise ValueError(f"{template_file} has no questions")
+        validate_answers(questions, answers)
+    except (OSError, ValueError) as e:
+        raise click.BadParameter(str(e), param_hint="--answers")
+    return answers
+
+
+def print_cache_stats(cache: ResponseCache | None) -> None:
+    """Print hit/miss counters of the response cache."""
+    if cache is not None:
+        print(f"[dim]Cache: {cache.hits} hits, {cache.misses} misses[/dim]")
+
+
+def print_changes(*responses: dict) -> None:
+    """Print the output files whose content changed in this run."""
+    changed = [path for response in responses for path in response.get("changed") or []]
+    if changed:
+        print(f"[dim]Changed: {', '.join(changed)}[/dim]")
+    else:
+        print("[dim]No output files changed[/dim]")
+
+
 def common_options(f):
     """Common click options for all commands."""
     options = [
-        click.option("--model", default="ollama/qwq", help="LLM model to use"),
+        click.option(
+            "--model",
+            default="ollama/qwq",
+            help="LLM model to use; a comma-separated list adds fallback models",
+        ),
+        click.option(
+            "--hedge-after",
+            default=DEFAULT_HEDGE_AFTER,
+            type=float,
+            help="Seconds without a first token before the next model is also asked",
+        ),
         click.option(
             "--retry", default=5, type=int, help="Max retries for LLM requests"
         ),
+        click.option(
+            "--warmup/--no-warmup",
+            default=True,
+            help="Load the model and connect to the provider while questions are answered",
+        ),
         click.option("--category", default="dev", help="Template category"),
         click.option("--input", default="./input", help="Input folder"),
         click.option("--output", default="./output", help="Output folder"),
+        click.option(
+            "--renderer",
+            default="auto",
+            type=click.Choice(["auto", "rich", "plain", "silent"]),
+            help="Streaming output renderer (auto: rich on a terminal, plain otherwise)",
+        ),
+        click.option(
+            "--answers",
+            default=None,
+            help="TOML/JSON file with the answers to the questions ('-' reads stdin)",
+        ),
+        click.option(
+            "--review",
+            default="manual",
+            callback=validate_review,
+            help="Review policy: manual, auto (accept validated documents) or N (accept the N-th)",
+        ),
+        click.option(
+            "--headless",
+            is_flag=True,
+            help="Never ask the user: needs --answers and a review policy that decides alone",
+        ),
+        click.option(
+            "--open/--no-open",
+            default=True,
+            help="Open generated documents when asking for a review",
+        ),
+        click.option(
+            "--parallel-sections",
+            is_flag=True,
+            help="Generate todo sections concurrently",
+        ),
+        click.option(
+            "--formats",
+            default="md,json",
+            callback=validate_formats,
+            help="Comma-separated to-do formats written besides todo.toml (md, json, csv, html)",
+        ),
+        click.option(
+            "--cache/--no-cache", default=True, help="Reuse cached LLM responses"
+        ),
+        click.option(
+            "--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Response cache folder"
+        ),
+        click.option(
+            "--similarity",
+            default=DEFAULT_SIMILARITY,
+            type=click.FloatRange(0, 1, min_open=True),
+            help="Similarity needed to start from an earlier project's documents (1: identical)",
+        ),
+        click.option(
+            "--accept-reused",
+            is_flag=True,
+            help="Accept documents of identical earlier projects without review",
+        ),
+        click.option(
+            "--metrics/--no-metrics", default=True, help="Record telemetry spans"
+        ),
+        click.option(
+            "--metrics-file",
+            default=str(DEFAULT_METRICS_FILE),
+            help="JSONL file telemetry spans are appended to",
+        ),
     ]
     for option in reversed(options):
         f = option(f)
@@ -44,23 +249,45 @@ def common_options(f):
 def cli(ctx, **kwargs):
     """Plan and Todo Manager"""
     if ctx.invoked_subcommand is None:
+        review = setup_review(kwargs)
         # Setup environment and validate model
-        success, message = check_model_support(kwargs["model"])
+        setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+        with span("model_check", model=kwargs["model"]):
+            success, message = check_model_support(kwargs["model"])
         print(message)
         if not success:
             return
 
         setup_env()
+        setup_warmup(kwargs["warmup"], kwargs["model"])
 
         # Setup folders
         input_folder, output_folder = setup_folders(
             kwargs["input"], kwargs["output"], kwargs["category"]
         )
 
+        answers = setup_answers(kwargs["answers"], input_folder, headless=kwargs["headless"])
+        cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+        from uplan.process import get_all
+
         # Run both plan and todo
         plan_response, todo_response = get_all(
-            input_folder, output_folder, kwargs["model"], kwargs["retry"]
+            input_folder,
+            output_folder,
+            kwargs["model"],
+            kwargs["retry"],
+            parallel_sections=kwargs["parallel_sections"],
+            formats=kwargs["formats"],
+            answers=answers,
+            review=review,
+            accept_reused=kwargs["accept_reused"],
+            renderer=kwargs["renderer"],
+            cache=cache,
+            hedge_after=kwargs["hedge_after"],
         )
+        print_cache_stats(cache)
+        print_changes(plan_response, todo_response)
         if plan_response.get("status") in ["exit", "error"]:
             return
         if todo_response.get("status") == "error":
@@ -72,18 +299,43 @@ def cli(ctx, **kwargs):
 @common_options
 def plan(**kwargs):
     """Generate plan only"""
-    success, message = check_model_support(kwargs["model"])
+    review = setup_review(kwargs)
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
     print(message)
     if not success:
         return
 
     setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
 
     input_folder, output_folder = setup_folders(
         kwargs["input"], kwargs["output"], kwargs["category"]
     )
 
-    response = get_plan(input_folder, output_folder, kwargs["model"], kwargs["retry"])
+    answers = setup_answers(kwargs["answers"], input_folder, headless=kwargs["headless"])
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.process import get_plan, journaled_answers
+    from uplan.utils.journal import RunJournal
+
+    journal = RunJournal(output_folder)
+    response = get_plan(
+        input_folder,
+        output_folder,
+        kwargs["model"],
+        kwargs["retry"],
+        journaled_answers(input_folder, journal, answers),
+        reuse_similar=False,
+        review=review,
+        renderer=kwargs["renderer"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+        journal=journal,
+    )
+    print_cache_stats(cache)
+    print_changes(response)
     if response.get("status") in ["exit", "error"]:
         return
 
@@ -92,23 +344,453 @@ def plan(**kwargs):
 @common_options
 def todo(**kwargs):
     """Generate todo only"""
-    success, message = check_model_support(kwargs["model"])
+    review = setup_review(kwargs)
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
     print(message)
     if not success:
         return
 
     setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
 
     input_folder, output_folder = setup_folders(
         kwargs["input"], kwargs["output"], kwargs["category"]
     )
 
-    response = get_todo(input_folder, output_folder, kwargs["model"], kwargs["retry"])
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.process import get_todo, prepare_todo
+    from uplan.utils.journal import RunJournal
+
+    journal = RunJournal(output_folder)
+    journal.restore("plan", output_folder / "plan.toml")
+    try:
+        todo = prepare_todo(input_folder, output_folder)
+    except RuntimeError:
+        print("[red]No plan found. Run `uplan plan` first.[/red]")
+        return
+
+    response = get_todo(
+        input_folder,
+        output_folder,
+        kwargs["model"],
+        kwargs["retry"],
+        todo,
+        parallel_sections=kwargs["parallel_sections"],
+        formats=kwargs["formats"],
+        reuse_similar=False,
+        review=review,
+        renderer=kwargs["renderer"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+        journal=journal,
+    )
+    print_cache_stats(cache)
+    print_changes(response)
     if response.get("status") == "error":
         print("[red]Failed to process todo[/red]")
         return
 
 
+@cli.command()
+@common_options
+def resume(**kwargs):
+    """Continue the last run from its journal"""
+    review = setup_review(kwargs)
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
+    print(message)
+    if not success:
+        return
+
+    setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
+
+    input_folder, output_folder = setup_folders(
+        kwargs["input"], kwargs["output"], kwargs["category"]
+    )
+
+    from uplan.utils.journal import RunJournal
+
+    # Headless runs need --answers only if the journal has no answers
+    recorded = RunJournal(output_folder).answers is not None
+    answers = setup_answers(
+        kwargs["answers"], input_folder, headless=kwargs["headless"] and not recorded
+    )
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.process import get_all
+
+    plan_response, todo_response = get_all(
+        input_folder,
+        output_folder,
+        kwargs["model"],
+        kwargs["retry"],
+        parallel_sections=kwargs["parallel_sections"],
+        resume=True,
+        formats=kwargs["formats"],
+        answers=answers,
+        review=review,
+        accept_reused=kwargs["accept_reused"],
+        renderer=kwargs["renderer"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+    )
+    print_cache_stats(cache)
+    print_changes(plan_response, todo_response)
+    if plan_response.get("status") in ["exit", "error"]:
+        return
+    if todo_response.get("status") == "error":
+        print("[red]Failed to complete the process[/red]")
+        return
+
+
+@cli.command()
+@common_options
+def update(**kwargs):
+    """Regenerate only the sections affected by changed answers or plan edits"""
+    review = setup_review(kwargs)
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
+    print(message)
+    if not success:
+        return
+
+    setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
+
+    input_folder, output_folder = setup_folders(
+        kwargs["input"], kwargs["output"], kwargs["category"]
+    )
+
+    answers = setup_answers(kwargs["answers"], input_folder, headless=kwargs["headless"])
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.process import get_all
+
+    plan_response, todo_response = get_all(
+        input_folder,
+        output_folder,
+        kwargs["model"],
+        kwargs["retry"],
+        parallel_sections=kwargs["parallel_sections"],
+        incremental=True,
+        formats=kwargs["formats"],
+        answers=answers,
+        review=review,
+        accept_reused=kwargs["accept_reused"],
+        renderer=kwargs["renderer"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+    )
+    print_cache_stats(cache)
+    print_changes(plan_response, todo_response)
+    if plan_response.get("status") in ["exit", "error"]:
+        return
+    if todo_response.get("status") == "error":
+        print("[red]Failed to complete the process[/red]")
+        return
+
+
+@cli.command()
+@click.argument(
+    "answers_dir", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.option(
+    "--concurrency", default=4, type=int, help="Max projects processed at once"
+)
+@common_options
+def batch(answers_dir, concurrency, **kwargs):
+    """Generate plan and todo for every answer file in a folder"""
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
+    print(message)
+    if not success:
+        return
+
+    setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
+
+    input_folder, output_folder = setup_folders(
+        kwargs["input"], kwargs["output"], kwargs["category"]
+    )
+
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.process import batch as run_batch
+
+    results = run_batch(
+        input_folder,
+        answers_dir,
+        output_folder,
+        kwargs["model"],
+        kwargs["retry"],
+        concurrency,
+        parallel_sections=kwargs["parallel_sections"],
+        formats=kwargs["formats"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+    )
+    print_cache_stats(cache)
+    print_changes(*(response for responses in results.values() for response in responses))
+    failed = {
+        name: plan_response.get("message") or todo_response.get("message")
+        for name, (plan_response, todo_response) in results.items()
+        if todo_response.get("status") != "success"
+    }
+    print(f"Processed {len(results) - len(failed)}/{len(results)} projects")
+    for name, message in failed.items():
+        print(f"[red]Failed: {name}{f' ({message})' if message else ''}[/red]")
+
+
+@cli.command()
+@common_options
+def pipeline(**kwargs):
+    """Run every stage of pipeline.toml, independent stages in parallel"""
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
+    print(message)
+    if not success:
+        return
+
+    setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
+
+    input_folder, output_folder = setup_folders(
+        kwargs["input"], kwargs["output"], kwargs["category"]
+    )
+
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.pipeline import load_pipeline
+    from uplan.process import prepare_answers_cli, run_pipeline
+
+    stages = load_pipeline(input_folder)
+    questions = [stage for stage in stages.values() if stage["questions"]]
+    answers_data = (
+        prepare_answers_cli(
+            input_folder,
+            setup_answers(
+                kwargs["answers"],
+                input_folder,
+                questions[0]["template"],
+                headless=kwargs["headless"],
+            ),
+            template_file=questions[0]["template"],
+        )
+        if questions
+        else None
+    )
+
+    results = run_pipeline(
+        input_folder,
+        output_folder,
+        kwargs["model"],
+        kwargs["retry"],
+        stages,
+        answers_data,
+        parallel_sections=kwargs["parallel_sections"],
+        formats=kwargs["formats"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+    )
+    print_cache_stats(cache)
+    for name, response in results.items():
+        status = response.get("status")
+        color = "green" if status == "success" else "red"
+        print(f"[{color}]{name}: {status}[/{color}]")
+    print_changes(*results.values())
+
+
+@cli.command()
+@click.option("--port", default=DEFAULT_PORT, type=int, help="Port on 127.0.0.1")
+@click.option("--socket", "socket_path", default=None, help="Listen on a Unix socket instead")
+@click.option(
+    "--workers", default=DEFAULT_WORKERS, type=int, help="Max jobs processed at once"
+)
+@common_options
+def serve(port, socket_path, workers, **kwargs):
+    """Keep a warm generation server running for `uplan submit`"""
+    setup_metrics(kwargs["metrics"], kwargs["metrics_file"])
+    with span("model_check", model=kwargs["model"]):
+        success, message = check_model_support(kwargs["model"])
+    print(message)
+    if not success:
+        return
+
+    setup_env()
+    setup_warmup(kwargs["warmup"], kwargs["model"])
+
+    # Make sure the default category exists
+    setup_folders(kwargs["input"], kwargs["output"], kwargs["category"])
+
+    cache = setup_cache(kwargs["cache"], kwargs["cache_dir"], kwargs["similarity"])
+
+    from uplan.server import PlanServer, serve as run_server
+
+    server = PlanServer(
+        Path(kwargs["input"]),
+        Path(kwargs["output"]),
+        kwargs["model"],
+        kwargs["retry"],
+        workers,
+        parallel_sections=kwargs["parallel_sections"],
+        formats=kwargs["formats"],
+        cache=cache,
+        hedge_after=kwargs["hedge_after"],
+    )
+    print(f"Serving on {socket_path or f'127.0.0.1:{port}'} with {workers} workers")
+    try:
+        run_server(server, port=port, socket_path=socket_path)
+    except KeyboardInterrupt:
+        print_cache_stats(cache)
+
+
+@cli.command()
+@click.argument(
+    "answers_file", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.option("--category", default="dev", help="Template category")
+@click.option("--model", default=None, help="LLM model to use (default: the server's)")
+@click.option("--name", default=None, help="Output folder name (default: random)")
+@click.option("--port", default=DEFAULT_PORT, type=int, help="Server port on 127.0.0.1")
+@click.option("--socket", "socket_path", default=None, help="Server Unix socket")
+def submit(answers_file, category, model, name, port, socket_path):
+    """Send an answer file to a running `uplan serve`"""
+    from uplan.question import load_answers
+    from uplan.server import submit as submit_job
+
+    request = {
+        "action": "run",
+        "category": category,
+        "answers": load_answers(answers_file),
+        "model": model,
+        "name": name,
+    }
+    try:
+        for event in submit_job(request, port=port, socket_path=socket_path):
+            kind = event["event"]
+            if kind == "stage":
+                status = event["status"]
+                color = {"success": "green", "running": "blue"}.get(status, "red")
+                print(f"[{color}]{event['stage']}: {status}[/{color}]")
+            elif kind == "done":
+                print(f"Documents saved to {event['output_folder']}")
+                print_changes(event)
+            elif kind == "error":
+                print(f"[red]{event['message']}[/red]")
+            else:
+                print(f"[dim]{event['job']}: {kind}[/dim]")
+    except (ConnectionRefusedError, FileNotFoundError):
+        print("[red]No server is running. Start one with `uplan serve`.[/red]")
+
+
+@cli.command(name="prompt-stats")
+@common_options
+def prompt_stats(**kwargs):
+    """Compare prompt token counts of each format"""
+    input_folder, output_folder = setup_folders(
+        kwargs["input"], kwargs["output"], kwargs["category"]
+    )
+
+    from rich.table import Table
+
+    from uplan.process import prompt_stats as count_prompt_tokens
+
+    stats = count_prompt_tokens(input_folder, output_folder, kwargs["model"])
+
+    table = Table(title=f"Prompt tokens ({kwargs['model']})")
+    table.add_column("Format")
+    for name in stats:
+        table.add_column(name.capitalize(), justify="right")
+    for format in next(iter(stats.values())):
+        row = [stats[name][format] for name in stats]
+        cheapest = [min(stats[name].values()) == count for name, count in zip(stats, row)]
+        table.add_row(
+            format,
+            *(f"[green]{count}[/green]" if best else str(count) for count, best in zip(row, cheapest)),
+        )
+    print(table)
+    print('[dim]Set \\[prompt] format = "..." in the template to choose a format.[/dim]')
+
+
+@cli.command()
+@click.option(
+    "--metrics-file",
+    default=str(DEFAULT_METRICS_FILE),
+    help="JSONL file telemetry spans were recorded to",
+)
+def stats(metrics_file):
+    """Summarize recorded telemetry per model and stage"""
+    from rich.table import Table
+
+    from uplan.utils.telemetry import load_spans, summarize
+
+    spans = load_spans(Path(metrics_file))
+    if not spans:
+        print(f"[yellow]No telemetry recorded in {metrics_file}[/yellow]")
+        return
+    summary = summarize(spans)
+
+    def seconds(value: float | None) -> str:
+        return "-" if value is None else f"{value:.2f}s"
+
+    def rate(value: float | None) -> str:
+        return "-" if value is None else f"{value:.1f}"
+
+    table = Table(title=f"Requests ({len({record.get('run') for record in spans})} runs)")
+    for column in ("Model", "Stage"):
+        table.add_column(column)
+    for column in (
+        "Requests",
+        "Errors",
+        "Retries",
+        "Duration p50",
+        "Duration p95",
+        "TTFT p50",
+        "TTFT p95",
+        "Tokens/s p50",
+        "Tokens/s p95",
+        "Cost",
+    ):
+        table.add_column(column, justify="right")
+    for (model, stage), row in sorted(summary["requests"].items(), key=str):
+        table.add_row(
+            str(model),
+            str(stage),
+            str(row["count"]),
+            str(row["errors"]),
+            str(row["retries"]),
+            seconds(row["duration"]["p50"]),
+            seconds(row["duration"]["p95"]),
+            seconds(row["ttft"]["p50"]),
+            seconds(row["ttft"]["p95"]),
+            rate(row["tokens_per_sec"]["p50"]),
+            rate(row["tokens_per_sec"]["p95"]),
+            f"${row['cost']:.4f}",
+        )
+    print(table)
+
+    table = Table(title="Other spans")
+    table.add_column("Span")
+    for column in ("Count", "Duration p50", "Duration p95"):
+        table.add_column(column, justify="right")
+    for name, row in sorted(summary["spans"].items(), key=str):
+        table.add_row(
+            str(name),
+            str(row["count"]),
+            seconds(row["duration"]["p50"]),
+            seconds(row["duration"]["p95"]),
+        )
+    print(table)
+
+
 @cli.command()
 @click.argument("template", default="dev")
 @click.option("--force", is_flag=True, help="Force overwrite")
@@ -1,5 +1,5 @@
 from typing import List, Dict
-from pydantic import BaseModel, RootModel
+from pydantic import BaseModel, RootModel, model_validator
 
 
 class Category(BaseModel):
@@ -14,3 +14,17 @@ class TodoItem(BaseModel):
 
 class TodoModel(RootModel[Dict[str, TodoItem]]):
     pass
+
+
+def todo_section_model(section: str) -> type[TodoModel]:
+    """TodoModel for the response to a single section, which must contain that section."""
+
+    class TodoSectionModel(TodoModel):
+        @model_validator(mode="after")
+        def check_section(self):
+            if section not in self.root:
+                found = ", ".join(self.root) or "none"
+                raise ValueError(f"Expected the section '{section}', got: {found}")
+            return self
+
+    return TodoSectionModel
@@ -0,0 +1,124 @@
+"""
+Module for loading the stage graph declared in a template folder's pipeline.toml.
+"""
+
+import tomllib
+from pathlib import Path
+
+PIPELINE_FILE = "pipeline.toml"
+
+# Used when a template folder has no pipeline.toml
+DEFAULT_PIPELINE = {
+    "plan": {"questions": True},
+    "todo": {"depends_on": ["plan"], "validate": "todo"},
+}
+
+VALIDATORS = ("todo",)
+
+
+def normalize_stage(name: str, spec: dict) -> dict:
+    """
+    Fill in the defaults of one [stage.<name>] table.
+
+    Keys:
+        template: Template file in the input folder (default "<name>.toml")
+        depends_on: Stages whose documents are added to the prompt under
+            their stage name (default [])
+        questions: Ask the template's questions and use the answers as the
+            prompt, like plan.toml (default false)
+        validate: Schema the response must match; "todo" also writes the
+            Markdown and JSON checklists (default none)
+    """
+    return {
+        "template": spec.get("template", f"{name}.toml"),
+        "depends_on": list(spec.get("depends_on", [])),
+        "questions": bool(spec.get("questions", False)),
+        "validate": spec.get("validate"),
+    }
+
+
+def topological_order(stages: dict[str, dict]) -> list[str]:
+    """
+    Order stages so that every stage comes after its dependencies.
+
+    Raises:
+        ValueError: If a dependency is unknown or the stages form a cycle
+    """
+    for name, stage in stages.items():
+        unknown = [dep for dep in stage["depends_on"] if dep not in stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {', '.join(unknown)}")
+
+    order = []
+    remaining = dict(stages)
+    while remaining:
+        ready = [
+            name
+            for name, stage in remaining.items()
+            if all(dep in order for dep in stage["depends_on"])
+        ]
+        if not ready:
+            raise ValueError(f"Pipeline has a dependency cycle: {', '.join(remaining)}")
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+    return order
+
+
+def validate_pipeline(stages: dict[str, dict]) -> None:
+    """
+    Check a normalized pipeline.
+
+    Raises:
+        ValueError: If the pipeline is empty, has an unknown validator, more
+            than one questions stage, unknown dependencies or a cycle
+    """
+    if not stages:
+        raise ValueError("Pipeline has no stages")
+
+    for name, stage in stages.items():
+        if stage["validate"] is not None and stage["validate"] not in VALIDATORS:
+            raise ValueError(
+                f"Stage '{name}' has unknown validate '{stage['validate']}'."
+                f" Choose from: {', '.join(VALIDATORS)}"
+            )
+
+    questions = [name for name, stage in stages.items() if stage["questions"]]
+    if len(questions) > 1:
+        raise ValueError(f"Only one stage can ask questions: {', '.join(questions)}")
+
+    topological_order(stages)
+
+
+def load_pipeline(input_folder: Path) -> dict[str, dict]:
+    """
+    Load the stages of a template folder.
+
+    Stages are read from ``[stage.<name>]`` tables of pipeline.toml. Without
+    the file, the plan-then-todo pipeline is used.
+
+    Returns:
+        dict: Mapping of stage name to normalized stage
+
+    Raises:
+        ValueError: If the pipeline is invalid
+    """
+    path = Path(input_folder) / PIPELINE_FILE
+    if path.exists():
+        with open(path, "rb") as f:
+            specs = tomllib.load(f).get("stage", {})
+    else:
+        specs = DEFAULT_PIPELINE
+
+    stages = {name: normalize_stage(name, spec) for name, spec in specs.items()}
+    validate_pipeline(stages)
+    return stages
+
+
+def stage_model(stage: dict):
+    """Return the pydantic model a stage is validated with, or None."""
+    if stage["validate"] == "todo":
+        from uplan.models.todo import TodoModel
+
+        return TodoModel
+    return None
@@ -2,7 +2,10 @@
 Module for processing and generating development plans and to-do lists using LLMs.
 """
 
+import asyncio
 import json
+import time
+from functools import partial
 from pathlib import Path
 
 import litellm
@@ -10,16 +13,295 @@ import tomli_w
 import tomllib
 from rich import print
 
-from uplan.models.todo import TodoModel
-from uplan.question import collect_answers_cli, select_option
-from uplan.utils.data import add_completed_status, toml_to_markdown
+from uplan.models.todo import TodoModel, todo_section_model
+from uplan.question import (
+    ANSWER_FILE_SUFFIXES,
+    apply_answers,
+    collect_answers_cli,
+    load_answers,
+    select_option,
+    select_sections,
+    validate_answers,
+)
+from uplan.utils.cache import ResponseCache
 from uplan.utils.display import (
+    collect_streaming_async,
     display_json_panel,
     display_streaming,
     display_text_panel,
 )
-from uplan.utils.file import open_file
-from uplan.utils.text import dict_to_xml, extract_code_block, optimize_for_prompt
+from uplan.utils.file import file_digest, open_file, write_file_atomic
+from uplan.utils.formats import DEFAULT_FORMATS, write_todo
+from uplan.utils.hedge import DEFAULT_HEDGE_AFTER, hedge, parse_models
+from uplan.utils.index import find_similar, index_document, template_hash
+from uplan.utils.journal import RunJournal, content_hash
+from uplan.utils.messages import build_messages, format_usage, messages_text, usage_summary
+from uplan.utils.renderers import get_renderer
+from uplan.utils.review import ReviewPolicy, get_review_policy
+from uplan.utils.retry import backoff_delay, build_repair_prompt, classify_error
+from uplan.utils.stream_parser import StreamValidationError, StreamingJSONValidator
+from uplan.utils.serializers import SERIALIZERS, serialize_prompt
+from uplan.utils.telemetry import StreamTimer, span, usage_attrs
+from uplan.utils.templates import load_template
+from uplan.utils.text import FenceScanner, compact_prompt, scan_code_blocks
+from uplan.utils.tokens import count_tokens, fit_prompt
+
+
+def parse_response(
+    text: str, validate_model: object = None, scanner: FenceScanner = None
+) -> dict:
+    """
+    Extract the JSON code block from a model response and validate it.
+
+    The last JSON block that parses is used, so example blocks before the
+    answer or in reasoning sections are ignored.
+
+    Args:
+        text: Full text of the model response
+        validate_model: Optional pydantic model used to validate the parsed data
+        scanner: Scanner already fed with the streamed text (e.g. the stream's
+            StreamingJSONValidator), so the text is not scanned again
+
+    Returns:
+        dict: Parsed JSON data
+
+    Raises:
+        json.JSONDecodeError: If the extracted block is not valid JSON
+        pydantic.ValidationError: If the data does not match validate_model
+    """
+    with span("extract"):
+        if scanner is None:
+            scanner = scan_code_blocks(text)
+        found = scanner.json_block()
+        if found is not None:
+            json_block = found[1]
+        elif scanner.blocks:
+            # Raises the parse error reported in the repair prompt
+            json_block = json.loads(scanner.blocks[-1].content)
+        else:
+            raise ValueError("No code block found in response")
+
+    if validate_model:
+        with span("validate", model=validate_model.__name__):
+            validate_model.model_validate(json_block)
+
+    return json_block
+
+
+def write_toml(output_file: str, data: dict) -> bool:
+    """
+    Atomically write data to a TOML file, creating parent folders if necessary.
+
+    The file is left untouched when it already holds the same content.
+
+    Returns:
+        bool: Whether the file changed
+    """
+    with span("write", file=Path(output_file).name) as attrs:
+        attrs["changed"] = write_file_atomic(
+            Path(output_file), tomli_w.dumps(data).encode("utf-8")
+        )
+    return attrs["changed"]
+
+
+def write_todo_outputs(
+    output_folder: Path, json_block: dict, formats: tuple[str, ...] = DEFAULT_FORMATS
+) -> list[str]:
+    """
+    Write a to-do list in the given formats, e.g. todo.md and todo.json.
+
+    todo.toml is not one of them: the to-do stage writes it before review, so
+    edits made while reviewing are kept.
+
+    Returns:
+        list[str]: The files whose content changed
+    """
+    with span("write", file="todo", formats=",".join(formats)) as attrs:
+        changed = [str(path) for path in write_todo(json_block, output_folder, formats)]
+        attrs["changed"] = len(changed)
+    return changed
+
+
+def review_document(output_file: str, open_document: bool = True) -> str:
+    """Open a generated document and ask the user to accept, regenerate or exit."""
+    if open_document:
+        open_file(output_file)
+
+    answer = select_option(
+        text="Please review the generated document [dim]\n- Complete: Enter or Y \n- Regenerate: R \n- Exit: X[dim]",
+        choices=["y", "r", "x"],
+    )
+    return answer.lower()
+
+
+def review_stage(output_file: str, stage: str, review: ReviewPolicy, round: int) -> str:
+    """
+    Decide on a generated document with a review policy.
+
+    The user is only asked when the policy leaves the decision to them.
+
+    Returns:
+        str: "y" to accept, "r" to regenerate or "x" to exit
+    """
+    with span("review", stage=stage, round=round) as attrs:
+        answer = review.decide(round)
+        attrs["automatic"] = answer is not None
+        if answer is None:
+            answer = review_document(output_file, open_document=review.open_files)
+        else:
+            display_text_panel(text=f"Accepted {output_file} automatically.")
+    return answer
+
+
+def build_request(prompt: dict, model: str) -> list[dict]:
+    """Compact a prompt dictionary and build the chat messages sent to the model."""
+    return build_messages(compact_prompt(prompt), model)
+
+
+def fit_request(prompt: dict, model: str) -> tuple[list[dict], int, int | None]:
+    """
+    Build the chat messages of a prompt within the model's context window.
+
+    Returns:
+        tuple: (messages, prompt tokens, input budget or None), see fit_prompt()
+
+    Raises:
+        ContextWindowError: If the prompt cannot be trimmed below the budget
+    """
+    return fit_prompt(prompt, model, partial(build_request, model=model))
+
+
+def build_regeneration_prompt(
+    prompt: dict, document: dict, keys: list[str], draft: bool = False
+) -> dict:
+    """
+    Build a prompt that regenerates only some top-level keys of a document.
+
+    The remaining sections are passed as fixed <accepted> context, and the
+    template is narrowed to the requested keys when it contains them.
+
+    Args:
+        prompt: Original prompt dictionary
+        document: Previously generated document
+        keys: Top-level keys to regenerate
+        draft: Pass the previous version of the keys as a <draft> to edit
+
+    Returns:
+        dict: Prompt dictionary for the partial request
+    """
+    request = dict(prompt)
+    template = prompt.get("template")
+    if isinstance(template, dict) and all(key in template for key in keys):
+        request["template"] = {key: template[key] for key in keys}
+
+    request["accepted"] = {
+        key: value for key, value in document.items() if key not in keys
+    }
+    request["regenerate"] = [
+        f"Only output these top-level keys: {', '.join(keys)}.",
+        "<accepted> is final. Keep the output consistent with it and do not repeat it.",
+    ]
+    if draft:
+        request["draft"] = {key: document[key] for key in keys if key in document}
+        request["regenerate"].append(
+            "<draft> was written for a similar input. "
+            "Edit it to fit the input instead of starting over."
+        )
+    return request
+
+
+def splice_sections(document: dict, regenerated: dict, keys: list[str]) -> dict:
+    """
+    Replace the given top-level keys of a document, keeping its key order.
+
+    Raises:
+        ValueError: If a requested key is missing from the regenerated data
+    """
+    missing = [key for key in keys if key not in regenerated]
+    if missing:
+        raise ValueError(f"Regenerated response is missing sections: {', '.join(missing)}")
+
+    return {
+        key: regenerated[key] if key in keys else value
+        for key, value in document.items()
+    }
+
+
+def changed_sections(previous: dict, current: dict) -> list[str]:
+    """Top-level keys that were added, removed or changed, in the order of current."""
+    keys = list(current) + [key for key in previous if key not in current]
+    return [
+        key
+        for key in keys
+        if key not in previous or key not in current or previous[key] != current[key]
+    ]
+
+
+async def request_hedged(
+    models: list[str],
+    prompt: dict,
+    messages: list[dict],
+    validate_model: object = None,
+    hedge_after: float = DEFAULT_HEDGE_AFTER,
+    on_chunk=None,
+    stage: str = None,
+    **litellm_kwargs,
+) -> tuple[str, str, dict]:
+    """
+    Request one response from an ordered list of models.
+
+    The next model is asked as well when no first token arrived within
+    hedge_after seconds, or right away when a model fails. The first response
+    that passes validation wins and the other requests are cancelled.
+
+    Args:
+        models: Models in order of preference
+        prompt: Prompt dictionary, used to build messages for later models
+        messages: Messages for the first model
+        validate_model: Pydantic model the response must match
+        hedge_after: Deadline for the first token, in seconds
+        on_chunk: Optional callback receiving (model, content delta)
+        stage: Stage name recorded on the telemetry spans of the attempts
+        **litellm_kwargs: Additional arguments for litellm
+
+    Returns:
+        tuple[str, str, dict]: (winning model, response text, usage)
+    """
+
+    async def attempt(model: str, first_token: asyncio.Event) -> tuple[str, dict]:
+        validator = StreamingJSONValidator(validate_model)
+        timer = StreamTimer()
+        usage = {}
+
+        def feed(content: str) -> None:
+            first_token.set()
+            if on_chunk:
+                on_chunk(model, content)
+            validator.feed(content)
+
+        try:
+            with span("hedge", stage=stage, model=model) as attrs:
+                response = await litellm.acompletion(
+                    model=model,
+                    messages=messages if model == models[0] else fit_request(prompt, model)[0],
+                    stream=True,
+                    **litellm_kwargs,
+                )
+                text = await collect_streaming_async(
+                    response,
+                    on_chunk=timer.wrap(feed),
+                    on_usage=lambda u: usage.update(usage_summary(u)),
+                )
+                attrs.update(timer.attrs(usage.get("completion_tokens")))
+                attrs.update(usage_attrs(model, usage))
+                parse_response(text, validate_model, validator)
+        except Exception as e:
+            print(f"[yellow]{model}: {e}[/yellow]")
+            raise
+        return text, usage
+
+    model, (text, usage) = await hedge(models, attempt, hedge_after)
+    return model, text, usage
 
 
 def run(
@@ -32,60 +314,227 @@ def run(
     model: str = None,
     stream: bool = True,
     debug: bool = False,
+    cache: ResponseCache = None,
+    renderer: str = "auto",
+    journal: RunJournal = None,
+    hedge_after: float = DEFAULT_HEDGE_AFTER,
+    review: str | ReviewPolicy = "manual",
+    document: dict = None,
+    regenerate_keys: list[str] = None,
     **litellm_kwargs,
 ) -> dict:
+    """
+    Request, validate and review one document.
+
+    With document and regenerate_keys, only those top-level keys of the
+    previous document are requested and the others are kept as they are.
+    """
     display_json_panel(prompt, title=prompt_title, border_style="green")
+    review = get_review_policy(review) if isinstance(review, str) else review
+    reviews = 0
 
-    optimized_prompt = dict_to_xml(prompt)
-    optimized_prompt = optimize_for_prompt(optimized_prompt)
+    # Journal entries are keyed by the output file name, e.g. "plan"
+    stage = Path(output_file).stem
+    # Compared with the accepted document to report whether it changed
+    previous_digest = file_digest(output_file)
+
+    # Several comma-separated models are hedged; the first one is preferred
+    models = parse_models(model)
+    messages, prompt_tokens, budget = fit_request(prompt, models[0])
+    print(
+        f"[dim]Prompt size: {prompt_tokens} tokens"
+        f"{f' of {budget} available' if budget else ''}[/dim]"
+    )
 
     if debug:
-        display_text_panel(optimized_prompt, title=prompt_title, border_style="green")
+        display_text_panel(messages_text(messages), title=prompt_title, border_style="green")
+
+    if stream:
+        litellm_kwargs = {"stream_options": {"include_usage": True}, **litellm_kwargs}
+
+    # Set when only some sections are regenerated
+    request_prompt, request_messages = prompt, messages
+    if regenerate_keys:
+        display_text_panel(text=f"Regenerating sections: {', '.join(regenerate_keys)}.")
+        request_prompt = build_regeneration_prompt(
+            prompt, document, regenerate_keys, draft=True
+        )
+        request_messages = fit_request(request_prompt, models[0])[0]
+
+    # Set after a parse/validation failure to ask for a fix instead of a rerun
+    repair_prompt = None
 
     for attempt in range(1, max_retries + 1):
+        cache_key = cache.make_key(model, request_messages, **litellm_kwargs) if cache else None
+        prompt_hash = content_hash(request_messages) if journal else None
+        journaled = (
+            journal.response(stage, prompt_hash) if journal and not repair_prompt else None
+        )
+        cached = (
+            cache.get(cache_key) if cache_key and not repair_prompt and not journaled else None
+        )
+        text = None
+        validator = None
+        usage = {}
         try:
-            response = litellm.completion(
-                model=model,
-                messages=[{"content": optimized_prompt, "role": "user"}],
-                stream=stream,
-                **litellm_kwargs,
-            )
+            with span("request", stage=stage, model=models[0], attempt=attempt) as attrs:
+                timer = StreamTimer()
+                if journaled:
+                    display_text_panel(text="Resuming journaled response.")
+                    attrs["source"] = "journal"
+                    text = journaled
+                elif cached:
+                    display_text_panel(text="Using cached response.")
+                    attrs["source"] = "cache"
+                    text = cached["text"]
+                elif len(models) > 1 and not repair_prompt:
+                    # Only the first model to send a token is rendered
+                    leader = []
+                    stream_renderer = (
+                        get_renderer(renderer) if isinstance(renderer, str) else renderer
+                    )
+                    write = timer.wrap(stream_renderer.write)
 
-            text = display_streaming(response)
-            dict_block = extract_code_block(text)
-            json_block = json.loads(dict_block)
+                    def show(model_name: str, content: str) -> None:
+                        if not leader:
+                            leader.append(model_name)
+                        if model_name == leader[0]:
+                            write(content)
 
-            if validate_model:
-                validate_model.model_validate(json_block)
+                    with stream_renderer:
+                        winner, text, usage = asyncio.run(
+                            request_hedged(
+                                models,
+                                request_prompt,
+                                request_messages,
+                                None if regenerate_keys else validate_model,
+                                hedge_after,
+                                on_chunk=show,
+                                stage=stage,
+                                **litellm_kwargs,
+                            )
+                        )
+                    attrs["model"] = winner
+                    if winner != models[0]:
+                        display_text_panel(text=f"Using the response of {winner}.")
+                    if usage:
+                        print(f"[dim]{format_usage(usage)}[/dim]")
+                else:
+                    response = litellm.completion(
+                        model=models[0],
+                        messages=(
+                            [{"content": repair_prompt, "role": "user"}]
+                            if repair_prompt
+                            else request_messages
+                        ),
+                        stream=stream,
+                        **litellm_kwargs,
+                    )
+                    validator = StreamingJSONValidator(validate_model)
+                    text = display_streaming(
+                        response,
+                        on_chunk=timer.wrap(validator.feed),
+                        renderer=renderer,
+                        on_usage=lambda u: usage.update(usage_summary(u)),
+                    )
+                    if usage:
+                        print(f"[dim]{format_usage(usage)}[/dim]")
+                attrs.update(timer.attrs(usage.get("completion_tokens")))
+                attrs.update(usage_attrs(attrs["model"], usage))
+
+                if regenerate_keys:
+                    regenerated = parse_response(text, scanner=validator)
+                    json_block = splice_sections(document, regenerated, regenerate_keys)
+                    if validate_model:
+                        with span("validate", model=validate_model.__name__):
+                            validate_model.model_validate(json_block)
+                else:
+                    json_block = parse_response(text, validate_model, validator)
+            if cache_key and not cached:
+                cache.set(cache_key, text, json_block)
+            if journal and not journaled:
+                journal.record_response(stage, prompt_hash, text)
 
             # display_json_panel(json_block, title=extracted_title, border_style="green")
 
-            Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-            with open(output_file, "wb") as f:
-                tomli_w.dump(json_block, f)
+            write_toml(output_file, json_block)
 
-            open_file(output_file)
+            reviews += 1
+            answer = review_stage(output_file, stage, review, reviews)
 
-            answer = select_option(
-                text="Please review the generated document [dim]\n- Complete: Enter or Y \n- Regenerate: R \n- Exit: X[dim]",
-                choices=["y", "r", "x"],
-            )
+            repair_prompt = None
+            if answer == "r":
+                if cache_key:
+                    cache.delete(cache_key)
+                if journal:
+                    journal.discard_response(stage)
 
-            if answer.lower() == "r":
-                display_text_panel(text="Regenerating document. Retrying...")
+                keys = select_sections(list(json_block))
+                if len(keys) == len(json_block):
+                    display_text_panel(text="Regenerating document. Retrying...")
+                    request_prompt, request_messages = prompt, messages
+                    document, regenerate_keys = None, None
+                else:
+                    display_text_panel(
+                        text=f"Regenerating sections: {', '.join(keys)}. Retrying..."
+                    )
+                    document, regenerate_keys = json_block, keys
+                    request_prompt = build_regeneration_prompt(prompt, document, keys)
+                    request_messages = fit_request(request_prompt, models[0])[0]
                 continue
-            elif answer.lower() == "x":
+            elif answer == "x":
                 display_text_panel(text="Exiting process.")
 
                 return {"status": "exit", "data": None, "output_file": output_file}
 
-            return {"status": "success", "data": json_block, "output_file": output_file}
-        except json.JSONDecodeError as je:
-            display_text_panel(text=f"Invalid JSON format: {je}")
+            if journal:
+                journal.record_accepted(stage, json_block, prompt)
+            return {
+                "status": "success",
+                "data": json_block,
+                "output_file": output_file,
+                "usage": usage or None,
+                "changed": [output_file] if file_digest(output_file) != previous_digest else [],
+            }
         except Exception as e:
-            display_text_panel(text=f"Error processing response: {e}")
+            error = e
+            if isinstance(e, json.JSONDecodeError):
+                display_text_panel(text=f"Invalid JSON format: {e}")
+            elif isinstance(e, StreamValidationError):
+                display_text_panel(text=f"Stream aborted, invalid response: {e}")
+            else:
+                display_text_panel(text=f"Error processing response: {e}")
+        if cached:
+            cache.delete(cache_key)
+        if journaled:
+            journal.discard_response(stage)
+
+        kind = classify_error(error)
+        if kind == "fatal":
+            raise error
+        # An aborted stream only holds the failed block; one that did not
+        # close is a fragment, so it is regenerated instead of repaired
+        fragment = isinstance(error, StreamValidationError) and (
+            validator is None or not validator.closed
+        )
+        if text is None and validator is not None:
+            text = f"```json\n{validator.block}\n```"
+        repair_prompt = (
+            build_repair_prompt(text, error, prompt)
+            if kind == "parse" and not fragment
+            else None
+        )
         if attempt < max_retries:
-            display_text_panel(text=f"Retrying ({attempt}/{max_retries})...")
+            if kind == "transport":
+                delay = backoff_delay(attempt)
+                display_text_panel(
+                    text=f"Retrying in {delay:.1f}s ({attempt}/{max_retries})..."
+                )
+                time.sleep(delay)
+            elif repair_prompt:
+                display_text_panel(text=f"Requesting a repair ({attempt}/{max_retries})...")
+            else:
+                display_text_panel(text=f"Retrying ({attempt}/{max_retries})...")
 
     display_text_panel(text=f"Failed to process response after {max_retries} attempts.")
     raise Exception("Max retries exceeded")
@@ -97,17 +546,25 @@ def get_plan(
     model: str,
     retry: int,
     answers_data: dict,
+    reuse_similar: bool = True,
+    accept_reused: bool = False,
     **litellm_kwargs,
 ) -> dict:
     """
     Execute plan generation process.
 
+    With reuse_similar, the plan of an identical earlier project is reused and
+    that of a similar one is used as a draft (see warm_start()). A reused plan
+    is reviewed like a generated one unless accept_reused is set.
+
     Args:
         input_folder: Path to input folder containing plan.toml
         output_folder: Path where generated plan will be saved
         model: Name of the LLM model to use
         retry: Number of retry attempts
         answers: Pre-collected answers (for non-CLI usage)
+        reuse_similar: Start from indexed plans of earlier projects
+        accept_reused: Accept the plan of an identical earlier project without review
         **litellm_kwargs: Additional arguments for litellm
 
     Returns:
@@ -115,15 +572,36 @@ def get_plan(
     """
 
     try:
+        output_file = str(output_folder / "plan.toml")
+        regenerate = {}
+        # Unless only some sections are regenerated, start from similar earlier plans
+        if reuse_similar and "regenerate_keys" not in litellm_kwargs:
+            plan, regenerate = warm_start("plan", answers_data, "user_input")
+            if plan is not None:
+                response = reuse_document(
+                    output_file,
+                    plan,
+                    answers_data,
+                    litellm_kwargs.get("journal"),
+                    None if accept_reused else litellm_kwargs.get("review", "manual"),
+                )
+                if response is not None:
+                    return response
+                # A cached response would reproduce the rejected plan
+                litellm_kwargs.pop("cache", None)
+
         response = run(
             prompt=answers_data,
             model=model,
             prompt_title="Plan Prompt",
             extracted_title="Extracted Plan Data",
-            output_file=str(output_folder / "plan.toml"),
+            output_file=output_file,
             max_retries=retry,
+            **regenerate,
             **litellm_kwargs,
         )
+        if response.get("status") == "success":
+            index_document("plan", answers_data, "user_input", response["data"])
         return response
     except Exception as e:
         print(f"[red]Error processing plan: {str(e)}[/red]")
@@ -136,37 +614,99 @@ def get_todo(
     model: str,
     retry: int,
     todo: dict,
+    parallel_sections: bool = False,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    reuse_similar: bool = True,
+    accept_reused: bool = False,
     **litellm_kwargs,
 ) -> dict:
-    """Execute todo generation process."""
+    """
+    Execute todo generation process.
+
+    With parallel_sections, every [template.*] section of todo.toml is
+    requested concurrently and the results are merged into one to-do list.
+    The accepted list is also written in the given formats (see formats.py).
+    With reuse_similar, to-do lists of earlier projects with the same or a
+    similar plan are reused like in get_plan(), and reviewed unless
+    accept_reused is set.
+    """
 
     try:
-        response = run(
-            prompt=todo,
-            model=model,
-            prompt_title="To-Do Prompt",
-            extracted_title="Extracted To-Do Data",
-            output_file=str(output_folder / "todo.toml"),
-            max_retries=retry,
-            validate_model=TodoModel,
-            **litellm_kwargs,
-        )
+        output_file = str(output_folder / "todo.toml")
+        todo_data, regenerate = None, {}
+        if reuse_similar and "regenerate_keys" not in litellm_kwargs:
+            todo_data, regenerate = warm_start("todo", todo, "plan", todo_selector(todo))
 
-        json_block = response.get("data")
+        response = None
+        if todo_data is not None:
+            response = reuse_document(
+                output_file,
+                todo_data,
+                todo,
+                litellm_kwargs.get("journal"),
+                None if accept_reused else litellm_kwargs.get("review", "manual"),
+            )
+            if response is None:
+                # A cached response would reproduce the rejected to-do list
+                litellm_kwargs.pop("cache", None)
 
-        markdown = toml_to_markdown(json_block)
-        with open(output_folder / "todo.md", "w", encoding="utf-8") as f:
-            f.write(markdown)
+        if response is None and parallel_sections:
+            response = run_sections(
+                todo=todo,
+                model=model,
+                output_file=output_file,
+                max_retries=retry,
+                **regenerate,
+                **litellm_kwargs,
+            )
+        elif response is None:
+            response = run(
+                prompt=todo,
+                model=model,
+                prompt_title="To-Do Prompt",
+                extracted_title="Extracted To-Do Data",
+                output_file=output_file,
+                max_retries=retry,
+                validate_model=TodoModel,
+                **regenerate,
+                **litellm_kwargs,
+            )
 
-        json_dict = add_completed_status(json_block)
-        with open(output_folder / "todo.json", "w", encoding="utf-8") as f:
-            json.dump(json_dict, f, indent=2, ensure_ascii=False)
+        if response.get("status") == "success":
+            index_document("todo", todo, "plan", response["data"])
+            response["changed"] = response.get("changed", []) + write_todo_outputs(
+                output_folder, response.get("data"), formats
+            )
         return response
     except Exception as e:
         print(f"[red]Error processing todo: {str(e)}[/red]")
         return {"status": "error", "message": str(e)}
 
 
+def prepare_stage(input_folder: Path, template_file: str, context: dict) -> dict:
+    """
+    Read a stage template and add the documents it depends on.
+
+    Args:
+        input_folder: Path to the input folder containing the template
+        template_file: Name of the stage template, e.g. "todo.toml"
+        context: Documents of the dependencies, keyed by stage name
+
+    Returns:
+        dict: Stage prompt with one entry per dependency
+
+    Raises:
+        RuntimeError: If the template is not found
+    """
+    try:
+        prompt = load_template(input_folder / template_file).prompt()
+    except FileNotFoundError:
+        raise RuntimeError(f"Failed to read {template_file} in {input_folder}")
+
+    prompt.update(context)
+    return prompt
+
+
 def prepare_todo(input_folder: Path, output_folder: Path) -> dict:
     """
     Read and merge todo and plan TOML files.
@@ -182,22 +722,28 @@ def prepare_todo(input_folder: Path, output_folder: Path) -> dict:
         RuntimeError: If required TOML files are not found.
     """
     try:
-        with open(input_folder / "todo.toml", "rb") as f:
-            todo = tomllib.load(f)
         with open(output_folder / "plan.toml", "rb") as f:
             plan = tomllib.load(f)
     except FileNotFoundError:
         raise RuntimeError(f"Failed to read required TOML files in {input_folder}")
 
-    todo.update({"plan": plan})
-    return todo
+    return prepare_stage(input_folder, "todo.toml", {"plan": plan})
 
 
-def prepare_answers_cli(input_folder: Path) -> tuple[dict, dict]:
+def prepare_answers_cli(
+    input_folder: Path, answers: dict = None, template_file: str = "plan.toml"
+) -> tuple[dict, dict]:
     """
     Read and validate the plan template from input folder.
+
+    Templates are compiled once and cached (see templates.py), so only the
+    answers are processed again on every call.
     Args:
         input_folder: Path to the input folder containing plan.toml
+        answers: Pre-filled answers ({section: {key: answer}}). When given,
+            no questions are asked interactively.
+        template_file: Template with the questions, for pipeline stages
+            other than plan
     Returns:
         tuple[dict, dict]: Tuple containing (questions, template)
             where questions is the full questions dict and template is the template section
@@ -205,41 +751,994 @@ def prepare_answers_cli(input_folder: Path) -> tuple[dict, dict]:
         RuntimeError: If plan.toml is missing or template section is not found
     """
     try:
-        with open(input_folder / "plan.toml", "rb") as f:
-            answers_data = tomllib.load(f)
+        compiled = load_template(input_folder / template_file)
     except FileNotFoundError:
-        raise RuntimeError(f"Failed to read plan.toml in {input_folder}")
+        raise RuntimeError(f"Failed to read {template_file} in {input_folder}")
+
+    if compiled.data.get("template") is None:
+        raise RuntimeError(f"No template found in {template_file}")
+    if compiled.questions is None:
+        raise RuntimeError(f"The template of {template_file} has no questions")
+
+    if answers is None:
+        with span("questions"):
+            only_answers = collect_answers_cli(compiled.questions)
+    else:
+        only_answers = apply_answers(compiled.questions, answers)
+
+    answers_data = compiled.prompt()
+    answers_data["user_input"] = only_answers
+
+    return answers_data
+
+
+def prompt_stats(input_folder: Path, output_folder: Path, model: str) -> dict:
+    """
+    Count the prompt tokens of every serialization format.
+
+    The plan prompt is built from the template defaults; the todo prompt is
+    included when a generated plan.toml exists in the output folder.
+
+    Returns:
+        dict: {prompt name: {format: token count}}
+    """
+    prompts = {"plan": prepare_answers_cli(input_folder, answers={})}
+    if (output_folder / "plan.toml").exists():
+        prompts["todo"] = prepare_todo(input_folder, output_folder)
 
-    template = answers_data.get("template")
-    if template is None:
-        raise RuntimeError("No template found in plan.toml")
+    return {
+        name: {
+            format: count_tokens(
+                serialize_prompt(compact_prompt(prompt), format), parse_models(model)[0]
+            )
+            for format in SERIALIZERS
+        }
+        for name, prompt in prompts.items()
+    }
 
-    template, only_answers = collect_answers_cli(template)
 
-    answers_data.update({"user_input": only_answers, "template": template})
+def journaled_answers(input_folder: Path, journal: RunJournal, answers: dict = None) -> dict:
+    """
+    Return the answers recorded in the journal, asking the questions only if there are none.
 
+    Pre-filled answers ({section: {key: answer}}) replace the recorded ones
+    and are never asked.
+    """
+    answers_data = journal.answers
+    if answers_data is None or answers is not None:
+        answers_data = prepare_answers_cli(input_folder, answers)
+        journal.record_answers(answers_data)
+    else:
+        display_text_panel(text="Using the answers recorded in the journal.")
     return answers_data
 
 
+def incremental_update(
+    journal: RunJournal,
+    stage: str,
+    output_file: Path,
+    prompt: dict,
+    key: str,
+    select=None,
+) -> tuple[dict | None, dict]:
+    """
+    Decide which sections of an accepted document an incremental run regenerates.
+
+    prompt[key] is compared section by section with the prompt the accepted
+    document was generated from. select maps (previous prompt[key], current
+    prompt[key], changed sections) to the document keys to regenerate; by
+    default see reuse_sections().
+
+    Returns:
+        tuple[dict | None, dict]: (accepted document if it is up to date,
+            else None; arguments for run() regenerating only some of its
+            sections, empty if the document is generated in full)
+    """
+    inputs = journal.inputs(stage)
+    document = journal.restore(stage, output_file) if inputs is not None else None
+    # Without an accepted document, or after the template changed, nothing is kept
+    if document is None or template_hash(inputs, key) != template_hash(prompt, key):
+        return None, {}
+    return reuse_sections(document, inputs.get(key) or {}, prompt.get(key) or {}, select)
+
+
+def reuse_sections(
+    document: dict, previous: dict, current: dict, select=None
+) -> tuple[dict | None, dict]:
+    """
+    Decide which sections of a document generated from previous input to regenerate.
+
+    By default the sections named after changed input sections are
+    regenerated, together with every section that has no input section of
+    its own (e.g. a plan's design), since it depends on all of the input.
+
+    Returns:
+        tuple[dict | None, dict]: (document if nothing changed, else None;
+            arguments for run() regenerating only the changed sections, empty
+            if every section has to be generated)
+    """
+    changed = changed_sections(previous, current)
+    if select:
+        keys = select(previous, current, changed)
+    elif changed:
+        derived = [key for key in document if key not in previous and key not in current]
+        keys = changed + [key for key in derived if key not in changed]
+    else:
+        keys = []
+    if not keys:
+        return document, {}
+    if any(k not in document for k in keys) or len(keys) == len(document):
+        return None, {}
+    return None, {"document": document, "regenerate_keys": keys}
+
+
+def warm_start(
+    stage: str, prompt: dict, key: str, select=None, title: str = None
+) -> tuple[dict | None, dict]:
+    """
+    Start from the indexed document of the most similar earlier input.
+
+    An identical input returns its document; a similar one keeps the sections
+    whose input is unchanged and regenerates the others from a draft (see
+    reuse_sections() for the arguments). With a title, progress is printed as
+    a single line prefixed with it, like in run_async().
+    """
+    with span("index", stage=stage) as attrs:
+        found = find_similar(stage, prompt, key)
+        attrs["similarity"] = found[0] if found else None
+        if found is None:
+            return None, {}
+        score, entry = found
+        document, regenerate = reuse_sections(
+            entry["document"], entry["inputs"], prompt.get(key) or {}, select
+        )
+        attrs["reused"] = document is not None or bool(regenerate)
+    if document is not None:
+        message = f"Reusing the {stage} of an identical earlier project."
+    elif regenerate:
+        message = f"Starting from the {stage} of a similar earlier project ({score:.0%} similar)."
+    else:
+        return document, regenerate
+
+    if title:
+        print(f"[dim]{title}: {message}[/dim]")
+    else:
+        display_text_panel(text=message)
+    return document, regenerate
+
+
+def reuse_document(
+    output_file: str,
+    document: dict,
+    prompt: dict,
+    journal: RunJournal = None,
+    review: str | ReviewPolicy | None = None,
+) -> dict | None:
+    """
+    Accept a document reused from the index without a model call.
+
+    With a review policy, the document is reviewed like a generated one
+    first; without one it is accepted as it is.
+
+    Returns:
+        dict | None: Response like run()'s, or None if the reviewer asked to
+            regenerate the document
+    """
+    changed = write_toml(output_file, document)
+    if review is not None:
+        review = get_review_policy(review) if isinstance(review, str) else review
+        answer = review_stage(output_file, Path(output_file).stem, review, 1)
+        if answer == "r":
+            display_text_panel(text="Regenerating document. Retrying...")
+            return None
+        elif answer == "x":
+            display_text_panel(text="Exiting process.")
+            return {"status": "exit", "data": None, "output_file": output_file}
+
+    if journal:
+        journal.record_accepted(Path(output_file).stem, document, prompt)
+    return {
+        "status": "success",
+        "data": document,
+        "output_file": output_file,
+        "changed": [output_file] if changed else [],
+    }
+
+
 def get_all(
     input_folder: Path,
     output_folder: Path,
     model: str,
     retry: int,
+    parallel_sections: bool = False,
+    resume: bool = False,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    answers: dict = None,
+    incremental: bool = False,
     **litellm_kwargs,
 ) -> tuple[dict, dict]:
-    """Generate both plan and todo documents in sequence."""
+    """
+    Generate both plan and todo documents in sequence.
+
+    Answers, responses and accepted documents are recorded in the output
+    folder's journal. With resume, the recorded answers are reused, accepted
+    stages are skipped and an unreviewed response is reviewed again instead
+    of being requested from the model. Pre-filled answers replace the
+    questions (and the recorded answers). A stage accepted for other inputs,
+    such as other answers or a plan regenerated since, is generated again.
+
+    With incremental, the accepted documents of the last run are updated:
+    only the plan sections whose answers changed are regenerated, then only
+    the todo sections whose plan context changed. Other sections are kept.
+    """
+    journal = RunJournal(output_folder)
+    if not resume and not incremental:
+        journal.reset()
+
     # Generate plan first
-    answers_data = prepare_answers_cli(input_folder)
-    plan_response = get_plan(
-        input_folder, output_folder, model, retry, answers_data, **litellm_kwargs
-    )
+    answers_data = journaled_answers(input_folder, journal, answers)
+    plan_file = output_folder / "plan.toml"
+    plan = journal.restore("plan", plan_file, answers_data) if resume else None
+    if resume and plan is None and journal.is_accepted("plan"):
+        display_text_panel(
+            text="Answers changed since the plan was accepted, generating it again."
+        )
+    regenerate = {}
+    if incremental:
+        plan, regenerate = incremental_update(
+            journal, "plan", plan_file, answers_data, "user_input"
+        )
+    if plan is not None:
+        display_text_panel(
+            text="Plan is up to date, skipping."
+            if incremental
+            else "Plan already accepted, skipping."
+        )
+        plan_response = {
+            "status": "success",
+            "data": plan,
+            "output_file": str(output_folder / "plan.toml"),
+            "changed": [],
+        }
+    else:
+        plan_response = get_plan(
+            input_folder,
+            output_folder,
+            model,
+            retry,
+            answers_data,
+            journal=journal,
+            **regenerate,
+            **litellm_kwargs,
+        )
     if plan_response.get("status") in ["exit", "error"]:
         return plan_response, {"status": "skipped"}
 
     # Generate todo using the created plan
     todo = prepare_todo(input_folder, output_folder)
+    todo_file = output_folder / "todo.toml"
+    todo_data = journal.restore("todo", todo_file, todo) if resume else None
+    if resume and todo_data is None and journal.is_accepted("todo"):
+        display_text_panel(
+            text="Plan changed since the to-do list was accepted, generating it again."
+        )
+    regenerate = {}
+    if incremental:
+        todo_data, regenerate = incremental_update(
+            journal, "todo", todo_file, todo, "plan", todo_selector(todo)
+        )
+    if todo_data is not None:
+        display_text_panel(
+            text="To-do list is up to date, skipping."
+            if incremental
+            else "To-do list already accepted, skipping."
+        )
+        changed = write_todo_outputs(output_folder, todo_data, formats)
+        return plan_response, {
+            "status": "success",
+            "data": todo_data,
+            "output_file": str(output_folder / "todo.toml"),
+            "changed": changed,
+        }
+
     todo_response = get_todo(
-        input_folder, output_folder, model, retry, todo, **litellm_kwargs
+        input_folder,
+        output_folder,
+        model,
+        retry,
+        todo,
+        parallel_sections=parallel_sections,
+        formats=formats,
+        journal=journal,
+        **regenerate,
+        **litellm_kwargs,
     )
     return plan_response, todo_response
+
+
+async def run_async(
+    prompt_title: str,
+    output_file: str | None,
+    validate_model: object = None,
+    max_retries: int = 5,
+    prompt: dict = None,
+    model: str = None,
+    cache: ResponseCache = None,
+    hedge_after: float = DEFAULT_HEDGE_AFTER,
+    document: dict = None,
+    regenerate_keys: list[str] = None,
+    **litellm_kwargs,
+) -> dict:
+    """
+    Non-interactive counterpart of run() built on litellm.acompletion.
+
+    The response is streamed without a live panel and accepted as soon as it
+    passes validation, so many calls can be awaited concurrently. The result is
+    written to output_file unless it is None. A comma-separated model list is
+    hedged like in run(), and document with regenerate_keys regenerates only
+    some sections like in run().
+    """
+    stage = Path(output_file).stem if output_file else prompt_title
+    models = parse_models(model)
+    request_prompt = (
+        build_regeneration_prompt(prompt, document, regenerate_keys, draft=True)
+        if regenerate_keys
+        else prompt
+    )
+    # Partial responses are validated after they are spliced into the document
+    stream_model = None if regenerate_keys else validate_model
+    messages, _, _ = fit_request(request_prompt, models[0])
+
+    cache_key = cache.make_key(model, messages, **litellm_kwargs) if cache else None
+    litellm_kwargs = {"stream_options": {"include_usage": True}, **litellm_kwargs}
+    repair_prompt = None
+
+    for attempt in range(1, max_retries + 1):
+        cached = cache.get(cache_key) if cache_key and not repair_prompt else None
+        text = None
+        validator = None
+        usage = {}
+        try:
+            with span("request", stage=stage, model=models[0], attempt=attempt) as attrs:
+                timer = StreamTimer()
+                if cached:
+                    attrs["source"] = "cache"
+                    text = cached["text"]
+                elif len(models) > 1 and not repair_prompt:
+                    # Timed on the first model to send a token, like run() renders it
+                    leader = []
+                    count = timer.wrap()
+
+                    def timed(model_name: str, content: str) -> None:
+                        if not leader:
+                            leader.append(model_name)
+                        if model_name == leader[0]:
+                            count(content)
+
+                    attrs["model"], text, usage = await request_hedged(
+                        models,
+                        request_prompt,
+                        messages,
+                        stream_model,
+                        hedge_after,
+                        on_chunk=timed,
+                        stage=stage,
+                        **litellm_kwargs,
+                    )
+                    if usage:
+                        print(f"[dim]{prompt_title}: {format_usage(usage)}[/dim]")
+                else:
+                    response = await litellm.acompletion(
+                        model=models[0],
+                        messages=(
+                            [{"content": repair_prompt, "role": "user"}]
+                            if repair_prompt
+                            else messages
+                        ),
+                        stream=True,
+                        **litellm_kwargs,
+                    )
+                    validator = StreamingJSONValidator(stream_model)
+                    text = await collect_streaming_async(
+                        response,
+                        on_chunk=timer.wrap(validator.feed),
+                        on_usage=lambda u: usage.update(usage_summary(u)),
+                    )
+                    if usage:
+                        print(f"[dim]{prompt_title}: {format_usage(usage)}[/dim]")
+                attrs.update(timer.attrs(usage.get("completion_tokens")))
+                attrs.update(usage_attrs(attrs["model"], usage))
+
+                json_block = parse_response(text, stream_model, validator)
+                if regenerate_keys:
+                    json_block = splice_sections(document, json_block, regenerate_keys)
+                    if validate_model:
+                        validate_model.model_validate(json_block)
+            if cache_key and not cached:
+                cache.set(cache_key, text, json_block)
+            changed = write_toml(output_file, json_block) if output_file else False
+
+            return {
+                "status": "success",
+                "data": json_block,
+                "output_file": output_file,
+                "usage": usage or None,
+                "changed": [output_file] if changed else [],
+            }
+        except Exception as e:
+            error = e
+            if isinstance(e, json.JSONDecodeError):
+                print(f"[yellow]{prompt_title}: invalid JSON format: {e}[/yellow]")
+            elif isinstance(e, StreamValidationError):
+                print(f"[yellow]{prompt_title}: stream aborted, invalid response: {e}[/yellow]")
+            else:
+                print(f"[yellow]{prompt_title}: error processing response: {e}[/yellow]")
+        if cached:
+            cache.delete(cache_key)
+
+        kind = classify_error(error)
+        if kind == "fatal":
+            raise error
+        # An aborted stream only holds the failed block; one that did not
+        # close is a fragment, so it is regenerated instead of repaired
+        fragment = isinstance(error, StreamValidationError) and (
+            validator is None or not validator.closed
+        )
+        if text is None and validator is not None:
+            text = f"```json\n{validator.block}\n```"
+        repair_prompt = (
+            build_repair_prompt(text, error, prompt)
+            if kind == "parse" and not fragment
+            else None
+        )
+        if attempt < max_retries:
+            print(f"[dim]{prompt_title}: retrying ({attempt}/{max_retries})...[/dim]")
+            if kind == "transport":
+                await asyncio.sleep(backoff_delay(attempt))
+
+    raise Exception(f"{prompt_title}: max retries exceeded")
+
+
+def select_plan_context(plan: dict, section: str) -> dict:
+    """
+    Pick the parts of the plan that are relevant to one todo section.
+
+    The first plan entry (the project overview) is always kept, together with
+    every entry that mentions a word of the section name. If nothing else
+    matches, the whole plan is used.
+    """
+    keys = list(plan)
+    words = [word for word in section.lower().split("_") if len(word) > 2]
+
+    relevant = {
+        key
+        for key in keys[1:]
+        if any(
+            word in json.dumps({key: plan[key]}, ensure_ascii=False).lower()
+            for word in words
+        )
+    }
+    if not relevant:
+        return plan
+
+    return {key: plan[key] for key in keys if key == keys[0] or key in relevant}
+
+
+def affected_todo_sections(
+    previous_plan: dict, plan: dict, changed: list[str], sections: list[str]
+) -> list[str]:
+    """
+    Pick the todo sections whose plan context includes a changed plan entry.
+
+    The context (see select_plan_context) is selected from both plans, so a
+    section is also affected when a changed entry no longer mentions it.
+    """
+    changed = set(changed)
+    return [
+        section
+        for section in sections
+        if changed
+        & (
+            set(select_plan_context(previous_plan, section))
+            | set(select_plan_context(plan, section))
+        )
+    ]
+
+
+def todo_selector(todo: dict):
+    """select function for reuse_sections() that picks the affected todo sections."""
+    sections = list(todo.get("template", {}))
+    return lambda previous, plan, changed: affected_todo_sections(
+        previous, plan, changed, sections
+    )
+
+
+def split_todo_sections(todo: dict) -> dict[str, dict]:
+    """Split a todo prompt into one prompt per [template.*] section."""
+    plan = todo.get("plan", {})
+    return {
+        section: {
+            **todo,
+            "template": {section: template},
+            "plan": select_plan_context(plan, section),
+        }
+        for section, template in todo.get("template", {}).items()
+    }
+
+
+async def generate_sections_async(
+    todo: dict,
+    model: str,
+    max_retries: int = 5,
+    prompt_title: str = "To-Do",
+    sections: list[str] = None,
+    **litellm_kwargs,
+) -> dict:
+    """
+    Request todo sections concurrently and merge them in template order.
+
+    Only the given sections are requested when sections is set. Each response
+    must contain its own section (a response without it is repaired like any
+    other invalid response); other keys in it are ignored.
+
+    Raises:
+        ValueError: If the merged sections are not the requested ones
+    """
+    prompts = split_todo_sections(todo)
+    if sections is not None:
+        prompts = {key: prompt for key, prompt in prompts.items() if key in sections}
+    results = await asyncio.gather(
+        *(
+            run_async(
+                prompt_title=f"{prompt_title} [{section}]",
+                output_file=None,
+                validate_model=todo_section_model(section),
+                max_retries=max_retries,
+                prompt=prompt,
+                model=model,
+                **litellm_kwargs,
+            )
+            for section, prompt in prompts.items()
+        )
+    )
+
+    merged = {}
+    for section, result in zip(prompts, results):
+        extra = [key for key in result["data"] if key != section]
+        if extra:
+            print(f"[dim]{prompt_title} [{section}]: ignoring sections {', '.join(extra)}[/dim]")
+        merged[section] = result["data"][section]
+
+    requested = list(prompts) if sections is None else sections
+    if set(merged) != set(requested):
+        missing = [key for key in requested if key not in merged]
+        raise ValueError(f"To-do sections missing from the template: {', '.join(missing)}")
+    TodoModel.model_validate(merged)
+    return merged
+
+
+async def run_sections_async(
+    todo: dict,
+    model: str,
+    output_file: str,
+    max_retries: int = 5,
+    prompt_title: str = "To-Do",
+    document: dict = None,
+    regenerate_keys: list[str] = None,
+    **litellm_kwargs,
+) -> dict:
+    """Non-interactive section-parallel todo generation."""
+    json_block = await generate_sections_async(
+        todo, model, max_retries, prompt_title, sections=regenerate_keys, **litellm_kwargs
+    )
+    if regenerate_keys:
+        json_block = splice_sections(document, json_block, regenerate_keys)
+        TodoModel.model_validate(json_block)
+    changed = write_toml(output_file, json_block)
+    return {
+        "status": "success",
+        "data": json_block,
+        "output_file": output_file,
+        "changed": [output_file] if changed else [],
+    }
+
+
+def run_sections(
+    todo: dict,
+    model: str,
+    output_file: str,
+    max_retries: int = 5,
+    debug: bool = False,
+    renderer: str = "auto",
+    journal: RunJournal = None,
+    review: str | ReviewPolicy = "manual",
+    document: dict = None,
+    regenerate_keys: list[str] = None,
+    **litellm_kwargs,
+) -> dict:
+    """
+    Section-parallel counterpart of run() for todo generation.
+
+    All sections (or only regenerate_keys of document) are generated
+    concurrently, merged, validated as one TodoModel and then reviewed like a
+    single document.
+    """
+    display_json_panel(todo, title="To-Do Prompt", border_style="green")
+    review = get_review_policy(review) if isinstance(review, str) else review
+
+    stage = Path(output_file).stem
+    previous_digest = file_digest(output_file)
+    prompt_hash = content_hash(todo) if journal else None
+    json_block = document if regenerate_keys else None
+
+    for attempt in range(1, max_retries + 1):
+        journaled = (
+            journal.response(stage, prompt_hash) if journal and not regenerate_keys else None
+        )
+        if journaled:
+            display_text_panel(text="Resuming journaled response.")
+            generated = json.loads(journaled)
+        else:
+            sections = regenerate_keys or list(todo.get("template", {}))
+            display_text_panel(text=f"Generating {len(sections)} sections concurrently...")
+            generated = asyncio.run(
+                generate_sections_async(
+                    todo, model, max_retries, sections=regenerate_keys, **litellm_kwargs
+                )
+            )
+            if journal and not regenerate_keys:
+                journal.record_response(stage, prompt_hash, json.dumps(generated))
+        if regenerate_keys:
+            json_block = splice_sections(json_block, generated, regenerate_keys)
+            TodoModel.model_validate(json_block)
+        else:
+            json_block = generated
+        write_toml(output_file, json_block)
+
+        answer = review_stage(output_file, stage, review, attempt)
+        if answer == "r":
+            # Cached sections would reproduce the rejected document
+            litellm_kwargs.pop("cache", None)
+            if journal:
+                journal.discard_response(stage)
+
+            keys = select_sections(list(json_block))
+            regenerate_keys = None if len(keys) == len(json_block) else keys
+            display_text_panel(text=f"Regenerating sections: {', '.join(keys)}. Retrying...")
+            continue
+        elif answer == "x":
+            display_text_panel(text="Exiting process.")
+            return {"status": "exit", "data": None, "output_file": output_file}
+
+        if journal:
+            journal.record_accepted(stage, json_block, todo)
+        return {
+            "status": "success",
+            "data": json_block,
+            "output_file": output_file,
+            "changed": [output_file] if file_digest(output_file) != previous_digest else [],
+        }
+
+    display_text_panel(text=f"Failed to process response after {max_retries} attempts.")
+    raise Exception("Max retries exceeded")
+
+
+async def get_all_async(
+    input_folder: Path,
+    output_folder: Path,
+    model: str,
+    retry: int,
+    answers: dict,
+    parallel_sections: bool = False,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    **litellm_kwargs,
+) -> tuple[dict, dict]:
+    """
+    Generate both plan and todo documents for one project without prompting.
+
+    Documents of identical earlier projects are reused and those of similar
+    ones are used as drafts (see warm_start()). Nothing is reviewed, so reused
+    documents are accepted like generated ones.
+
+    Args:
+        input_folder: Path to input folder containing plan.toml and todo.toml
+        output_folder: Path where the project's documents will be saved
+        model: Name of the LLM model to use
+        retry: Number of retry attempts per document
+        answers: Pre-filled answers ({section: {key: answer}})
+        parallel_sections: Request each todo section concurrently
+        formats: Formats to write the to-do list in, besides todo.toml
+        **litellm_kwargs: Additional arguments for litellm
+
+    Returns:
+        tuple[dict, dict]: (plan_response, todo_response)
+    """
+    name = output_folder.name
+    try:
+        answers_data = prepare_answers_cli(input_folder, answers)
+        plan_file = str(output_folder / "plan.toml")
+        plan, regenerate = warm_start("plan", answers_data, "user_input", title=f"{name} plan")
+        if plan is not None:
+            plan_response = reuse_document(plan_file, plan, answers_data)
+        else:
+            plan_response = await run_async(
+                prompt=answers_data,
+                model=model,
+                prompt_title=f"{name} plan",
+                output_file=plan_file,
+                max_retries=retry,
+                **regenerate,
+                **litellm_kwargs,
+            )
+            index_document("plan", answers_data, "user_input", plan_response["data"])
+    except Exception as e:
+        print(f"[red]Error processing plan: {str(e)}[/red]")
+        return {"status": "error", "message": str(e)}, {"status": "skipped"}
+
+    try:
+        todo = prepare_todo(input_folder, output_folder)
+        todo_file = str(output_folder / "todo.toml")
+        todo_data, regenerate = warm_start(
+            "todo", todo, "plan", todo_selector(todo), title=f"{name} todo"
+        )
+        if todo_data is not None:
+            todo_response = reuse_document(todo_file, todo_data, todo)
+        elif parallel_sections:
+            todo_response = await run_sections_async(
+                todo=todo,
+                model=model,
+                output_file=todo_file,
+                max_retries=retry,
+                prompt_title=f"{name} todo",
+                **regenerate,
+                **litellm_kwargs,
+            )
+        else:
+            todo_response = await run_async(
+                prompt=todo,
+                model=model,
+                prompt_title=f"{name} todo",
+                output_file=todo_file,
+                max_retries=retry,
+                validate_model=TodoModel,
+                **regenerate,
+                **litellm_kwargs,
+            )
+        index_document("todo", todo, "plan", todo_response["data"])
+        todo_response["changed"] = todo_response.get("changed", []) + write_todo_outputs(
+            output_folder, todo_response.get("data"), formats
+        )
+    except Exception as e:
+        print(f"[red]Error processing todo: {str(e)}[/red]")
+        return plan_response, {"status": "error", "message": str(e)}
+
+    return plan_response, todo_response
+
+
+async def batch_async(
+    input_folder: Path,
+    answers_folder: Path,
+    output_folder: Path,
+    model: str,
+    retry: int,
+    concurrency: int = 4,
+    **litellm_kwargs,
+) -> dict[str, tuple[dict, dict]]:
+    """
+    Generate plan and todo documents for every answer file in a folder.
+
+    Each answer file (TOML or JSON) is treated as one project; its documents
+    are written to ``output_folder / <file stem>``. At most ``concurrency``
+    projects are processed at the same time. A project whose answers cannot
+    be read or do not match the template's questions, or whose generation
+    fails, gets an error response; the other projects are still processed.
+
+    Returns:
+        dict: Mapping of project name to (plan_response, todo_response)
+    """
+    answer_files = sorted(
+        path
+        for path in Path(answers_folder).iterdir()
+        if path.suffix in ANSWER_FILE_SUFFIXES
+    )
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def process_project(answer_file: Path) -> tuple[dict, dict]:
+        async with semaphore:
+            try:
+                answers = load_answers(answer_file)
+                questions = load_template(input_folder / "plan.toml").questions
+                validate_answers(questions or [], answers)
+            except (OSError, ValueError) as e:
+                print(f"[red]{answer_file.stem}: {str(e)}[/red]")
+                return {"status": "error", "message": str(e)}, {"status": "skipped"}
+
+            project_folder = output_folder / answer_file.stem
+            project_folder.mkdir(parents=True, exist_ok=True)
+            return await get_all_async(
+                input_folder, project_folder, model, retry, answers, **litellm_kwargs
+            )
+
+    results = await asyncio.gather(
+        *(process_project(f) for f in answer_files), return_exceptions=True
+    )
+    responses = {}
+    for answer_file, result in zip(answer_files, results):
+        if isinstance(result, Exception):
+            print(f"[red]Error processing {answer_file.stem}: {str(result)}[/red]")
+            result = {"status": "error", "message": str(result)}, {"status": "skipped"}
+        responses[answer_file.stem] = result
+    return responses
+
+
+async def run_pipeline_async(
+    input_folder: Path,
+    output_folder: Path,
+    model: str,
+    retry: int,
+    stages: dict[str, dict],
+    answers_data: dict = None,
+    parallel_sections: bool = False,
+    on_stage=None,
+    formats: tuple[str, ...] = DEFAULT_FORMATS,
+    **litellm_kwargs,
+) -> dict[str, dict]:
+    """
+    Run the stages of a pipeline, each as soon as its dependencies succeed.
+
+    Stages that do not depend on each other run concurrently. Every stage is
+    generated and validated by run_async() and written to
+    ``output_folder / <stage>.toml``; stages whose dependencies failed are
+    skipped. Stages indexed by the answers or by a single dependency start
+    from the documents of earlier projects like in get_all_async().
+
+    Args:
+        input_folder: Path to the input folder containing the stage templates
+        output_folder: Path where the documents will be saved
+        model: Name of the LLM model to use
+        retry: Number of retry attempts per stage
+        stages: Normalized stages from load_pipeline()
+        answers_data: Prompt of the questions stage (see prepare_answers_cli)
+        parallel_sections: Request each section of "todo" stages concurrently
+        on_stage: Optional callback receiving (stage name, response) when a
+            stage starts (status "running") and when it finishes
+        formats: Formats to write to-do stages in, besides <stage>.toml
+        **litellm_kwargs: Additional arguments for litellm
+
+    Returns:
+        dict: Mapping of stage name to response, in pipeline order
+    """
+    from uplan.pipeline import stage_model
+
+    results = {}
+
+    async def run_stage(name: str, stage: dict) -> dict:
+        if stage["questions"]:
+            prompt = answers_data
+        else:
+            context = {dep: results[dep]["data"] for dep in stage["depends_on"]}
+            prompt = prepare_stage(input_folder, stage["template"], context)
+
+        output_file = str(output_folder / f"{name}.toml")
+        validate_model = stage_model(stage)
+        # The input a stage is indexed by: the answers, or its only dependency
+        if stage["questions"]:
+            key = "user_input"
+        else:
+            key = stage["depends_on"][0] if len(stage["depends_on"]) == 1 else None
+        document, regenerate = None, {}
+        if key:
+            select = todo_selector(prompt) if validate_model is TodoModel else None
+            document, regenerate = warm_start(name, prompt, key, select, title=name)
+
+        if document is not None:
+            response = reuse_document(output_file, document, prompt)
+        elif parallel_sections and validate_model is TodoModel:
+            response = await run_sections_async(
+                todo=prompt,
+                model=model,
+                output_file=output_file,
+                max_retries=retry,
+                prompt_title=name,
+                **regenerate,
+                **litellm_kwargs,
+            )
+        else:
+            response = await run_async(
+                prompt=prompt,
+                model=model,
+                prompt_title=name,
+                output_file=output_file,
+                max_retries=retry,
+                validate_model=validate_model,
+                **regenerate,
+                **litellm_kwargs,
+            )
+        if key:
+            index_document(name, prompt, key, response["data"])
+
+        if validate_model is TodoModel:
+            response["changed"] = response.get("changed", []) + write_todo_outputs(
+                output_folder, response.get("data"), formats
+            )
+        return response
+
+    pending = dict(stages)
+    running = {}
+    while pending or running:
+        for name, stage in list(pending.items()):
+            statuses = [results.get(dep, {}).get("status") for dep in stage["depends_on"]]
+            if any(status in ("error", "skipped") for status in statuses):
+                results[name] = {"status": "skipped"}
+                del pending[name]
+                if on_stage:
+                    on_stage(name, results[name])
+            elif all(status == "success" for status in statuses):
+                running[asyncio.create_task(run_stage(name, stage))] = name
+                del pending[name]
+                if on_stage:
+                    on_stage(name, {"status": "running"})
+
+        if not running:
+            continue
+
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = running.pop(task)
+            try:
+                results[name] = task.result()
+            except Exception as e:
+                print(f"[red]Error processing {name}: {str(e)}[/red]")
+                results[name] = {"status": "error", "message": str(e)}
+            if on_stage:
+                on_stage(name, results[name])
+
+    return {name: results[name] for name in stages}
+
+
+def run_pipeline(
+    input_folder: Path,
+    output_folder: Path,
+    model: str,
+    retry: int,
+    stages: dict[str, dict],
+    answers_data: dict = None,
+    parallel_sections: bool = False,
+    **litellm_kwargs,
+) -> dict[str, dict]:
+    """Synchronous entry point for run_pipeline_async()."""
+    return asyncio.run(
+        run_pipeline_async(
+            input_folder,
+            output_folder,
+            model,
+            retry,
+            stages,
+            answers_data,
+            parallel_sections=parallel_sections,
+            **litellm_kwargs,
+        )
+    )
+
+
+def batch(
+    input_folder: Path,
+    answers_folder: Path,
+    output_folder: Path,
+    model: str,
+    retry: int,
+    concurrency: int = 4,
+    **litellm_kwargs,
+) -> dict[str, tuple[dict, dict]]:
+    """Synchronous entry point for batch_async()."""
+    return asyncio.run(
+        batch_async(
+            input_folder,
+            answers_folder,
+            output_folder,
+            model,
+            retry,
+            concurrency,
+            **litellm_kwargs,
+        )
+    )
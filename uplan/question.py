@@ -1,9 +1,14 @@
-from typing import Any, Dict, Optional
+import json
+import sys
+import tomllib
+from pathlib import Path
+from typing import Dict, List, Optional
 
 from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
 from uplan.utils.display import display_text_panel
+from uplan.utils.templates import Question
 
 
 class QuestionBuilder:
@@ -38,42 +43,113 @@ class QuestionBuilder:
 
 
 def collect_answers_cli(
-    template: Dict[str, Any],
-    default_value: str = "<select>",
+    questions: List[Question],
     question_builder: Optional[QuestionBuilder] = None,
-):
+) -> Dict[str, Dict[str, str]]:
+    """Ask the required questions and return the answers that differ from the default."""
     qb = question_builder or QuestionBuilder()
-    responses = {}
     only_answers = {}
 
-    for section, questions in template.items():
-        responses[section] = {}
-        for key, q in questions.items():
-            ask = q.get("ask", key)
-            required = q.get("required", False)
-            default = q.get("default", default_value)
-            description = q.get("description", "")
-
-            if not required:
-                responses[section][key] = default + f" (e.g., {description})"
-
-            else:
-                status, answer = qb.ask_question_with_panel(
-                    title=section,
-                    question=ask,
-                    description=description,
-                    default=default,
-                    required=required,
-                )
-
-                if status:
-                    if section not in only_answers:
-                        only_answers[section] = {}
-                    only_answers[section][key] = answer
+    for q in questions:
+        if not q.required:
+            continue
+        status, answer = qb.ask_question_with_panel(
+            title=q.section,
+            question=q.ask,
+            description=q.description,
+            default=q.default,
+            required=q.required,
+        )
+        if status:
+            only_answers.setdefault(q.section, {})[q.key] = answer
+
+    return only_answers
+
+
+ANSWER_FILE_SUFFIXES = (".toml", ".json")
+
+
+def load_answers(path: Path) -> Dict[str, Dict[str, str]]:
+    """
+    Load pre-filled answers from a TOML or JSON file, or from stdin if path is "-".
+
+    The file maps template sections to answered keys, e.g.
+    ``{"tech_stack": {"database": "PostgreSQL"}}``.
+    """
+    if str(path) == "-":
+        return parse_answers(sys.stdin.read())
+    path = Path(path)
+    if path.suffix == ".toml":
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if path.suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    raise ValueError(f"Unsupported answer file format: {path.suffix}")
+
+
+def parse_answers(text: str) -> Dict[str, Dict[str, str]]:
+    """
+    Parse answers given as JSON or TOML text.
+
+    Raises:
+        ValueError: If the text is neither
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return tomllib.loads(text)
+    except tomllib.TOMLDecodeError:
+        raise ValueError("Answers must be JSON or TOML")
+
+
+def validate_answers(questions: List[Question], answers: Dict[str, Dict[str, str]]) -> None:
+    """
+    Check pre-filled answers against the questions of a template.
+
+    Raises:
+        ValueError: If a required question has no answer or an answer does
+            not belong to any question
+    """
+    if not isinstance(answers, dict) or not all(isinstance(v, dict) for v in answers.values()):
+        raise ValueError("Answers must map sections to {key: answer} tables")
+
+    known = {(q.section, q.key) for q in questions}
+    unknown = [
+        f"{section}.{key}"
+        for section, entries in answers.items()
+        for key in entries
+        if (section, key) not in known
+    ]
+    missing = [
+        f"{q.section}.{q.key}"
+        for q in questions
+        if q.required and not str(answers.get(q.section, {}).get(q.key) or "").strip()
+    ]
+
+    problems = []
+    if missing:
+        problems.append(f"missing required answers: {', '.join(missing)}")
+    if unknown:
+        problems.append(f"unknown questions: {', '.join(unknown)}")
+    if problems:
+        raise ValueError(f"Invalid answers ({'; '.join(problems)})")
+
+
+def apply_answers(
+    questions: List[Question], answers: Dict[str, Dict[str, str]]
+) -> Dict[str, Dict[str, str]]:
+    """Non-interactive counterpart of collect_answers_cli() using pre-filled answers."""
+    only_answers = {}
 
-                responses[section][key] = default + f" (e.g., {description})"
+    for q in questions:
+        answer = answers.get(q.section, {}).get(q.key)
+        if answer is not None and str(answer).strip() not in ("", q.default):
+            only_answers.setdefault(q.section, {})[q.key] = str(answer).strip()
 
-    return responses, only_answers
+    return only_answers
 
 
 def select_option(choices, text, **panel_kwargs):
@@ -92,6 +168,43 @@ def select_option(choices, text, **panel_kwargs):
     return answer
 
 
+def select_sections(sections: list[str], **panel_kwargs) -> list[str]:
+    """
+    Ask which top-level sections of a document should be regenerated.
+
+    Sections can be selected by number or name, separated by commas.
+    An empty answer selects every section.
+
+    Returns:
+        list[str]: Selected sections in document order
+    """
+    options = "\n".join(f"{i}. {section}" for i, section in enumerate(sections, 1))
+    display_text_panel(
+        text=f"Select sections to regenerate [dim](numbers or names, comma separated)\n{options}\n- All: Enter[/dim]",
+        **panel_kwargs,
+    )
+
+    while True:
+        answer = Prompt.ask(
+            "[dim]default: [blue]all[/blue][/dim]", default="", show_default=False
+        ).strip()
+        if not answer:
+            return list(sections)
+
+        selected, invalid = set(), []
+        for item in filter(None, (part.strip() for part in answer.split(","))):
+            if item.isdigit() and 1 <= int(item) <= len(sections):
+                selected.add(sections[int(item) - 1])
+            elif item in sections:
+                selected.add(item)
+            else:
+                invalid.append(item)
+
+        if selected and not invalid:
+            return [section for section in sections if section in selected]
+        display_text_panel(text=f"Unknown sections: {', '.join(invalid) or answer}")
+
+
 if __name__ == "__main__":
     # import tomllib
     # import json
@@ -0,0 +1,256 @@
+"""
+Module for the long-lived generation server and its client.
+
+The server keeps litellm, the environment and the provider HTTP clients warm
+between jobs. Clients talk to it with JSON lines: one request line per
+connection, answered by a stream of event lines.
+
+Requests:
+    {"action": "ping"}
+    {"action": "run", "category": "dev", "answers": {...},
+     "model": "optional override", "name": "optional output folder name"}
+
+Events:
+    {"event": "pong"}
+    {"event": "queued", "job": ...}
+    {"event": "started", "job": ...}
+    {"event": "stage", "job": ..., "stage": ..., "status": ..., "output_file": ...,
+     "changed": [files whose content changed]}
+    {"event": "done", "job": ..., "output_folder": ..., "results": {stage: status},
+     "changed": [...]}
+    {"event": "error", "message": ...}
+"""
+
+import asyncio
+import json
+import socket
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8737
+DEFAULT_WORKERS = 4
+# Longest accepted request line
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+class ServerError(RuntimeError):
+    """Raised when a job request is invalid."""
+
+
+class PlanServer:
+    """
+    Run pipeline jobs for many clients on a bounded pool of async workers.
+
+    Args:
+        input_root: Folder containing one template folder per category
+        output_root: Folder where each job writes ``<category>/<name>``
+        model: Default LLM model
+        retry: Number of retry attempts per stage
+        workers: Maximum number of jobs running at the same time
+        **litellm_kwargs: Additional arguments for litellm (e.g. cache)
+    """
+
+    def __init__(
+        self,
+        input_root: Path,
+        output_root: Path,
+        model: str,
+        retry: int = 5,
+        workers: int = DEFAULT_WORKERS,
+        **litellm_kwargs,
+    ):
+        self.input_root = Path(input_root)
+        self.output_root = Path(output_root)
+        self.model = model
+        self.retry = retry
+        self.workers = asyncio.Semaphore(max(1, workers))
+        self.litellm_kwargs = litellm_kwargs
+        self.server = None
+
+    async def start(self, port: int = DEFAULT_PORT, socket_path: str = None):
+        """
+        Start listening on localhost or on a Unix socket.
+
+        Returns:
+            asyncio.Server: The listening server
+        """
+        # Import the generation stack once, before the first job arrives
+        import uplan.process  # noqa: F401
+
+        if socket_path:
+            self.server = await asyncio.start_unix_server(
+                self.handle, path=socket_path, limit=MAX_REQUEST_SIZE
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle, DEFAULT_HOST, port, limit=MAX_REQUEST_SIZE
+            )
+        return self.server
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one connection: read a request line and stream events back."""
+
+        def emit(event: dict) -> None:
+            writer.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        try:
+            line = await reader.readline()
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ServerError(f"Invalid request: {e}")
+
+            action = request.get("action")
+            if action == "ping":
+                emit({"event": "pong"})
+            elif action == "run":
+                await self.run_job(request, emit)
+            else:
+                raise ServerError(f"Unknown action '{action}'")
+        except Exception as e:
+            emit({"event": "error", "message": str(e)})
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def resolve_job(self, request: dict) -> tuple[Path, Path, dict]:
+        """
+        Validate a run request.
+
+        Returns:
+            tuple[Path, Path, dict]: (input folder, output folder, answers)
+
+        Raises:
+            ServerError: If the category or name is invalid, or the answers do
+                not match the questions of the category's pipeline
+        """
+        category = request.get("category", "dev")
+        name = request.get("name") or uuid.uuid4().hex[:8]
+        for value in (category, name):
+            if not isinstance(value, str) or Path(value).name != value or value in ("", ".", ".."):
+                raise ServerError(f"Invalid name '{value}'")
+
+        input_folder = self.input_root / category
+        if not input_folder.is_dir():
+            raise ServerError(f"Unknown category '{category}'")
+
+        answers = request.get("answers", {})
+        if not isinstance(answers, dict):
+            raise ServerError("answers must be an object of {section: {key: answer}}")
+
+        from uplan.pipeline import load_pipeline
+        from uplan.question import validate_answers
+        from uplan.utils.templates import load_template
+
+        # Checked like --answers, so a bad job is rejected before it is queued
+        try:
+            stages = load_pipeline(input_folder)
+            questions = [stage for stage in stages.values() if stage["questions"]]
+            if questions:
+                template = load_template(input_folder / questions[0]["template"])
+                validate_answers(template.questions or [], answers)
+        except (OSError, ValueError) as e:
+            raise ServerError(f"Invalid answers: {e}")
+
+        return input_folder, self.output_root / category / name, answers
+
+    async def run_job(self, request: dict, emit) -> None:
+        """Run the pipeline of a category for one set of answers."""
+        from uplan.pipeline import load_pipeline
+        from uplan.process import prepare_answers_cli, run_pipeline_async
+
+        input_folder, output_folder, answers = self.resolve_job(request)
+        job = output_folder.name
+        emit({"event": "queued", "job": job})
+
+        async with self.workers:
+            emit({"event": "started", "job": job})
+            stages = load_pipeline(input_folder)
+            questions = [stage for stage in stages.values() if stage["questions"]]
+            answers_data = (
+                prepare_answers_cli(input_folder, answers, questions[0]["template"])
+                if questions
+                else None
+            )
+            output_folder.mkdir(parents=True, exist_ok=True)
+
+            def on_stage(name: str, response: dict) -> None:
+                emit(
+                    {
+                        "event": "stage",
+                        "job": job,
+                        "stage": name,
+                        "status": response.get("status"),
+                        "output_file": response.get("output_file"),
+                        "changed": response.get("changed"),
+                        "message": response.get("message"),
+                    }
+                )
+
+            results = await run_pipeline_async(
+                input_folder,
+                output_folder,
+                request.get("model") or self.model,
+                self.retry,
+                stages,
+                answers_data,
+                on_stage=on_stage,
+                **self.litellm_kwargs,
+            )
+
+        emit(
+            {
+                "event": "done",
+                "job": job,
+                "output_folder": str(output_folder),
+                "results": {name: response.get("status") for name, response in results.items()},
+                "changed": [
+                    path for response in results.values() for path in response.get("changed") or []
+                ],
+            }
+        )
+
+
+async def serve_async(
+    server: PlanServer, port: int = DEFAULT_PORT, socket_path: str = None
+) -> None:
+    """Run a server until it is cancelled."""
+    listener = await server.start(port=port, socket_path=socket_path)
+    async with listener:
+        await listener.serve_forever()
+
+
+def serve(server: PlanServer, port: int = DEFAULT_PORT, socket_path: str = None) -> None:
+    """Synchronous entry point for serve_async()."""
+    asyncio.run(serve_async(server, port=port, socket_path=socket_path))
+
+
+def submit(
+    request: dict, port: int = DEFAULT_PORT, socket_path: str = None
+) -> Iterator[dict]:
+    """
+    Send a request to a running server and yield its events.
+
+    Only the standard library is used, so the client starts instantly.
+    """
+    if socket_path:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+    else:
+        connection = socket.create_connection((DEFAULT_HOST, port))
+
+    with connection, connection.makefile("r", encoding="utf-8") as events:
+        connection.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        for line in events:
+            yield json.loads(line)
@@ -0,0 +1,141 @@
+"""
+Module for caching LLM responses on disk.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "uplan"
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024  # 100 MB
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
+# litellm arguments that change the generated output and therefore the cache key
+CACHE_KEY_KWARGS = (
+    "temperature",
+    "top_p",
+    "top_k",
+    "max_tokens",
+    "max_completion_tokens",
+    "seed",
+    "stop",
+    "n",
+    "presence_penalty",
+    "frequency_penalty",
+    "response_format",
+    "reasoning_effort",
+    "api_base",
+)
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of model responses.
+
+    Each entry stores the raw response text and the parsed JSON data in a
+    ``<key>.json`` file. Entries are evicted least-recently-used first once the
+    cache grows beyond ``max_size`` bytes, and expire after ``max_age`` seconds.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, model: str, prompt: str | list[dict], **litellm_kwargs) -> str:
+        """Build the cache key for a model, prompt messages and litellm arguments."""
+        relevant = {
+            key: litellm_kwargs[key]
+            for key in CACHE_KEY_KWARGS
+            if litellm_kwargs.get(key) is not None
+        }
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "kwargs": relevant},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        """
+        Return the cached entry for a key and mark it as recently used.
+
+        Returns:
+            dict | None: Entry with "text" and "data" keys, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        if time.time() - entry.get("created", 0) > self.max_age:
+            self.delete(key)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, text: str, data: dict) -> None:
+        """Store a response and evict old entries if the cache is too large."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"text": text, "data": data, "created": time.time()},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        """Remove an entry from the cache if it exists."""
+        self._path(key).unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        """Drop expired entries, then least-recently-used ones until under max_size."""
+        if not self.cache_dir.exists():
+            return
+
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    @property
+    def stats(self) -> dict:
+        """Hit and miss counters for this cache instance."""
+        return {"hits": self.hits, "misses": self.misses}
@@ -1,5 +1,8 @@
+import io
 from typing import Dict
 
+from uplan.utils.formats import MarkdownWriter, render_todo
+
 
 def add_completed_status(data: Dict) -> Dict:
     """
@@ -13,28 +16,31 @@ def add_completed_status(data: Dict) -> Dict:
         data: A dictionary containing sections with tasks or categories of tasks
 
     Returns:
-        The modified dictionary with 'completed' status added to all tasks
+        A copy of the data with 'completed' status added to all tasks; the
+        input is left unchanged
     """
-    # Iterate through each section in the data
-    paths = [
-        lambda d, section: d[section]["categories"],
-        lambda d, section: [d[section]],
-    ]
+    result = {}
+    for section, content in data.items():
+        if not isinstance(content, dict):
+            result[section] = content
+            continue
+        content = with_completed_tasks(content)
+        if isinstance(content.get("categories"), list):
+            content["categories"] = [
+                with_completed_tasks(category) if isinstance(category, dict) else category
+                for category in content["categories"]
+            ]
+        result[section] = content
 
-    for section in data:
-        for path_func in paths:
-            try:
-                containers = path_func(data, section)
-                for container in containers:
-                    if "tasks" in container:
-                        container["tasks"] = [
-                            {"task": task, "completed": False}
-                            for task in container["tasks"]
-                        ]
-            except (KeyError, TypeError):
-                continue
+    return result
 
-    return data
+
+def with_completed_tasks(container: Dict) -> Dict:
+    """Copy a container, turning its tasks into {"task": ..., "completed": False}."""
+    container = dict(container)
+    if "tasks" in container:
+        container["tasks"] = [{"task": task, "completed": False} for task in container["tasks"]]
+    return container
 
 
 def toml_to_markdown(data) -> str:
@@ -50,42 +56,6 @@ def toml_to_markdown(data) -> str:
     Returns:
         str: A formatted Markdown string representation of the input TOML data
     """
-    markdown = ""
-
-    # Iterate through each section
-    for section, content in data.items():
-        # Convert section name to markdown header (e.g., "environment_setup" -> "Environment Setup")
-        section_name = " ".join(word.capitalize() for word in section.split("_"))
-        markdown += f"## {section_name}\n\n"
-
-        # Dynamically process section content
-        if isinstance(content, dict):
-            for key, value in content.items():
-                # Format key name (e.g., "frameworks" -> "Frameworks")
-                key_name = key.capitalize()
-                markdown += f"### {key_name}\n\n"
-
-                # Process arrays as lists
-                if isinstance(value, list):
-                    # Special handling for categories
-                    if key.lower() == "categories":
-                        for category in value:
-                            if isinstance(category, dict) and "title" in category:
-                                markdown += f"\n#### {category['title']}\n"
-                                if "tasks" in category:
-                                    for task in category["tasks"]:
-                                        markdown += f"- [ ] {task}\n"
-                                markdown += "\n"
-                    # Regular list processing
-                    else:
-                        for item in value:
-                            markdown += f"- {item}\n"
-                # Process single values as plain text
-                else:
-                    markdown += f"{value}\n"
-                markdown += "\n"
-        # Handle non-dictionary values
-        elif content is not None:
-            markdown += f"{content}\n\n"
-
-    return markdown
+    markdown = io.StringIO()
+    render_todo(data, [MarkdownWriter(markdown)])
+    return markdown.getvalue()
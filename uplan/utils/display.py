@@ -1,26 +1,95 @@
 import json
 
 from rich.console import Console
-from rich.json import JSON
-from rich.live import Live
 from rich.panel import Panel
-from rich.syntax import Syntax
 from rich.text import Text
 
 from typing import Dict
 
+from uplan.utils.renderers import StreamRenderer, get_renderer
 
-def display_streaming(stream):
-    text = Text()
-    panel = Panel(text, title="Streaming Response", border_style="blue")
 
-    with Live(panel, vertical_overflow="visible", refresh_per_second=1) as live:
+def close_stream(stream) -> None:
+    """Stop a completion stream early, closing the underlying connection if possible."""
+    for target in (stream, getattr(stream, "completion_stream", None)):
+        close = getattr(target, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+            return
+
+
+def display_streaming(
+    stream,
+    on_chunk=None,
+    renderer: StreamRenderer | str = "auto",
+    on_usage=None,
+):
+    """
+    Render a completion stream and return the full text.
+
+    Args:
+        stream: Streaming response from litellm.completion
+        on_chunk: Optional callback receiving each content delta. If it raises,
+            the stream is closed and the exception is propagated.
+        renderer: StreamRenderer instance or renderer name
+            ("auto", "rich", "plain" or "silent")
+        on_usage: Optional callback receiving the token usage, which is sent
+            with the last chunk when stream_options include_usage is set
+    """
+    if isinstance(renderer, str):
+        renderer = get_renderer(renderer)
+
+    parts = []
+    with renderer:
         for chunk in stream:
+            if on_usage and getattr(chunk, "usage", None):
+                on_usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+                renderer.write(content)
+                if on_chunk:
+                    try:
+                        on_chunk(content)
+                    except Exception:
+                        close_stream(stream)
+                        raise
+
+    return "".join(parts)
+
+
+async def collect_streaming_async(stream, on_chunk=None, on_usage=None) -> str:
+    """
+    Collect an async completion stream into a string without rendering it.
+
+    The stream is closed if on_chunk raises or the task is cancelled.
+    """
+    parts = []
+    try:
+        async for chunk in stream:
+            if on_usage and getattr(chunk, "usage", None):
+                on_usage(chunk.usage)
+            if not chunk.choices:
+                continue
             if chunk.choices[0].delta.content:
-                text.append(chunk.choices[0].delta.content)
-                live.update(panel)
+                parts.append(chunk.choices[0].delta.content)
+                if on_chunk:
+                    on_chunk(chunk.choices[0].delta.content)
+    except BaseException:
+        aclose = getattr(stream, "aclose", None)
+        if callable(aclose):
+            try:
+                await aclose()
+            except Exception:
+                pass
+        raise
 
-    return text.plain
+    return "".join(parts)
 
 
 def display_text_panel(text, **panel_kwargs):
@@ -64,6 +133,8 @@ def display_syntax_panel(
     Returns:
         None: Prints the formatted panel to the console
     """
+    from rich.syntax import Syntax
+
     console = Console()
 
     syntax = Syntax(code, lexer, theme=theme, dedent=dedent, word_wrap=word_wrap)
@@ -83,6 +154,8 @@ def display_json_panel(data: Dict, **panel_kwargs) -> str:
     Returns:
         None: Prints the formatted panel to the console
     """
+    from rich.json import JSON
+
     console = Console()
 
     dumped = json.dumps(data)
@@ -1,7 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import hashlib
 import os
 import subprocess
 import platform
+import tempfile
 
 
 def ensure_directory(path: Path) -> None:
@@ -23,6 +26,129 @@ def ensure_file(path: Path, content: str = "") -> None:
         raise RuntimeError(f"Failed to create file {path}: {str(e)}")
 
 
+def file_digest(path: Path) -> str | None:
+    """SHA-256 of a file's content, or None if the file does not exist"""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def same_content(path: Path, other: Path) -> bool:
+    """Whether two files exist and hold the same bytes"""
+    try:
+        if os.path.getsize(path) != os.path.getsize(other):
+            return False
+    except FileNotFoundError:
+        return False
+    return file_digest(path) == file_digest(other)
+
+
+def fsync_directory(path: Path) -> None:
+    """Flush a directory entry (e.g. after a rename) to disk where supported"""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicFile:
+    """
+    A file written to a temporary file next to its destination.
+
+    commit() fsyncs the temporary file and renames it over the destination,
+    so readers see either the old or the new content, never a partial
+    write. When the content is unchanged, the destination is left untouched
+    and the temporary file is removed.
+
+    Used as a context manager, the file is committed on success and discarded
+    on error:
+
+        with AtomicFile(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    """
+
+    def __init__(self, path: Path, mode: str = "w", **open_kwargs):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        self.tmp_path = Path(tmp_path)
+        self.file = os.fdopen(fd, mode, **open_kwargs)
+        self.changed = None
+
+    def commit(self) -> bool:
+        """
+        Move the written content into place.
+
+        Returns:
+            bool: Whether the destination changed
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if same_content(self.path, self.tmp_path):
+            self.tmp_path.unlink()
+            self.changed = False
+        else:
+            os.replace(self.tmp_path, self.path)
+            fsync_directory(self.path.parent)
+            self.changed = True
+        return self.changed
+
+    def discard(self) -> None:
+        """Drop the written content, leaving the destination untouched"""
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def commit_files(files: list[AtomicFile]) -> list[Path]:
+    """
+    Commit several atomic files concurrently.
+
+    Returns:
+        list[Path]: Destinations whose content changed
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(files))) as executor:
+        changed = list(executor.map(AtomicFile.commit, files))
+    return [file.path for file, is_changed in zip(files, changed) if is_changed]
+
+
+def write_file_atomic(path: Path, content: bytes) -> bool:
+    """
+    Atomically write bytes to a file unless it already holds them.
+
+    Returns:
+        bool: Whether the file changed
+    """
+    path = Path(path)
+    try:
+        if os.path.getsize(path) == len(content):
+            if file_digest(path) == hashlib.sha256(content).hexdigest():
+                return False
+    except FileNotFoundError:
+        pass
+
+    atomic = AtomicFile(path, "wb")
+    with atomic as f:
+        f.write(content)
+    return atomic.changed
+
+
 def validate_file(path: Path) -> bool:
     """Validate that a file exists and is readable"""
     try:
@@ -32,13 +158,18 @@ def validate_file(path: Path) -> bool:
 
 
 def open_file(file_path: str) -> None:
-    """Open a file with the default associated application"""
+    """Open a file with the default associated application, without waiting for it"""
     try:
         if platform.system() == "Windows":
             os.startfile(file_path)
-        elif platform.system() == "Darwin":  # macOS
-            subprocess.call(["open", file_path])
-        else:  # Linux
-            subprocess.call(["xdg-open", file_path])
+        else:
+            opener = "open" if platform.system() == "Darwin" else "xdg-open"
+            subprocess.Popen(
+                [opener, file_path],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
     except Exception as e:
         print(f"Warning: Could not open file {file_path}: {e}")
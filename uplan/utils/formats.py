@@ -0,0 +1,434 @@
+"""
+Module for writing to-do lists in several file formats in a single pass.
+
+A to-do list is walked once and every event (section, field, task, ...) is
+passed to one writer per format, which writes to its file as it goes. The
+source data is never modified.
+"""
+
+import csv
+import html
+import json
+from json.encoder import encode_basestring
+from pathlib import Path
+from typing import Any, TextIO
+
+from uplan.utils.file import AtomicFile, commit_files
+
+DEFAULT_FORMATS = ("md", "json")
+
+
+def title_case(name: str) -> str:
+    """Turn a key into a heading, e.g. "environment_setup" -> "Environment Setup"."""
+    return " ".join(word.capitalize() for word in name.split("_"))
+
+
+class TodoWriter:
+    """
+    Base class for the writers used by render_todo().
+
+    Events arrive in document order:
+        section_start(name) ... section_end()
+        section_value(name, value) for sections that are not tables
+        field(key, value) for plain values of a section or category
+        tasks_start(key), task(text) ..., tasks_end()
+        categories_start(key), category_start(category) ... category_end(),
+        categories_end()
+
+    Tasks inside category_start/category_end belong to that category.
+    """
+
+    suffix = ""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    def start(self) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def section_start(self, name: str) -> None:
+        pass
+
+    def section_end(self) -> None:
+        pass
+
+    def section_value(self, name: str, value: Any) -> None:
+        pass
+
+    def field(self, key: str, value: Any) -> None:
+        pass
+
+    def tasks_start(self, key: str) -> None:
+        pass
+
+    def task(self, text: str) -> None:
+        raise NotImplementedError
+
+    def tasks_end(self) -> None:
+        pass
+
+    def categories_start(self, key: str) -> None:
+        pass
+
+    def category_start(self, category: dict) -> None:
+        pass
+
+    def category_end(self) -> None:
+        pass
+
+    def categories_end(self) -> None:
+        pass
+
+
+class MarkdownWriter(TodoWriter):
+    """Markdown with a heading per section and a checkbox per categorized task."""
+
+    suffix = "md"
+
+    def __init__(self, file: TextIO):
+        super().__init__(file)
+        self.in_category = False
+
+    def section_start(self, name: str) -> None:
+        self.file.write(f"## {title_case(name)}\n\n")
+
+    def section_value(self, name: str, value: Any) -> None:
+        self.section_start(name)
+        if value is not None:
+            self.file.write(f"{value}\n\n")
+
+    def field(self, key: str, value: Any) -> None:
+        if self.in_category:
+            return
+        self.file.write(f"### {key.capitalize()}\n\n")
+        if isinstance(value, list):
+            for item in value:
+                self.file.write(f"- {item}\n")
+        else:
+            self.file.write(f"{value}\n")
+        self.file.write("\n")
+
+    def tasks_start(self, key: str) -> None:
+        if not self.in_category:
+            self.file.write(f"### {key.capitalize()}\n\n")
+
+    def task(self, text: str) -> None:
+        self.file.write(f"- [ ] {text}\n" if self.in_category else f"- {text}\n")
+
+    def tasks_end(self) -> None:
+        if not self.in_category:
+            self.file.write("\n")
+
+    def categories_start(self, key: str) -> None:
+        self.file.write(f"### {key.capitalize()}\n\n")
+
+    def category_start(self, category: dict) -> None:
+        self.in_category = True
+        if "title" in category:
+            self.file.write(f"\n#### {category['title']}\n")
+
+    def category_end(self) -> None:
+        self.in_category = False
+        self.file.write("\n")
+
+    def categories_end(self) -> None:
+        self.file.write("\n")
+
+
+class ChecklistWriter(TodoWriter):
+    """
+    JSON with every task turned into {"task": ..., "completed": false}.
+
+    The output is identical to json.dump(add_completed_status(data), indent=2).
+    """
+
+    suffix = "json"
+
+    def __init__(self, file: TextIO):
+        super().__init__(file)
+        self.counts = []  # items written per open container
+
+    def _item(self, key: str | None) -> None:
+        if self.counts[-1]:
+            self.file.write(",")
+        self.counts[-1] += 1
+        self.file.write("\n" + "  " * len(self.counts))
+        if key is not None:
+            self.file.write(json.dumps(key, ensure_ascii=False) + ": ")
+
+    def _open(self, key: str | None, bracket: str) -> None:
+        if self.counts:
+            self._item(key)
+        self.file.write(bracket)
+        self.counts.append(0)
+
+    def _close(self, bracket: str) -> None:
+        if self.counts.pop():
+            self.file.write("\n" + "  " * len(self.counts))
+        self.file.write(bracket)
+
+    def _value(self, key: str | None, value: Any) -> None:
+        self._item(key)
+        text = json.dumps(value, indent=2, ensure_ascii=False)
+        self.file.write(text.replace("\n", "\n" + "  " * len(self.counts)))
+
+    def start(self) -> None:
+        self._open(None, "{")
+
+    def end(self) -> None:
+        self._close("}")
+
+    def section_start(self, name: str) -> None:
+        self._open(name, "{")
+
+    def section_end(self) -> None:
+        self._close("}")
+
+    def section_value(self, name: str, value: Any) -> None:
+        self._value(name, value)
+
+    def field(self, key: str, value: Any) -> None:
+        self._value(key, value)
+
+    def tasks_start(self, key: str) -> None:
+        self._open(key, "[")
+
+    def task(self, text: str) -> None:
+        if not isinstance(text, str):
+            self._value(None, {"task": text, "completed": False})
+            return
+        # Tasks are by far the most frequent event, so they skip json.dumps()
+        self._item(None)
+        indent = "\n" + "  " * len(self.counts)
+        self.file.write(
+            f'{{{indent}  "task": {encode_basestring(text)},{indent}  "completed": false{indent}}}'
+        )
+
+    def tasks_end(self) -> None:
+        self._close("]")
+
+    def categories_start(self, key: str) -> None:
+        self._open(key, "[")
+
+    def category_start(self, category: dict) -> None:
+        self._open(None, "{")
+
+    def category_end(self) -> None:
+        self._close("}")
+
+    def categories_end(self) -> None:
+        self._close("]")
+
+
+class CsvWriter(TodoWriter):
+    """One row per task: section, category, task, completed."""
+
+    suffix = "csv"
+
+    def __init__(self, file: TextIO):
+        super().__init__(file)
+        self.writer = csv.writer(file)
+        self.section = None
+        self.category = ""
+
+    def start(self) -> None:
+        self.writer.writerow(["section", "category", "task", "completed"])
+
+    def section_start(self, name: str) -> None:
+        self.section = name
+
+    def task(self, text: str) -> None:
+        self.writer.writerow([self.section, self.category, text, "false"])
+
+    def category_start(self, category: dict) -> None:
+        self.category = category.get("title", "")
+
+    def category_end(self) -> None:
+        self.category = ""
+
+
+class HtmlWriter(TodoWriter):
+    """A standalone HTML page with a checkbox per task."""
+
+    suffix = "html"
+
+    def __init__(self, file: TextIO):
+        super().__init__(file)
+        self.in_category = False
+
+    def start(self) -> None:
+        self.file.write(
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            "<title>To-do</title>\n</head>\n<body>\n"
+        )
+
+    def end(self) -> None:
+        self.file.write("</body>\n</html>\n")
+
+    def section_start(self, name: str) -> None:
+        self.file.write(f"<section>\n<h2>{html.escape(title_case(name))}</h2>\n")
+
+    def section_end(self) -> None:
+        self.file.write("</section>\n")
+
+    def section_value(self, name: str, value: Any) -> None:
+        self.section_start(name)
+        if value is not None:
+            self.file.write(f"<p>{html.escape(str(value))}</p>\n")
+        self.section_end()
+
+    def field(self, key: str, value: Any) -> None:
+        if self.in_category:
+            return
+        self.file.write(f"<h3>{html.escape(key.capitalize())}</h3>\n")
+        if isinstance(value, list):
+            items = "".join(f"<li>{html.escape(str(item))}</li>\n" for item in value)
+            self.file.write(f"<ul>\n{items}</ul>\n")
+        else:
+            self.file.write(f"<p>{html.escape(str(value))}</p>\n")
+
+    def tasks_start(self, key: str) -> None:
+        if not self.in_category:
+            self.file.write(f"<h3>{html.escape(key.capitalize())}</h3>\n")
+        self.file.write("<ul>\n")
+
+    def task(self, text: str) -> None:
+        self.file.write(f'<li><label><input type="checkbox"> {html.escape(text)}</label></li>\n')
+
+    def tasks_end(self) -> None:
+        self.file.write("</ul>\n")
+
+    def categories_start(self, key: str) -> None:
+        self.file.write(f"<h3>{html.escape(key.capitalize())}</h3>\n")
+
+    def category_start(self, category: dict) -> None:
+        self.in_category = True
+        if "title" in category:
+            self.file.write(f"<h4>{html.escape(str(category['title']))}</h4>\n")
+
+    def category_end(self) -> None:
+        self.in_category = False
+
+
+FORMATS = {
+    "md": MarkdownWriter,
+    "json": ChecklistWriter,
+    "csv": CsvWriter,
+    "html": HtmlWriter,
+}
+
+
+def parse_formats(value: str | list[str]) -> tuple[str, ...]:
+    """
+    Split a comma-separated --formats value.
+
+    Raises:
+        ValueError: If a format is unknown
+    """
+    names = value if isinstance(value, (list, tuple)) else value.split(",")
+    formats = tuple(dict.fromkeys(name.strip().lower() for name in names if name.strip()))
+    for name in formats:
+        if name not in FORMATS:
+            raise ValueError(f"Unknown format '{name}'. Choose from: {', '.join(FORMATS)}")
+    return formats
+
+
+def _is_task_list(key: str, value: Any) -> bool:
+    return key == "tasks" and isinstance(value, list)
+
+
+def _is_category_list(key: str, value: Any) -> bool:
+    return bool(
+        key == "categories"
+        and isinstance(value, list)
+        and value
+        and all(isinstance(item, dict) for item in value)
+    )
+
+
+def _emit_tasks(emit, key: str, tasks: list) -> None:
+    emit("tasks_start", key)
+    for task in tasks:
+        emit("task", task)
+    emit("tasks_end")
+
+
+def _emit_categories(emit, key: str, categories: list[dict]) -> None:
+    emit("categories_start", key)
+    for category in categories:
+        emit("category_start", category)
+        for field, value in category.items():
+            if _is_task_list(field, value):
+                _emit_tasks(emit, field, value)
+            else:
+                emit("field", field, value)
+        emit("category_end")
+    emit("categories_end")
+
+
+def render_todo(data: dict, writers: list[TodoWriter]) -> None:
+    """
+    Walk a to-do list once, passing every event to all writers.
+
+    Sections are either tables with plain fields, a "tasks" list and a
+    "categories" list of {"title", "tasks"} tables, or plain values. Events
+    follow the insertion order of the data, so every format keeps the order
+    in which the model wrote the to-do list.
+    """
+
+    def emit(event: str, *args) -> None:
+        for writer in writers:
+            getattr(writer, event)(*args)
+
+    emit("start")
+    for name, content in data.items():
+        if not isinstance(content, dict):
+            emit("section_value", name, content)
+            continue
+        emit("section_start", name)
+        for key, value in content.items():
+            if _is_task_list(key, value):
+                _emit_tasks(emit, key, value)
+            elif _is_category_list(key, value):
+                _emit_categories(emit, key, value)
+            else:
+                emit("field", key, value)
+        emit("section_end")
+    emit("end")
+
+
+def write_todo(
+    data: dict, output_folder: Path, formats: tuple[str, ...] = DEFAULT_FORMATS, name: str = "todo"
+) -> list[Path]:
+    """
+    Write a to-do list in the given formats as <name>.<suffix> files.
+
+    Every file is written atomically and left untouched if its content did
+    not change (see AtomicFile).
+
+    Returns:
+        list[Path]: The files whose content changed
+    """
+    output_folder = Path(output_folder)
+    formats = parse_formats(formats)
+    files = []
+    try:
+        for format in formats:
+            # The csv module writes its own line endings
+            files.append(
+                AtomicFile(
+                    output_folder / f"{name}.{FORMATS[format].suffix}",
+                    "w",
+                    encoding="utf-8",
+                    newline="" if format == "csv" else None,
+                )
+            )
+        render_todo(data, [FORMATS[format](file.file) for format, file in zip(formats, files)])
+    except BaseException:
+        for file in files:
+            file.discard()
+        raise
+    return commit_files(files)
@@ -0,0 +1,83 @@
+"""
+Module for hedging requests across an ordered list of models.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable
+
+# Seconds to wait for a first token before the next model is also asked
+DEFAULT_HEDGE_AFTER = 15.0
+
+
+def parse_models(model: str | list[str]) -> list[str]:
+    """Split a comma-separated --model value into an ordered list of models."""
+    if isinstance(model, (list, tuple)):
+        return list(model)
+    return [name.strip() for name in model.split(",") if name.strip()]
+
+
+async def hedge(
+    models: list[str],
+    attempt: Callable[[str, asyncio.Event], Awaitable[Any]],
+    hedge_after: float = DEFAULT_HEDGE_AFTER,
+) -> tuple[str, Any]:
+    """
+    Race attempts against several models, adding one model at a time.
+
+    The first model is started immediately. While no running attempt has
+    produced a first token, the next model is started every ``hedge_after``
+    seconds. When an attempt fails and nothing else is running, the next
+    model is started right away. The first attempt that returns wins and the
+    others are cancelled.
+
+    Args:
+        models: Models in order of preference
+        attempt: Coroutine function called as attempt(model, first_token);
+            it must set the event when the first token arrives and raise if
+            the response is unusable
+        hedge_after: Deadline for the first token, in seconds
+
+    Returns:
+        tuple[str, Any]: (winning model, result of its attempt)
+
+    Raises:
+        Exception: The error of the last failed attempt if all models fail
+    """
+    running = {}
+    remaining = list(models)
+    error = None
+
+    def launch() -> None:
+        model = remaining.pop(0)
+        first_token = asyncio.Event()
+        running[asyncio.create_task(attempt(model, first_token))] = (model, first_token)
+
+    launch()
+    try:
+        while running:
+            waiting = not any(first_token.is_set() for _, first_token in running.values())
+            done, _ = await asyncio.wait(
+                running,
+                timeout=hedge_after if remaining and waiting else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                if not any(first_token.is_set() for _, first_token in running.values()):
+                    launch()
+                continue
+
+            for task in done:
+                model, _ = running.pop(task)
+                if task.exception() is None:
+                    return model, task.result()
+                error = task.exception()
+
+            if not running and remaining:
+                launch()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    raise error
@@ -0,0 +1,209 @@
+"""
+Module for indexing accepted documents of past runs by the similarity of their inputs.
+
+Every accepted plan is indexed with the answers it was generated from, and
+every accepted to-do list with its plan. A new run looks up the most similar
+earlier input generated with the same template: an identical input returns
+its document directly, a similar one supplies a draft (see process.py).
+
+Similarity is the Jaccard similarity of the inputs' word features, estimated
+with MinHash signatures, so lookups need neither the network nor a model.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from uplan.utils.journal import content_hash
+
+# Folder of the index inside the response cache folder
+INDEX_SUBDIR = "index"
+INDEX_FILE = "documents.jsonl"
+
+DEFAULT_SIMILARITY = 0.8
+
+NUM_HASHES = 64
+_PRIME = (1 << 61) - 1
+# Fixed seed, so signatures written by earlier runs stay comparable
+_rng = random.Random(0x75706C616E)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(NUM_HASHES)]
+
+_WORD = re.compile(r"\w+")
+
+
+def input_features(data, path: str = "") -> set[str]:
+    """
+    Word and word-pair features of every text in nested data.
+
+    Features are prefixed with the path of dictionary keys leading to the
+    text, so "mysql" as the database differs from "mysql" in an overview.
+    """
+    if isinstance(data, dict):
+        return set().union(
+            *(
+                input_features(value, f"{path}.{key}" if path else str(key))
+                for key, value in data.items()
+            )
+        )
+    if isinstance(data, list):
+        return set().union(*(input_features(value, path) for value in data))
+
+    words = _WORD.findall(str(data).lower())
+    features = {f"{path}:{word}" for word in words}
+    features.update(f"{path}:{a} {b}" for a, b in zip(words, words[1:]))
+    # Keeps an empty answer distinct from a missing one
+    features.add(path)
+    return features
+
+
+def minhash(features: set[str]) -> list[int]:
+    """MinHash signature of a feature set; empty for an empty set."""
+    if not features:
+        return []
+    hashes = [
+        int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big")
+        for f in features
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(a: list[int], b: list[int]) -> float:
+    """Estimated Jaccard similarity of the feature sets of two signatures."""
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def template_hash(prompt: dict, key: str) -> str:
+    """Hash of a prompt without its input, identifying the template it was built from."""
+    return content_hash({**prompt, key: None})
+
+
+class DocumentIndex:
+    """
+    Accepted documents with the inputs they were generated from.
+
+    Entries are appended as JSON lines to ``documents.jsonl`` in index_dir:
+    stage, template hash, input hash, MinHash signature, input and document.
+    The file is shared between runs and reloaded when another run appended to
+    it. Without index_dir nothing is indexed or found.
+    """
+
+    def __init__(self, index_dir: Path = None, threshold: float = DEFAULT_SIMILARITY):
+        self.path = Path(index_dir) / INDEX_FILE if index_dir else None
+        self.threshold = threshold
+        self.entries: list[dict] = []
+        self.stamp = None
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _load(self) -> list[dict]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return self.entries
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self.stamp:
+            entries = []
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A line cut short by an interrupted run
+                        continue
+            self.entries, self.stamp = entries, stamp
+        return self.entries
+
+    def add(self, stage: str, prompt: dict, key: str, document: dict) -> None:
+        """Index the document generated from prompt, whose input is prompt[key]."""
+        if not self.enabled:
+            return
+        inputs = prompt.get(key) or {}
+        entry = {
+            "stage": stage,
+            "template": template_hash(prompt, key),
+            "input_hash": content_hash(inputs),
+            "document_hash": content_hash(document),
+            "signature": minhash(input_features(inputs)),
+            "inputs": inputs,
+            "document": document,
+            "created": time.time(),
+        }
+        with self.lock:
+            if any(
+                e["stage"] == stage
+                and e["template"] == entry["template"]
+                and e["input_hash"] == entry["input_hash"]
+                and e["document_hash"] == entry["document_hash"]
+                for e in self._load()
+            ):
+                return
+            try:
+                line = json.dumps(entry, ensure_ascii=False) + "\n"
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except (OSError, TypeError):
+                # Unwritable folders and TOML dates only leave the document unindexed
+                pass
+
+    def find(self, stage: str, prompt: dict, key: str) -> tuple[float, dict] | None:
+        """
+        Find the earlier entry whose input is most similar to prompt[key].
+
+        Only entries of the same stage and template are considered. An entry
+        with the same input is preferred, the latest one if there are several.
+
+        Returns:
+            tuple[float, dict] | None: (similarity, entry), or None if no
+                entry reaches the threshold
+        """
+        if not self.enabled:
+            return None
+        inputs = prompt.get(key) or {}
+        template, input_hash = template_hash(prompt, key), content_hash(inputs)
+        with self.lock:
+            candidates = [
+                e for e in self._load() if e["stage"] == stage and e["template"] == template
+            ]
+        if not candidates:
+            return None
+
+        for entry in reversed(candidates):
+            if entry["input_hash"] == input_hash:
+                return 1.0, entry
+
+        signature = minhash(input_features(inputs))
+        score, entry = max(
+            ((similarity(signature, e["signature"]), e) for e in reversed(candidates)),
+            key=lambda pair: pair[0],
+        )
+        return (score, entry) if score >= self.threshold else None
+
+
+_index = DocumentIndex()
+
+
+def configure(index_dir: Path = None, threshold: float = DEFAULT_SIMILARITY) -> DocumentIndex:
+    """Index accepted documents in index_dir, or disable the index if None."""
+    global _index
+    _index = DocumentIndex(index_dir, threshold)
+    return _index
+
+
+def index_document(stage: str, prompt: dict, key: str, document: dict) -> None:
+    """Index a document through the configured index (see DocumentIndex.add)."""
+    _index.add(stage, prompt, key, document)
+
+
+def find_similar(stage: str, prompt: dict, key: str) -> tuple[float, dict] | None:
+    """Look up a document through the configured index (see DocumentIndex.find)."""
+    return _index.find(stage, prompt, key)
@@ -0,0 +1,160 @@
+"""
+Module for journaling a run so that it can be resumed without new model calls.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import tomli_w
+import tomllib
+
+from uplan.utils.file import write_file_atomic
+
+JOURNAL_FILE = "journal.json"
+
+
+def content_hash(data) -> str:
+    """Hash JSON-serializable data independently of key order."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunJournal:
+    """
+    Record of one run, kept as ``journal.json`` in the output folder.
+
+    The journal holds the collected answers and, per stage (keyed by output
+    file name without suffix, e.g. "plan"):
+    - the raw text of the last valid response with the hash of the prompt that
+      produced it, so an unreviewed response is not requested again
+    - the accepted document with its content hash and the prompt it was
+      generated from, which incremental runs compare with the new prompt
+
+    Every change is written to disk immediately, so the journal survives
+    errors, Ctrl-C and exiting at the review prompt.
+    """
+
+    def __init__(self, output_folder: Path):
+        self.path = Path(output_folder) / JOURNAL_FILE
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+        self.entries.setdefault("stages", {})
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _stage(self, stage: str) -> dict:
+        return self.entries["stages"].setdefault(stage, {})
+
+    def reset(self) -> None:
+        """Start a new run, forgetting answers and stages."""
+        self.entries = {"stages": {}}
+        self._save()
+
+    @property
+    def answers(self) -> dict | None:
+        """Collected answers (the plan prompt), or None if not recorded."""
+        return self.entries.get("answers", {}).get("data")
+
+    def record_answers(self, answers_data: dict) -> None:
+        self.entries["answers"] = {"data": answers_data, "hash": content_hash(answers_data)}
+        self._save()
+
+    def response(self, stage: str, prompt_hash: str) -> str | None:
+        """Return the journaled response text if it was made for the same prompt."""
+        entry = self.entries["stages"].get(stage, {})
+        if entry.get("prompt_hash") == prompt_hash:
+            return entry.get("text")
+        return None
+
+    def record_response(self, stage: str, prompt_hash: str, text: str) -> None:
+        entry = self._stage(stage)
+        entry.update(
+            {
+                "status": "generated",
+                "prompt_hash": prompt_hash,
+                "text": text,
+                "updated": time.time(),
+            }
+        )
+        self._save()
+
+    def discard_response(self, stage: str) -> None:
+        """Forget a response the reviewer rejected."""
+        entry = self._stage(stage)
+        for key in ("prompt_hash", "text"):
+            entry.pop(key, None)
+        entry["status"] = "rejected"
+        self._save()
+
+    def record_accepted(self, stage: str, data: dict, inputs: dict = None) -> None:
+        """
+        Record an accepted document.
+
+        inputs is the prompt the document was generated from; without it, the
+        recorded prompt is kept (e.g. when a document was edited by hand).
+        """
+        entry = self._stage(stage)
+        if inputs is not None:
+            entry["inputs"] = copy.deepcopy(inputs)
+        entry.update(
+            {
+                "status": "accepted",
+                # Copied so that later changes by the caller are not journaled
+                "data": copy.deepcopy(data),
+                "hash": content_hash(data),
+                "updated": time.time(),
+            }
+        )
+        self._save()
+
+    def is_accepted(self, stage: str) -> bool:
+        return self.entries["stages"].get(stage, {}).get("status") == "accepted"
+
+    def inputs(self, stage: str) -> dict | None:
+        """Prompt the accepted document of a stage was generated from, if recorded."""
+        if not self.is_accepted(stage):
+            return None
+        return self.entries["stages"][stage].get("inputs")
+
+    def restore(self, stage: str, output_file: Path, inputs: dict = None) -> dict | None:
+        """
+        Return the accepted document of a stage, making sure its file exists.
+
+        A missing output file is rewritten from the journal. If the file was
+        edited after it was accepted (its content hash changed), the edited
+        version is returned. With inputs, the document is only returned if it
+        was generated from the same prompt.
+
+        Returns:
+            dict | None: Accepted document, or None if the stage is not
+                accepted or was accepted for other inputs
+        """
+        if not self.is_accepted(stage):
+            return None
+
+        entry = self.entries["stages"][stage]
+        if inputs is not None and content_hash(entry.get("inputs")) != content_hash(inputs):
+            return None
+        output_file = Path(output_file)
+        try:
+            with open(output_file, "rb") as f:
+                data = tomllib.load(f)
+        except (FileNotFoundError, tomllib.TOMLDecodeError):
+            write_file_atomic(output_file, tomli_w.dumps(entry["data"]).encode("utf-8"))
+            return copy.deepcopy(entry["data"])
+
+        if content_hash(data) != entry["hash"]:
+            self.record_accepted(stage, data)
+        return data
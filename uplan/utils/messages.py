@@ -0,0 +1,146 @@
+"""
+Module for building chat messages that let providers cache the prompt prefix.
+"""
+
+import json
+
+from uplan.utils.serializers import serialize_prompt
+
+# Prompt keys that only depend on the template. They form the system message,
+# so repeated runs of a template share a byte-identical prefix.
+STATIC_PROMPT_KEYS = ("prompt", "template")
+
+# Sent when a prompt has no variable part, since every request needs a user turn
+DEFAULT_USER_MESSAGE = "Generate the document described in the system message."
+
+# Providers that only cache a prefix marked with cache_control
+CACHE_CONTROL_PROVIDERS = ("anthropic",)
+
+# Serialized system messages by the JSON of their static prompt, so runs of
+# the same template serialize it once. Compiled templates add their
+# precomputed prefix (see templates.py).
+MAX_PREFIXES = 64
+_prefixes: dict[str, str] = {}
+
+
+def split_prompt(prompt: dict) -> tuple[dict, dict]:
+    """Split a prompt dictionary into its static and variable parts."""
+    static = {key: value for key, value in prompt.items() if key in STATIC_PROMPT_KEYS}
+    variable = {key: value for key, value in prompt.items() if key not in STATIC_PROMPT_KEYS}
+    return static, variable
+
+
+def prefix_key(static: dict) -> str:
+    # Key order matters, since it is the order of the serialized text
+    return json.dumps(static, ensure_ascii=False, default=str)
+
+
+def remember_prefix(static: dict, text: str) -> None:
+    """Store the serialized system message of a static prompt."""
+    if len(_prefixes) >= MAX_PREFIXES:
+        _prefixes.pop(next(iter(_prefixes)))
+    _prefixes[prefix_key(static)] = text
+
+
+def serialize_static(static: dict) -> str:
+    """Serialize the static part of a prompt, reusing earlier results."""
+    text = _prefixes.get(prefix_key(static))
+    if text is None:
+        text = serialize_prompt(static)
+        remember_prefix(static, text)
+    return text
+
+
+def supports_cache_control(model: str) -> bool:
+    """
+    Check whether a model needs explicit cache_control markers.
+
+    Anthropic models (direct, on Bedrock or on Vertex AI) only cache marked
+    prefixes. OpenAI, DeepSeek and others cache long prefixes automatically.
+    """
+    import litellm
+
+    try:
+        _, provider, _, _ = litellm.get_llm_provider(model)
+    except Exception:
+        return False
+    return provider in CACHE_CONTROL_PROVIDERS or "claude" in model.lower()
+
+
+def build_messages(prompt: dict, model: str) -> list[dict]:
+    """
+    Build the chat messages for a prompt dictionary.
+
+    The instructions and template go into a system message and the answers,
+    plan or accepted sections into the user message that follows it. Both
+    parts use the serialization format chosen by the template.
+
+    Args:
+        prompt: Compacted prompt dictionary
+        model: Name of the target model
+
+    Returns:
+        list[dict]: Messages for litellm.completion
+    """
+    static, variable = split_prompt(prompt)
+    header = static.get("prompt")
+    format = header.get("format") if isinstance(header, dict) else None
+
+    messages = []
+    if static:
+        system = serialize_static(static)
+        if supports_cache_control(model):
+            system = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        messages.append({"role": "system", "content": system})
+
+    user = serialize_prompt(variable, format) if variable else DEFAULT_USER_MESSAGE
+    messages.append({"role": "user", "content": user})
+    return messages
+
+
+def messages_text(messages: list[dict]) -> str:
+    """Join the text of all messages, e.g. for debug output."""
+    texts = []
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content)
+        texts.append(content)
+    return "\n\n".join(texts)
+
+
+def usage_summary(usage) -> dict | None:
+    """
+    Extract token counts from a litellm usage object.
+
+    Cached prompt tokens are reported as prompt_tokens_details.cached_tokens
+    by OpenAI-compatible providers and as cache_read_input_tokens by Anthropic.
+
+    Returns:
+        dict | None: prompt, completion, cached and cache write token counts
+    """
+    if usage is None:
+        return None
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or getattr(
+        usage, "cache_read_input_tokens", None
+    )
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+        "cached_tokens": cached or 0,
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+
+
+def format_usage(usage: dict) -> str:
+    """Describe a usage summary in one line."""
+    text = f"Usage: {usage['prompt_tokens']} prompt tokens"
+    if usage["cached_tokens"]:
+        text += f" ({usage['cached_tokens']} cached)"
+    if usage["cache_write_tokens"]:
+        text += f" ({usage['cache_write_tokens']} written to cache)"
+    return text + f", {usage['completion_tokens']} completion tokens"
@@ -5,10 +5,8 @@ Module for handling LLM API configuration and setup.
 import os
 from typing import Dict, List, Tuple
 
-import litellm
-from dotenv import load_dotenv
+from uplan.utils.tokens import DEFAULT_OLLAMA_CONTEXT_LENGTH
 
-load_dotenv()
 
 # Define service configurations
 SERVICE_CONFIGS: Dict[str, List[str]] = {
@@ -25,8 +23,16 @@ SERVICE_CONFIGS: Dict[str, List[str]] = {
 }
 
 
+def load_env() -> None:
+    """Load variables from a .env file without overriding the environment."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
 def setup_env(verbose: bool = False) -> None:
     """Set up LLM API environment variables and configurations."""
+    load_env()
     for service, required_configs in SERVICE_CONFIGS.items():
         missing_configs = []
         for config in required_configs:
@@ -55,6 +61,18 @@ def check_model_support(model_name: str) -> Tuple[bool, str]:
         Tuple[bool, str]: (True, '') if model is supported and configured,
                          (False, error_message) otherwise
     """
+    # A comma-separated list of models is supported if every model is
+    if "," in model_name:
+        from uplan.utils.hedge import parse_models
+
+        results = [check_model_support(name) for name in parse_models(model_name)]
+        messages = "\n".join(message for _, message in results)
+        return all(success for success, _ in results), messages
+
+    load_env()
+
+    import litellm
+
     try:
         # Get model provider details
         model_details = litellm.get_llm_provider(model_name)
@@ -65,7 +83,7 @@ def check_model_support(model_name: str) -> Tuple[bool, str]:
 
         if provider == "ollama":
             os.environ["OLLAMA_CONTEXT_LENGTH"] = os.getenv(
-                "OLLAMA_CONTEXT_LENGTH", 2048
+                "OLLAMA_CONTEXT_LENGTH", str(DEFAULT_OLLAMA_CONTEXT_LENGTH)
             )
 
             return True, f"Model: {model}, Provider: {provider}"
@@ -0,0 +1,151 @@
+"""
+Module for rendering streamed LLM responses.
+"""
+
+import sys
+import time
+from typing import TextIO
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.text import Text
+
+
+class StreamRenderer:
+    """
+    Base class for renderers used by display_streaming().
+
+    A renderer is used as a context manager: write() receives every content
+    delta of the stream and close() is called once the stream ends or fails.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, text: str) -> None:
+        """Render one content delta."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finish rendering."""
+
+
+class RichPanelRenderer(StreamRenderer):
+    """
+    Render the response inside a live-updating rich panel.
+
+    While streaming, only the last lines that fit on the screen are laid out,
+    so refresh cost stays bounded however long the response grows. The full
+    response is rendered once when the stream ends.
+    """
+
+    def __init__(self, console: Console = None, refresh_per_second: float = 1):
+        from rich.live import Live
+
+        self.console = console or Console()
+        self.parts = []
+        self.live = Live(
+            self,
+            console=self.console,
+            vertical_overflow="visible",
+            refresh_per_second=refresh_per_second,
+        )
+        self.live.start()
+
+    def __rich__(self) -> Panel:
+        max_lines = max(self.console.height - 4, 1)
+        tail = []
+        lines = 0
+        for part in reversed(self.parts):
+            tail.append(part)
+            lines += part.count("\n")
+            if lines >= max_lines:
+                break
+        text = "".join(reversed(tail)).split("\n")[-max_lines:]
+        return self._panel("\n".join(text))
+
+    def _panel(self, text: str) -> Panel:
+        return Panel(Text(text), title="Streaming Response", border_style="blue")
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+
+    def close(self) -> None:
+        self.live.update(self._panel("".join(self.parts)))
+        self.live.stop()
+
+
+class PlainRenderer(StreamRenderer):
+    """
+    Write the response as plain text, coalescing small deltas.
+
+    Deltas are buffered and flushed once ``flush_size`` characters have
+    accumulated or ``flush_interval`` seconds have passed, which keeps the
+    number of write calls low for token-by-token streams.
+    """
+
+    def __init__(
+        self,
+        file: TextIO = None,
+        flush_size: int = 4096,
+        flush_interval: float = 0.25,
+    ):
+        self.file = file or sys.stdout
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.buffered = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, text: str) -> None:
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if (
+            self.buffered >= self.flush_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.file.flush()
+            self.buffer.clear()
+            self.buffered = 0
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.write("\n")
+        self.file.flush()
+
+
+class SilentRenderer(StreamRenderer):
+    """Discard the response; only the collected text is kept."""
+
+    def write(self, text: str) -> None:
+        pass
+
+
+RENDERERS = {
+    "rich": RichPanelRenderer,
+    "plain": PlainRenderer,
+    "silent": SilentRenderer,
+}
+
+
+def get_renderer(name: str = "auto") -> StreamRenderer:
+    """
+    Create a renderer by name.
+
+    "auto" uses the rich panel when stdout is a terminal and the plain writer
+    otherwise (CI logs, pipes, files).
+    """
+    if name == "auto":
+        name = "rich" if sys.stdout.isatty() else "plain"
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{name}'. Choose from: {', '.join(RENDERERS)}")
+    return RENDERERS[name]()
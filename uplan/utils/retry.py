@@ -0,0 +1,96 @@
+"""
+Module for classifying LLM request failures and planning retries.
+"""
+
+import random
+
+from uplan.utils.text import extract_code_block
+from uplan.utils.tokens import ContextWindowError
+
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_CAP = 30.0  # seconds
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify a failed attempt to decide how to retry it.
+
+    Returns:
+        str: One of
+            - "transport": network, timeout, rate-limit or server errors; retry
+              the same request after a backoff delay
+            - "parse": the response was received but is not valid JSON or does
+              not match the schema; send a repair request
+            - "fatal": retrying cannot help (authentication, bad request, a
+              prompt larger than the context window, ...)
+            - "other": anything else; retry the same request immediately
+    """
+    import litellm
+    import openai
+
+    if isinstance(
+        error,
+        (
+            ContextWindowError,
+            litellm.AuthenticationError,
+            litellm.PermissionDeniedError,
+            litellm.NotFoundError,
+            litellm.BadRequestError,
+        ),
+    ):
+        return "fatal"
+    if isinstance(
+        error,
+        (
+            litellm.APIConnectionError,
+            # litellm.Timeout derives from openai's errors, not from litellm.APIConnectionError
+            litellm.Timeout,
+            openai.APIConnectionError,
+            litellm.RateLimitError,
+            litellm.ServiceUnavailableError,
+            litellm.InternalServerError,
+            litellm.BadGatewayError,
+            ConnectionError,
+            TimeoutError,
+        ),
+    ):
+        return "transport"
+    if isinstance(error, litellm.APIError) and (error.status_code or 0) >= 500:
+        return "transport"
+    if isinstance(error, ValueError):
+        return "parse"
+    return "other"
+
+
+def backoff_delay(
+    attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP
+) -> float:
+    """Exponential backoff with jitter: a random delay in [d/2, d] for d = base * 2^(attempt-1)."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def build_repair_prompt(text: str, error: Exception, prompt: dict = None) -> str | None:
+    """
+    Build a short request asking the model to fix its previous response.
+
+    Only the broken code block, the exact error and the output rules of the
+    original prompt are sent, instead of the whole template again.
+
+    Returns:
+        str | None: Repair prompt, or None if the response has no code block
+    """
+    block = extract_code_block(text or "")
+    if not block:
+        return None
+
+    rules = (prompt or {}).get("prompt", {}).get("output_structure", [])
+    lines = [
+        "The JSON below failed to parse or validate.",
+        f"Error: {error}",
+        "Fix only what the error requires and keep all other content unchanged.",
+        "Return the complete corrected JSON inside a ```json ``` codeblock.",
+        *rules,
+        f"```json\n{block}\n```",
+    ]
+    return "\n".join(lines)
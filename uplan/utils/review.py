@@ -0,0 +1,104 @@
+"""
+Module for the policies deciding whether a generated document is accepted.
+"""
+
+
+class ReviewPolicy:
+    """
+    Base class for review policies used by run() and run_sections().
+
+    A document only reaches review after it was parsed and validated.
+    decide() returns the answer ("y" to accept) for the given review round
+    of a stage, starting at 1, or None to ask the user.
+
+    Attributes:
+        open_files: Open documents in the default application when the
+            user is asked
+    """
+
+    def __init__(self, open_files: bool = True):
+        self.open_files = open_files
+
+    def decide(self, round: int) -> str | None:
+        raise NotImplementedError
+
+    @property
+    def needs_user(self) -> bool:
+        """Whether decide() leaves any document to the user."""
+        return True
+
+
+class ManualReview(ReviewPolicy):
+    """Ask the user about every document."""
+
+    def decide(self, round: int) -> str | None:
+        return None
+
+
+class AutoReview(ReviewPolicy):
+    """Accept every document that passed validation."""
+
+    def decide(self, round: int) -> str | None:
+        return "y"
+
+    @property
+    def needs_user(self) -> bool:
+        return False
+
+
+class AcceptAfter(ReviewPolicy):
+    """Ask the user about the first documents, then accept from round `rounds` on."""
+
+    def __init__(self, rounds: int, open_files: bool = True):
+        super().__init__(open_files)
+        if rounds < 1:
+            raise ValueError("The number of review rounds must be at least 1")
+        self.rounds = rounds
+
+    def decide(self, round: int) -> str | None:
+        return "y" if round >= self.rounds else None
+
+    @property
+    def needs_user(self) -> bool:
+        return self.rounds > 1
+
+
+REVIEW_POLICIES = {
+    "manual": ManualReview,
+    "auto": AutoReview,
+}
+
+
+def get_review_policy(
+    name: str = "manual", open_files: bool = True, headless: bool = False
+) -> ReviewPolicy:
+    """
+    Create a review policy by name.
+
+    A number N reviews manually until the N-th document of a stage, which is
+    accepted automatically ("1" is the same as "auto").
+
+    Args:
+        name: Policy name or number
+        open_files: Open documents in the default application when the
+            user is asked
+        headless: Nobody can be asked, so only policies deciding every
+            document on their own are allowed
+
+    Raises:
+        ValueError: If the policy is unknown, or asks the user in a headless run
+    """
+    if name.isdigit():
+        policy = AcceptAfter(int(name), open_files)
+    elif name in REVIEW_POLICIES:
+        policy = REVIEW_POLICIES[name](open_files)
+    else:
+        raise ValueError(
+            f"Unknown review policy '{name}'. Choose from: {', '.join(REVIEW_POLICIES)} or a number"
+        )
+    if headless and policy.needs_user:
+        raise ValueError(
+            f"The review policy '{name}' asks the user, which a headless run cannot do. "
+            "Use 'auto' to accept every valid document"
+        )
+    return policy
@@ -0,0 +1,81 @@
+"""
+Module for serializing prompt dictionaries into the text sent to the model.
+"""
+
+import json
+from typing import Callable, Dict
+
+from uplan.utils.text import dict_to_xml, optimize_for_prompt
+
+DEFAULT_FORMAT = "xml"
+
+
+def to_xml(data: dict) -> str:
+    """Nested XML-like tags with redundant whitespace collapsed."""
+    return optimize_for_prompt(dict_to_xml(data))
+
+
+def to_json(data: dict) -> str:
+    """Minified JSON."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def to_toml(data: dict) -> str:
+    """TOML without blank lines."""
+    import tomli_w
+
+    text = tomli_w.dumps(data)
+    return "\n".join(line for line in text.splitlines() if line.strip())
+
+
+def to_outline(data, indent: str = "") -> str:
+    """YAML-like outline: "key:" lines, two-space indentation, "- " list items."""
+    lines = []
+
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, (dict, list)):
+                lines.append(f"{indent}{key}:")
+                lines.append(to_outline(value, indent + "  "))
+            else:
+                lines.append(f"{indent}{key}: {value}")
+    elif isinstance(data, list):
+        for item in data:
+            if isinstance(item, (dict, list)):
+                lines.append(f"{indent}-")
+                lines.append(to_outline(item, indent + "  "))
+            else:
+                lines.append(f"{indent}- {item}")
+
+    return "\n".join(line for line in lines if line)
+
+
+SERIALIZERS: Dict[str, Callable[[dict], str]] = {
+    "xml": to_xml,
+    "json": to_json,
+    "toml": to_toml,
+    "outline": to_outline,
+}
+
+
+def serialize_prompt(prompt: dict, format: str = None) -> str:
+    """
+    Serialize a prompt with the format chosen by the template.
+
+    The format is read from ``[prompt] format = ...`` unless given explicitly,
+    and the key itself is not sent to the model.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    header = prompt.get("prompt")
+    if isinstance(header, dict) and "format" in header:
+        format = format or header["format"]
+        prompt = {**prompt, "prompt": {k: v for k, v in header.items() if k != "format"}}
+
+    format = format or DEFAULT_FORMAT
+    if format not in SERIALIZERS:
+        raise ValueError(
+            f"Unknown prompt format '{format}'. Choose from: {', '.join(SERIALIZERS)}"
+        )
+    return SERIALIZERS[format](prompt)
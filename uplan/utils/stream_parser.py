@@ -0,0 +1,225 @@
+"""
+Module for validating streamed JSON responses while they are being generated.
+"""
+
+import json
+from typing import Callable, Dict, get_args, get_origin
+
+from pydantic import TypeAdapter
+
+from uplan.utils.text import JSON_LANGUAGES, JSON_STRING, FenceScanner
+
+# Characters that may appear outside of strings in a JSON document
+JSON_STRUCTURAL_CHARS = set(" \t\r\n{}[],:-+.0123456789eEtrufalsn")
+# Characters streamed after a failed block before the stream is aborted,
+# leaving room for a later JSON block to replace it
+ABORT_AFTER = 2000
+
+
+class StreamValidationError(ValueError):
+    """Raised when a streamed response can no longer become a valid document."""
+
+
+def section_validator(validate_model: object = None) -> Callable | None:
+    """
+    Build a validator for single top-level entries of a dict-based root model.
+
+    For ``RootModel[Dict[str, Item]]`` models such as TodoModel, every top-level
+    key can be validated as soon as it is complete. Other models return None.
+    """
+    fields = getattr(validate_model, "model_fields", {})
+    root = fields.get("root")
+    if root is None:
+        return None
+
+    annotation = root.annotation
+    if get_origin(annotation) not in (dict, Dict):
+        return None
+
+    adapter = TypeAdapter(get_args(annotation)[1])
+    return adapter.validate_python
+
+
+class StreamingJSONValidator(FenceScanner):
+    """
+    Incrementally follow the JSON code blocks of a streamed response.
+
+    Feed chunks as they arrive. The code blocks are found by FenceScanner, so
+    reasoning sections and blocks in other languages are skipped. Every JSON
+    block is followed from its opening fence; each completed top-level member
+    is parsed and checked with the section validator. An untagged block that
+    does not start with an object is skipped and leaves the previous block's
+    results in place.
+
+    A failure is recorded as ``error`` (a StreamValidationError) as soon as the
+    block can no longer be valid, and the rest of that block is not checked.
+    A later JSON block replaces the failed one, like in parse_response(), so
+    feed() only raises the error once abort_after more characters arrived
+    without a new JSON block opening. Raising from the on_chunk callback of
+    display_streaming() or collect_streaming_async() closes the stream.
+    """
+
+    def __init__(self, validate_model: object = None, abort_after: int = ABORT_AFTER):
+        super().__init__()
+        self.validate_section = section_validator(validate_model)
+        self.abort_after = abort_after
+        self.received = 0  # characters fed so far
+        self.opened = None  # tag of a JSON block whose first character is pending
+        self._reset()
+
+    def _reset(self) -> None:
+        self.json_state = "search"  # search -> body -> done | failed
+        self.tagged = False
+        self.body = []
+        self.length = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.member_start = None
+        self.sections = []
+        self.closed = False  # the JSON object was closed, even if it failed validation
+        self.error = None
+        self.failed_at = None  # characters received when the block failed
+
+    @property
+    def done(self) -> bool:
+        """Whether the top-level JSON object of the last block was closed and valid."""
+        return self.json_state == "done"
+
+    @property
+    def block(self) -> str:
+        """JSON code block content received so far."""
+        return "".join(self.body)
+
+    def feed(self, chunk: str) -> None:
+        """
+        Consume the next chunk of the response.
+
+        Raises:
+            StreamValidationError: If the followed block failed and no later
+                JSON block opened within abort_after characters
+        """
+        super().feed(chunk)
+        self.received += len(chunk or "")
+        if (
+            self.error is not None
+            and self.opened is None
+            and self.received - self.failed_at >= self.abort_after
+        ):
+            raise self.error
+
+    def on_block_open(self, language: str) -> None:
+        self.opened = language if language in JSON_LANGUAGES else None
+
+    def on_block_text(self, text: str) -> None:
+        if self.opened is not None:
+            stripped = text.lstrip()
+            if not stripped:
+                return
+            tagged, self.opened = bool(self.opened), None
+            if not tagged and stripped[0] != "{":
+                # An untagged block of something else
+                return
+            self._reset()
+            self.json_state = "body"
+            self.tagged = tagged
+            text = stripped
+        if self.json_state == "body":
+            self._follow(self._scan, text)
+
+    def on_block_close(self, closed: bool) -> None:
+        self.opened = None
+        if self.json_state == "body" and closed and self.stack:
+            self._follow(self._fail, "Code block closed before the JSON object")
+
+    def on_reasoning_close(self) -> None:
+        # The blocks followed so far were examples in the reasoning
+        self.opened = None
+        self._reset()
+
+    def _follow(self, func: Callable, text: str) -> None:
+        """Run a step on the followed block, recording the failure that ends it."""
+        try:
+            func(text)
+        except StreamValidationError as e:
+            self.error = e
+            self.failed_at = self.received
+            self.json_state = "failed"
+
+    def _scan(self, text: str) -> None:
+        if not self.stack and text[0] != "{":
+            self._fail("Expected a JSON object")
+
+        self.body.append(text)
+        # Position of text[0] in the block
+        offset = self.length
+        self.length += len(text)
+        pos, end = 0, len(text)
+        while pos < end:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    pos += 1
+                    continue
+                pos = JSON_STRING.match(text, pos).end()
+                if pos == end:
+                    break
+                if text[pos] == "\\":
+                    # A backslash at the end of the chunk escapes the next one
+                    self.escape = True
+                else:
+                    self.in_string = False
+                pos += 1
+                continue
+
+            char = text[pos]
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.stack.append(char)
+                if len(self.stack) == 1:
+                    self.member_start = offset + pos + 1
+            elif char in "}]":
+                opening = "{" if char == "}" else "["
+                if self.stack.pop() != opening:
+                    self._fail(f"Unexpected '{char}'")
+                if not self.stack:
+                    # Text after the object is not part of it
+                    self.body[-1] = text[: pos + 1]
+                    self.length = offset + pos + 1
+                    self.closed = True
+                    self._check_member(self.length - 1, allow_empty=not self.sections)
+                    self.json_state = "done"
+                    return
+            elif char == ",":
+                if len(self.stack) == 1:
+                    self._check_member(offset + pos)
+                    self.member_start = offset + pos + 1
+            elif char not in JSON_STRUCTURAL_CHARS:
+                self._fail(f"Unexpected character {char!r}")
+            pos += 1
+
+    def _check_member(self, end: int, allow_empty: bool = False) -> None:
+        """Parse and validate the top-level member ending at the given position."""
+        self.body = [self.block]
+        member = self.body[0][self.member_start : end].strip()
+        if not member:
+            if not allow_empty:
+                self._fail("Empty member in JSON object")
+            return
+
+        try:
+            data = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            self._fail(f"Invalid JSON member: {e}")
+
+        for key, value in data.items():
+            if self.validate_section:
+                try:
+                    self.validate_section(value)
+                except ValueError as e:
+                    self._fail(f"Invalid section '{key}': {e}")
+            self.sections.append(key)
+
+    def _fail(self, message: str) -> None:
+        raise StreamValidationError(message)
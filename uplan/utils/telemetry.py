@@ -0,0 +1,219 @@
+"""
+Module for recording timing spans of a run as JSON lines and summarizing them.
+"""
+
+import json
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_METRICS_FILE = Path.home() / ".cache" / "uplan" / "metrics.jsonl"
+
+
+class Telemetry:
+    """
+    Append spans to a JSONL file; does nothing when no path is set.
+
+    Every line holds the run id, span name, start time (epoch seconds),
+    duration (seconds) and the span's attributes.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else None
+        self.run_id = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def emit(self, name: str, start: float, duration: float, **attrs) -> None:
+        """Write one span."""
+        if not self.enabled:
+            return
+        record = {
+            "run": self.run_id,
+            "span": name,
+            "start": round(start, 3),
+            "duration": round(duration, 6),
+            **{key: value for key, value in attrs.items() if value is not None},
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        Time the body of a with block.
+
+        The attribute dict is yielded so the body can add attributes; the type
+        of an exception leaving the block is recorded as "error".
+        """
+        if not self.enabled:
+            yield attrs
+            return
+
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs.setdefault("error", type(e).__name__)
+            raise
+        finally:
+            self.emit(name, start, time.perf_counter() - started, **attrs)
+
+
+_telemetry = Telemetry()
+
+
+def configure(path: Path = None) -> Telemetry:
+    """Start recording a new run to path, or stop recording if it is None."""
+    global _telemetry
+    _telemetry = Telemetry(path)
+    return _telemetry
+
+
+def span(name: str, **attrs):
+    """Time a block with the configured recorder (see Telemetry.span)."""
+    return _telemetry.span(name, **attrs)
+
+
+class StreamTimer:
+    """Measure the time to first token and streaming rate of one response."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.chunks = 0
+
+    def wrap(self, on_chunk=None):
+        """Wrap an on_chunk callback so that every content delta is counted."""
+
+        def counted(content: str) -> None:
+            if self.first_token is None:
+                self.first_token = time.perf_counter()
+            self.chunks += 1
+            if on_chunk:
+                on_chunk(content)
+
+        return counted
+
+    def attrs(self, completion_tokens: int = None) -> dict:
+        """
+        Span attributes: ttft, chunks and tokens_per_sec.
+
+        The rate uses the reported completion tokens, or the number of chunks
+        when the provider did not report usage.
+        """
+        if self.first_token is None:
+            return {"chunks": 0}
+        streaming = time.perf_counter() - self.first_token
+        tokens = completion_tokens or self.chunks
+        return {
+            "ttft": round(self.first_token - self.started, 6),
+            "chunks": self.chunks,
+            "tokens_per_sec": round(tokens / streaming, 2) if streaming > 0 else None,
+        }
+
+
+def usage_cost(model: str, usage: dict) -> float | None:
+    """Cost in USD of a response according to litellm's price list, if known."""
+    import litellm
+
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model,
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+        )
+    except Exception:
+        return None
+    return prompt_cost + completion_cost
+
+
+def usage_attrs(model: str, usage: dict) -> dict:
+    """Span attributes for a usage summary: token counts and cost."""
+    if not usage:
+        return {}
+    return {**usage, "cost": usage_cost(model, usage)}
+
+
+def load_spans(path: Path) -> list[dict]:
+    """Read all spans of a metrics file, skipping broken lines."""
+    spans = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return spans
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile (q in 0-100) of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def _distribution(spans: list[dict], key: str) -> dict:
+    values = [record[key] for record in spans if record.get(key) is not None]
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+
+
+def summarize(spans: list[dict]) -> dict:
+    """
+    Aggregate spans across runs.
+
+    Returns:
+        dict: {
+            "requests": {(model, stage): {"count", "errors", "retries",
+                "duration", "ttft", "tokens_per_sec", "cost"}},
+            "spans": {span name: {"count", "duration"}},
+        }
+        where duration, ttft and tokens_per_sec hold p50 and p95 values.
+    """
+    requests = {}
+    for record in spans:
+        if record.get("span") == "request":
+            requests.setdefault((record.get("model"), record.get("stage")), []).append(record)
+
+    summary = {"requests": {}, "spans": {}}
+    for key, group in requests.items():
+        attempts = {}
+        for record in group:
+            run_stage = (record.get("run"), record.get("stage"))
+            attempts[run_stage] = max(attempts.get(run_stage, 0), record.get("attempt", 1))
+        summary["requests"][key] = {
+            "count": len(group),
+            "errors": sum(1 for record in group if record.get("error")),
+            "retries": sum(count - 1 for count in attempts.values()),
+            "duration": _distribution(group, "duration"),
+            "ttft": _distribution(group, "ttft"),
+            "tokens_per_sec": _distribution(group, "tokens_per_sec"),
+            "cost": sum(record.get("cost") or 0 for record in group),
+        }
+
+    names = {}
+    for record in spans:
+        if record.get("span") != "request":
+            names.setdefault(record.get("span"), []).append(record)
+    for name, group in names.items():
+        summary["spans"][name] = {
+            "count": len(group),
+            "duration": _distribution(group, "duration"),
+        }
+    return summary
@@ -0,0 +1,213 @@
+"""
+Module for compiling prompt templates and caching the compiled versions.
+
+A compiled template holds everything a run needs from a template file: the
+parsed TOML, the prompt header, the ordered questions with their defaults and
+the serialized static prompt prefix. Compiled templates are cached in memory
+and, once configured, on disk, keyed by the file's path, mtime and size, so a
+changed file is compiled again automatically.
+"""
+
+import hashlib
+import json
+import os
+import tomllib
+from pathlib import Path
+from typing import NamedTuple
+
+from uplan.utils.file import write_file_atomic
+from uplan.utils.messages import remember_prefix, split_prompt
+from uplan.utils.serializers import serialize_prompt
+from uplan.utils.text import compact_prompt
+
+# Bumped whenever the compiled format changes, to ignore older cache files
+COMPILED_VERSION = 1
+
+DEFAULT_VALUE = "<select>"
+
+# Folder of compiled templates inside the response cache folder
+TEMPLATE_CACHE_SUBDIR = "templates"
+
+
+class Question(NamedTuple):
+    section: str
+    key: str
+    ask: str
+    description: str
+    default: str
+    required: bool
+
+
+def parse_questions(template: dict) -> tuple[list[Question], dict] | None:
+    """
+    Read the questions of a [template.<section>.<key>] table.
+
+    Returns:
+        tuple | None: (questions in template order, prompt template with the
+            default of every question), or None if the template does not
+            consist of questions (e.g. the to-do structure of todo.toml)
+    """
+    if not isinstance(template, dict):
+        return None
+
+    questions = []
+    defaults = {}
+    for section, entries in template.items():
+        if not isinstance(entries, dict):
+            return None
+        defaults[section] = {}
+        for key, q in entries.items():
+            if not isinstance(q, dict):
+                return None
+            question = Question(
+                section=section,
+                key=key,
+                ask=q.get("ask", key),
+                description=q.get("description", ""),
+                default=q.get("default", DEFAULT_VALUE),
+                required=q.get("required", False),
+            )
+            questions.append(question)
+            defaults[section][key] = question.default + f" (e.g., {question.description})"
+    return questions, defaults
+
+
+class CompiledTemplate:
+    """
+    A parsed template file.
+
+    Attributes:
+        data: Parsed TOML; shared between runs, so it must not be modified
+        questions: Questions of the template, or None if it has none
+        defaults: Prompt template with every question's default, used as
+            the <template> of question prompts (None without questions)
+        prefix: Serialized system message of the template's static prompt
+    """
+
+    def __init__(self, data: dict, questions: list[Question] = None, defaults: dict = None):
+        self.data = data
+        self.questions = questions
+        self.defaults = defaults
+        self.prefix = None
+
+    @classmethod
+    def compile(cls, data: dict) -> "CompiledTemplate":
+        parsed = parse_questions(data.get("template"))
+        compiled = cls(data, *(parsed or (None, None)))
+        compiled.prefix = serialize_prompt(compiled.static())
+        return compiled
+
+    @property
+    def header(self) -> dict | None:
+        return self.data.get("prompt")
+
+    def prompt(self) -> dict:
+        """A new top-level prompt dictionary; nested values are shared."""
+        prompt = dict(self.data)
+        if self.defaults is not None:
+            prompt["template"] = self.defaults
+        return prompt
+
+    def static(self) -> dict:
+        """The compacted static prompt that forms the system message."""
+        static, _ = split_prompt(self.prompt())
+        return compact_prompt(static)
+
+    def to_dict(self) -> dict:
+        questions = self.questions
+        return {
+            "data": self.data,
+            "questions": [q._asdict() for q in questions] if questions is not None else None,
+            "defaults": self.defaults,
+            "prefix": self.prefix,
+        }
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "CompiledTemplate":
+        questions = entry["questions"]
+        compiled = cls(
+            entry["data"],
+            [Question(**q) for q in questions] if questions is not None else None,
+            entry["defaults"],
+        )
+        compiled.prefix = entry["prefix"]
+        return compiled
+
+
+class TemplateCache:
+    """
+    Compiled templates by path, in memory and optionally on disk.
+
+    An entry is valid while the template file keeps its mtime and size. Disk
+    entries are ``<hash of the path>.json`` files in cache_dir; a missing or
+    unwritable cache folder only disables the disk cache.
+    """
+
+    def __init__(self, cache_dir: Path = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.entries: dict[str, tuple[tuple[int, int], CompiledTemplate]] = {}
+
+    def _disk_path(self, path: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(path.encode('utf-8')).hexdigest()}.json"
+
+    def _load_disk(self, path: str, stamp: tuple[int, int]) -> CompiledTemplate | None:
+        try:
+            with open(self._disk_path(path), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("version") != COMPILED_VERSION or tuple(entry["stamp"]) != stamp:
+                return None
+            return CompiledTemplate.from_dict(entry)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_disk(self, path: str, stamp: tuple[int, int], compiled: CompiledTemplate) -> None:
+        entry = {"version": COMPILED_VERSION, "path": path, "stamp": stamp, **compiled.to_dict()}
+        try:
+            # TOML dates have no JSON form; such templates are only kept in memory
+            text = json.dumps(entry, ensure_ascii=False)
+            write_file_atomic(self._disk_path(path), text.encode("utf-8"))
+        except (OSError, TypeError):
+            pass
+
+    def load(self, path: Path) -> CompiledTemplate:
+        """
+        Return the compiled template of a file, compiling it if it changed.
+
+        Raises:
+            FileNotFoundError: If the template does not exist
+            tomllib.TOMLDecodeError: If the template is not valid TOML
+        """
+        path = str(Path(path).resolve())
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self.entries.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        compiled = self._load_disk(path, stamp) if self.cache_dir else None
+        if compiled is None:
+            with open(path, "rb") as f:
+                compiled = CompiledTemplate.compile(tomllib.load(f))
+            if self.cache_dir:
+                self._save_disk(path, stamp, compiled)
+
+        # Runs using this template can skip serializing the system message
+        remember_prefix(compiled.static(), compiled.prefix)
+        self.entries[path] = (stamp, compiled)
+        return compiled
+
+
+_templates = TemplateCache()
+
+
+def configure(cache_dir: Path = None) -> TemplateCache:
+    """Cache compiled templates in cache_dir as well, or only in memory if None."""
+    global _templates
+    _templates = TemplateCache(cache_dir)
+    return _templates
+
+
+def load_template(path: Path) -> CompiledTemplate:
+    """Load a template through the configured cache (see TemplateCache.load)."""
+    return _templates.load(path)
@@ -2,12 +2,220 @@
 Module for text processing and code extraction.
 """
 
+import json
 import re
+from typing import NamedTuple
+
+FENCE = "```"
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+# Languages whose blocks are JSON candidates; models often leave the tag out
+JSON_LANGUAGES = ("", "json")
+
+TEXT_TOKEN = re.compile(r"```|</?think>")
+FENCE_TAG = re.compile(r"[ \t]*([\w+.#-]*)[ \t]*")
+# Text of a JSON block up to a fence outside of strings, an unterminated
+# string or the end; strings end at a newline since JSON strings never span lines
+JSON_BODY = re.compile(r'(?:[^"`]++|`(?!``)|"(?:[^"\\\n]++|\\[\s\S])*+["\n])*+')
+# Rest of a JSON string up to its end, the end of the text or a trailing backslash
+JSON_STRING = re.compile(r'(?:[^"\\\n]++|\\[\s\S])*+')
+CLOSING_FENCE = re.compile(r"\n[ \t]*```")
+
+
+class CodeBlock(NamedTuple):
+    language: str
+    content: str
+    closed: bool
+
+
+class FenceScanner:
+    """
+    Collect the fenced code blocks of a model response in a single pass.
+
+    Text can be fed in chunks as it streams in; every character is examined
+    once and only a few trailing characters are held back when a marker may
+    be split between chunks. A JSON string left open at the end of a chunk
+    is continued where it stopped, so long values are not scanned again.
+    Reasoning is skipped: everything between <think> and </think>, and every
+    block seen before a </think> without an opening tag (models whose chat
+    template opens the section). Inside JSON blocks, fences within strings do
+    not close the block.
+
+    Subclasses can follow blocks while they stream through the on_* hooks.
+    """
+
+    def __init__(self):
+        self.blocks: list[CodeBlock] = []
+        self.state = "text"  # text -> think | tag -> block -> text
+        self.buffer = ""
+        self.language = ""
+        self.content = []
+        self.string_open = False  # inside a JSON string at the end of the buffer
+        self.finished = False
+
+    def on_block_open(self, language: str) -> None:
+        """Called when a code block starts."""
+
+    def on_block_text(self, text: str) -> None:
+        """Called with every piece of block content, in order."""
+
+    def on_block_close(self, closed: bool) -> None:
+        """Called when a block ends; closed is False at the end of the response."""
+
+    def on_reasoning_close(self) -> None:
+        """Called when a </think> without an opening tag discards earlier blocks."""
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next chunk of the response."""
+        if not chunk or self.finished:
+            return
+        self.buffer += chunk
+        pos, waiting = 0, False
+        while not waiting:
+            pos, waiting = self._advance(pos)
+        self.buffer = self.buffer[pos:]
+
+    def finish(self) -> list[CodeBlock]:
+        """Flush held-back text at the end of the response and return all blocks."""
+        if not self.finished:
+            self.finished = True
+            if self.state == "tag":
+                # The response ended on the fence line
+                self._open_block("")
+            if self.state == "block":
+                self._append(self.buffer)
+                self._close_block(closed=False)
+            self.buffer = ""
+        return self.blocks
+
+    def json_block(self) -> tuple[str, object] | None:
+        """
+        Return the last JSON block that parses, as (content, parsed data).
+
+        Blocks tagged with another language are skipped.
+        """
+        for block in reversed(self.finish()):
+            if block.language in JSON_LANGUAGES:
+                try:
+                    return block.content, json.loads(block.content)
+                except json.JSONDecodeError:
+                    continue
+        return None
+
+    def _advance(self, pos: int) -> tuple[int, bool]:
+        """
+        Handle the next marker after pos.
+
+        Returns:
+            tuple[int, bool]: (position to continue from, whether more text
+            is needed before scanning can continue)
+        """
+        buffer = self.buffer
+
+        if self.state == "text":
+            match = TEXT_TOKEN.search(buffer, pos)
+            if match is None:
+                return max(pos, len(buffer) - len(THINK_CLOSE) + 1), True
+            if match.group() == FENCE:
+                self.state = "tag"
+            elif match.group() == THINK_OPEN:
+                self.state = "think"
+            else:
+                # Blocks so far were part of an unopened reasoning section
+                self.blocks.clear()
+                self.on_reasoning_close()
+            return match.end(), False
+
+        if self.state == "think":
+            end = buffer.find(THINK_CLOSE, pos)
+            if end == -1:
+                return max(pos, len(buffer) - len(THINK_CLOSE) + 1), True
+            self.state = "text"
+            return end + len(THINK_CLOSE), False
+
+        if self.state == "tag":
+            match = FENCE_TAG.match(buffer, pos)
+            if match.end() == len(buffer):
+                return pos, True
+            self._open_block(match.group(1).lower())
+            # A block may start on the fence line, e.g. ```{"a": 1}```. The
+            # newline is left to other languages, whose closing fence starts a line
+            skip = buffer[match.end()] == "\n" and self.language in JSON_LANGUAGES
+            return match.end() + skip, False
+
+        if self.language not in JSON_LANGUAGES:
+            # Other languages may contain fences, so only one that starts a
+            # line closes the block
+            match = CLOSING_FENCE.search(buffer, pos)
+            if match is None:
+                line = buffer.rfind("\n", pos)
+                partial = line != -1 and not buffer[line:].strip(" \t`\n")
+                return self._append_until(pos, line if partial else len(buffer)), True
+            self._append(buffer[pos : match.start()])
+            self._close_block(closed=True)
+            return match.end(), False
+
+        if self.string_open:
+            end = JSON_STRING.match(buffer, pos).end()
+            if end == len(buffer) or buffer[end] == "\\":
+                # A trailing backslash is held back until the escaped character arrives
+                return self._append_until(pos, end), True
+            # The string ends at a quote, or at a newline for broken JSON
+            self.string_open = False
+            return self._append_until(pos, end + 1), False
+
+        end = JSON_BODY.match(buffer, pos).end()
+        if buffer.startswith(FENCE, end):
+            self._append(buffer[pos:end])
+            self._close_block(closed=True)
+            return end + len(FENCE), False
+        if end < len(buffer):
+            # A string that is not closed yet, continued from its opening quote
+            self.string_open = True
+            return self._append_until(pos, end + 1), False
+        # Trailing backticks may be the start of the closing fence
+        while end > max(pos, len(buffer) - len(FENCE) + 1) and buffer[end - 1] == "`":
+            end -= 1
+        return self._append_until(pos, end), True
+
+    def _append(self, text: str) -> None:
+        if text:
+            self.content.append(text)
+            self.on_block_text(text)
+
+    def _append_until(self, pos: int, end: int) -> int:
+        """Add buffered block text up to end, holding back the rest."""
+        self._append(self.buffer[pos:end])
+        return end
+
+    def _open_block(self, language: str) -> None:
+        self.language = language
+        self.string_open = False
+        self.state = "block"
+        self.on_block_open(language)
+
+    def _close_block(self, closed: bool) -> None:
+        self.blocks.append(CodeBlock(self.language, "".join(self.content).strip(), closed))
+        self.content = []
+        self.state = "text"
+        self.on_block_close(closed)
+
+
+def scan_code_blocks(doc: str) -> FenceScanner:
+    """Scan a complete document with a FenceScanner."""
+    scanner = FenceScanner()
+    scanner.feed(doc)
+    scanner.finish()
+    return scanner
 
 
 def extract_code_block(doc: str) -> str | None:
     """
-    Extract the content between triple backticks in the given document.
+    Extract the code block holding the answer of a model response.
+
+    The last JSON block (tagged json or untagged) that parses is preferred;
+    otherwise the last block is returned. Blocks in reasoning sections are
+    ignored and an unclosed block at the end of the response is included.
 
     Args:
         doc (str): The contents of the document.
@@ -15,30 +223,89 @@ def extract_code_block(doc: str) -> str | None:
     Returns:
         str | None: The extracted content (trimmed) or None if no code block is found.
     """
-    patterns = [
-        r"```(?:\w+\n)?(.*?)```",  # Matches content between triple backticks
-        r"```(.+)$",  # Matches content after triple backticks
-    ]
-    for pattern in patterns:
-        match = re.search(pattern, doc, re.DOTALL)
-        if match:
-            return match.group(1).strip()
-    return None
+    scanner = scan_code_blocks(doc)
+    found = scanner.json_block()
+    if found is not None:
+        return found[0]
+    return scanner.blocks[-1].content if scanner.blocks else None
 
 
 def dict_to_xml(d, xml_indent=""):
-    result = ""
+    """
+    Convert a dictionary to XML-like text, recursing into nested values.
 
-    for key, value in d.items():
-        result += f"{xml_indent}<{key}>"
-        result += str(value)
+    Nested dictionaries become nested tags. List items are written one per line
+    with a leading "- ", or wrapped in <item> tags when they are dictionaries.
+    """
+    lines = []
 
-        result += f"</{key}>\n"
+    for key, value in d.items():
+        if isinstance(value, dict):
+            lines.append(f"{xml_indent}<{key}>")
+            lines.append(dict_to_xml(value, xml_indent + "  ").rstrip("\n"))
+            lines.append(f"{xml_indent}</{key}>")
+        elif isinstance(value, list):
+            lines.append(f"{xml_indent}<{key}>")
+            for item in value:
+                if isinstance(item, dict):
+                    lines.append(dict_to_xml({"item": item}, xml_indent + "  ").rstrip("\n"))
+                else:
+                    lines.append(f"{xml_indent}  - {item}")
+            lines.append(f"{xml_indent}</{key}>")
+        else:
+            lines.append(f"{xml_indent}<{key}>{value}</{key}>")
 
-    return result
+    return "\n".join(lines) + "\n"
 
 
 def optimize_for_prompt(text: str) -> str:
-    text = re.sub(r"\s+", "", text)
+    """
+    Collapse redundant whitespace without merging words.
+
+    Whitespace between tags is removed and any other run of whitespace becomes
+    a single space.
+    """
+    text = re.sub(r">\s+<", "><", text)
+    text = re.sub(r"\s+", " ", text)
+
+    return text.strip()
+
+
+SELECT_HINT_PATTERN = re.compile(r"^(<select>)\s*\(e\.g\.,\s*(.*?)\)$", re.DOTALL)
+
+
+def compact_prompt(data):
+    """
+    Recursively drop empty values and empty <select> hints from prompt data.
+
+    Values such as "", [], {} and None carry no information for the model, and
+    "<select> (e.g., )" (a question without description) becomes "<select>".
+    """
+    if isinstance(data, dict):
+        compacted = {key: compact_prompt(value) for key, value in data.items()}
+        return {key: value for key, value in compacted.items() if not _is_empty(value)}
+    if isinstance(data, list):
+        compacted = [compact_prompt(item) for item in data]
+        return [item for item in compacted if not _is_empty(item)]
+    if isinstance(data, str):
+        match = SELECT_HINT_PATTERN.match(data.strip())
+        if match and not match.group(2).strip():
+            return match.group(1)
+        return data.strip()
+    return data
+
+
+def strip_select_hints(data):
+    """Reduce every "<select> (e.g., ...)" entry to a bare "<select>"."""
+    if isinstance(data, dict):
+        return {key: strip_select_hints(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [strip_select_hints(item) for item in data]
+    if isinstance(data, str):
+        match = SELECT_HINT_PATTERN.match(data.strip())
+        return match.group(1) if match else data
+    return data
+
 
-    return text
+def _is_empty(value) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
@@ -0,0 +1,101 @@
+"""
+Module for counting prompt tokens and fitting prompts into the model's context window.
+"""
+
+import os
+from typing import Callable, TypeVar
+
+from uplan.utils.text import compact_prompt, strip_select_hints
+
+DEFAULT_OLLAMA_CONTEXT_LENGTH = 2048
+# Tokens kept free for the response, capped at half of the context window
+DEFAULT_OUTPUT_RESERVE = 4096
+
+
+Serialized = TypeVar("Serialized", str, list)
+
+
+class ContextWindowError(RuntimeError):
+    """Raised when a prompt does not fit into the model's context window."""
+
+
+def count_tokens(text: str | list[dict], model: str) -> int:
+    """Count tokens of a text or a list of chat messages with the model's tokenizer."""
+    import litellm
+
+    if isinstance(text, list):
+        return litellm.token_counter(model=model, messages=text)
+    return litellm.token_counter(model=model, text=text)
+
+
+def get_context_window(model: str) -> int | None:
+    """
+    Return the input context size of a model, or None if it is unknown.
+
+    Ollama models use OLLAMA_CONTEXT_LENGTH (the server default is 2048);
+    other models use litellm's model information.
+    """
+    import litellm
+
+    try:
+        _, provider, _, _ = litellm.get_llm_provider(model)
+    except Exception:
+        provider = None
+
+    if provider == "ollama":
+        return int(os.getenv("OLLAMA_CONTEXT_LENGTH", DEFAULT_OLLAMA_CONTEXT_LENGTH))
+
+    try:
+        info = litellm.get_model_info(model)
+    except Exception:
+        return None
+    return info.get("max_input_tokens") or info.get("max_tokens")
+
+
+def fit_prompt(
+    prompt: dict,
+    model: str,
+    serialize: Callable[[dict], Serialized],
+    output_reserve: int = DEFAULT_OUTPUT_RESERVE,
+) -> tuple[Serialized, int, int | None]:
+    """
+    Compact and serialize a prompt, making sure it fits the context window.
+
+    Empty entries are always dropped. If the prompt is still too large, the
+    low-priority "(e.g., ...)" hints of <select> entries are removed.
+
+    Args:
+        prompt: Prompt dictionary
+        model: Name of the target model
+        serialize: Function turning the prompt dictionary into text or
+            chat messages
+        output_reserve: Tokens kept free for the response
+
+    Returns:
+        tuple: (serialized prompt, prompt tokens, input budget or None)
+
+    Raises:
+        ContextWindowError: If the prompt cannot be trimmed below the budget
+    """
+    compacted = compact_prompt(prompt)
+    text = serialize(compacted)
+    tokens = count_tokens(text, model)
+
+    context_window = get_context_window(model)
+    if context_window is None:
+        return text, tokens, None
+
+    budget = context_window - min(output_reserve, context_window // 2)
+    if tokens <= budget:
+        return text, tokens, budget
+
+    text = serialize(strip_select_hints(compacted))
+    tokens = count_tokens(text, model)
+    if tokens <= budget:
+        return text, tokens, budget
+
+    raise ContextWindowError(
+        f"Prompt needs {tokens} tokens but {model} only has {budget} available "
+        f"(context window {context_window}). Use a model with a larger context"
+        " or raise OLLAMA_CONTEXT_LENGTH for Ollama models."
+    )
@@ -0,0 +1,125 @@
+"""
+Module for warming up the model provider while the user answers the questions.
+
+Right after the model check, a background thread loads the tokenizer, asks
+Ollama to load the model into memory, and, for providers served through
+litellm's OpenAI-compatible client, opens a pooled connection (DNS, TCP and
+TLS) that the first request reuses. Every step is best effort: a failed
+warm-up only means the first request pays for the setup itself.
+"""
+
+import json
+import os
+import threading
+import urllib.request
+from typing import Callable
+
+from uplan.utils.telemetry import span
+
+DEFAULT_OLLAMA_API_BASE = "http://localhost:11434"
+# How long Ollama keeps the model loaded without requests
+OLLAMA_KEEP_ALIVE = "10m"
+# Loading a large model can take a while; the thread does not block anything
+OLLAMA_LOAD_TIMEOUT = 300.0
+CONNECT_TIMEOUT = 10.0
+# Idle time a warmed connection stays in the pool, to outlast the questions
+KEEPALIVE_EXPIRY = 300.0
+
+# Default API hosts of providers whose requests go through litellm.client_session
+OPENAI_COMPATIBLE_BASES = {
+    "openai": "https://api.openai.com",
+    "deepseek": "https://api.deepseek.com",
+    "xai": "https://api.x.ai",
+    "openrouter": "https://openrouter.ai",
+    "azure": None,
+}
+
+
+def load_tokenizer(model: str) -> None:
+    """Load the tokenizer used to count prompt tokens."""
+    from uplan.utils.tokens import count_tokens
+
+    count_tokens("warm-up", model)
+
+
+def load_ollama_model(name: str, api_base: str = None) -> None:
+    """Ask Ollama to load a model into memory without generating anything."""
+    api_base = api_base or os.getenv("OLLAMA_API_BASE", DEFAULT_OLLAMA_API_BASE)
+    request = urllib.request.Request(
+        f"{api_base.rstrip('/')}/api/generate",
+        data=json.dumps({"model": name, "keep_alive": OLLAMA_KEEP_ALIVE}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=OLLAMA_LOAD_TIMEOUT) as response:
+        response.read()
+
+
+def open_connection(api_base: str) -> None:
+    """
+    Open a connection to the provider in the client litellm uses for requests.
+
+    litellm.client_session is only set if the user did not configure one; its
+    pool keeps the connection open so the first request skips DNS and TLS.
+    """
+    import httpx
+    import litellm
+
+    if litellm.client_session is None:
+        litellm.client_session = httpx.Client(
+            follow_redirects=True,
+            limits=httpx.Limits(keepalive_expiry=KEEPALIVE_EXPIRY),
+        )
+    # Any response, even 404, leaves an established connection in the pool
+    litellm.client_session.head(api_base, timeout=CONNECT_TIMEOUT)
+
+
+def warmup_steps(model: str) -> list[tuple[str, Callable[[], None]]]:
+    """The warm-up steps for a model, as (name, function) pairs."""
+    import litellm
+
+    steps = []
+    name, provider, _, api_base = litellm.get_llm_provider(model)
+
+    # Loading an Ollama model takes longest, so it is started first
+    if provider in ("ollama", "ollama_chat"):
+        steps.append(("model_load", lambda: load_ollama_model(name, api_base)))
+    elif provider in OPENAI_COMPATIBLE_BASES:
+        api_base = (
+            api_base
+            or os.getenv(f"{provider.upper()}_API_BASE")
+            or OPENAI_COMPATIBLE_BASES[provider]
+        )
+        if api_base:
+            steps.append(("connection", lambda: open_connection(api_base)))
+    steps.append(("tokenizer", lambda: load_tokenizer(model)))
+    return steps
+
+
+def warmup(model: str) -> None:
+    """Run the warm-up steps of a model, ignoring failures."""
+    try:
+        steps = warmup_steps(model)
+    except Exception:
+        return
+    for step, func in steps:
+        try:
+            with span("warmup", step=step, model=model):
+                func()
+        except Exception:
+            continue
+
+
+def start_warmup(model: str) -> threading.Thread:
+    """
+    Warm up the preferred model in a daemon thread.
+
+    Only the first model of a comma-separated list is warmed up, so Ollama
+    does not load fallback models that may never be used.
+    """
+    from uplan.utils.hedge import parse_models
+
+    thread = threading.Thread(
+        target=warmup, args=(parse_models(model)[0],), name="uplan-warmup", daemon=True
+    )
+    thread.start()
+    return thread